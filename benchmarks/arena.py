@@ -0,0 +1,113 @@
+"""
+Compares the dense and the chunked occupancy grids on growing arenas.
+
+The same snakes crawl across both grids, each step occupies their new heads,
+vacates their tails and picks a free cell for a food, as GameLogicSystem
+does. The memory held by each grid is measured, the dense grid is skipped
+once it would need more than a few hundred MB. Steps are timed on a second
+run, without tracemalloc. A last run plays a whole
+GameLogicSystem room on the largest arena, where the snakes wrap around the
+board edge.
+
+Usage: python -m benchmarks.arena [snakes] [steps]
+"""
+
+import random
+import sys
+import tracemalloc
+
+from entities.type import Food, Snake
+from systems.game_logic import GameLogicSystem
+from systems.occupancy import ChunkedOccupancyGrid, OccupancyGrid
+from utils.timer import Timer
+
+SNAKE_SIZE = 50
+DENSE_SIDE_LIMIT = 4000
+
+
+def _crawl(grid, side: int, num_snakes: int, steps: int) -> float:
+    """Moves the snakes right for a number of steps, returns us per step"""
+    rng = random.Random(0)
+    food = Food((0, 0))
+    snakes = []
+    for index in range(num_snakes):
+        y = index * side // num_snakes
+        snake = Snake(f"player{index}", (0, y))
+        cells = [(x, y) for x in range(SNAKE_SIZE)]
+        for cell in cells:
+            grid.occupy(cell, snake)
+        snakes.append((snake, cells))
+
+    timer = Timer()
+    for _ in range(steps):
+        for snake, cells in snakes:
+            head_x, y = cells[-1]
+            head = ((head_x + 1) % side, y)
+            grid.vacate(cells.pop(0), snake)
+            grid.occupy(head, snake)
+            cells.append(head)
+        grid.occupy(grid.random_free_cell(rng), food)
+    return 1_000_000 * timer.elapsed_sec() / steps
+
+
+def _measure(grid_type, side: int, num_snakes: int, steps: int) -> tuple[float, float]:
+    tracemalloc.start()
+    grid = grid_type(side, side)
+    _crawl(grid, side, num_snakes, steps)
+    megabytes = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    # Timed again without tracemalloc slowing every allocation down
+    return megabytes, _crawl(grid_type(side, side), side, num_snakes, steps)
+
+
+def _room_step_us(side: int, num_snakes: int, steps: int) -> float:
+    game_logic_system = GameLogicSystem(side, side, 1, rng=random.Random(0))
+    entities = [Food((0, 0))]
+    for index in range(num_snakes):
+        y = index * side // num_snakes
+        # Starts right before the edge, so the heads wrap in the first steps
+        snake = Snake(f"player{index}", (side - 1, y))
+        entities.append(snake)
+    game_logic_system.run(entities)
+
+    logic_ms = 0
+    for _ in range(steps):
+        for entity in entities:
+            if entity.movement_component is not None:
+                entity.movement_component.move(None)
+        timer = Timer()
+        game_logic_system.run(entities)
+        logic_ms += timer.elapsed_ms()
+
+    alive = sum(isinstance(entity, Snake) for entity in entities)
+    assert alive == num_snakes, "Snakes died crossing the board edge"
+    return 1000 * logic_ms / steps
+
+
+def main():
+    num_snakes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(f"\n{num_snakes} snakes of {SNAKE_SIZE} cells, {steps} steps")
+    for side in (100, 1000, 4000, 10000):
+        for name, grid_type in (
+            ("dense", OccupancyGrid),
+            ("chunked", ChunkedOccupancyGrid),
+        ):
+            if grid_type is OccupancyGrid and side > DENSE_SIDE_LIMIT:
+                print(f"{side:>5}x{side:<5} {name:<8} skipped")
+                continue
+            megabytes, us_per_step = _measure(grid_type, side, num_snakes, steps)
+            print(
+                f"{side:>5}x{side:<5} {name:<8} {megabytes:9.2f} MB"
+                f" {us_per_step:9.1f} us/step"
+            )
+
+    print(
+        f"\nGameLogicSystem on 10000x10000: "
+        f"{_room_step_us(10000, num_snakes, steps):.1f} us/step"
+    )
+
+
+if __name__ == "__main__":
+    main()
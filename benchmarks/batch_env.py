@@ -0,0 +1,49 @@
+"""
+Measures the game steps per second of the batch environment.
+
+Random actions are fed to BatchSnakeEnv for growing numbers of games in one
+process, then to ProcessBatchEnv split over worker processes. An
+observation is taken after every step, as a training loop would.
+
+Usage: python -m benchmarks.batch_env [steps] [workers]
+"""
+
+import os
+import sys
+
+import numpy as np
+
+from game_instances.batch_env import NO_ACTION, BatchSnakeEnv, ProcessBatchEnv
+from utils.timer import Timer
+
+
+def _steps_per_second(env, steps: int) -> float:
+    rng = np.random.default_rng(0)
+    actions = rng.integers(NO_ACTION + 1, size=(steps, env.num_envs))
+    env.reset()
+    timer = Timer()
+    for step_actions in actions:
+        env.step(step_actions)
+        env.observe()
+    return steps * env.num_envs / timer.elapsed_sec()
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+
+    print(f"\n{steps} steps of 10x10 games, observed after every step")
+    for num_envs in (1, 64, 1024, 8192):
+        env = BatchSnakeEnv(num_envs, seed=0)
+        print(f"{num_envs:>6} games: {_steps_per_second(env, steps):>12,.0f} steps/s")
+
+    env = ProcessBatchEnv(8192, workers, seed=0)
+    try:
+        rate = _steps_per_second(env, steps)
+    finally:
+        env.close()
+    print(f"  8192 games on {workers} workers: {rate:>12,.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures the cold start of a game server up to "Serving on".
+
+The headless entry point is started as a fresh interpreter a number of
+times and the time until it prints that it is serving is taken. The same
+entry with pygame and NumPy imported up front shows what the eager imports
+used to cost.
+
+Usage: python -m benchmarks.cold_start [runs]
+"""
+
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRIES = {
+    "headless": ["server.py"],
+    "eager imports": [
+        "-c",
+        "import pygame, numpy, runpy; runpy.run_path('server.py', run_name='__main__')",
+    ],
+}
+
+
+def _cold_start_ms(args: list[str]) -> float:
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", *args],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        start_new_session=True,
+        env=dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="hide"),
+    )
+    try:
+        for line in process.stdout:
+            if "Serving on" in line:
+                return (time.perf_counter() - start) * 1000
+        raise RuntimeError(f"{args} exited before serving")
+    finally:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+def _loaded_modules() -> list[str]:
+    check = (
+        "import sys, server;"
+        "print(' '.join(m for m in ('pygame', 'numpy') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", check], cwd=ROOT, capture_output=True, text=True
+    )
+    return output.stdout.split()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    print(f"\n{runs} cold starts each, time to 'Serving on'")
+    for name, args in ENTRIES.items():
+        times = [_cold_start_ms(args) for _ in range(runs)]
+        print(
+            f"{name:<14} {statistics.median(times):7.1f} ms median"
+            f" {min(times):7.1f} ms best"
+        )
+    print(f"Heavy modules loaded by the entry: {_loaded_modules() or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
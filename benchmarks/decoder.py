@@ -0,0 +1,83 @@
+"""
+Compares the ways of decoding a message string into its schema.
+
+The two pass path is how MessageDecoder used to work: json.loads into a dict,
+then model_validate on it. The one pass path parses and validates with
+model_validate_json, as MessageDecoder does now. Snapshots of growing rooms
+are decoded, then a stream of player commands as the server gets them.
+
+Usage: python -m benchmarks.decoder [messages]
+"""
+
+import json
+import sys
+
+from schemas.entities import EntitiesMessage, EntityMessage
+from schemas.game import PlayerCommand
+from schemas.registry import MESSAGE_MODELS
+from systems.decoder import MessageDecoder
+from utils.timer import Timer
+
+
+def _two_pass(data: str):
+    parsed_data = json.loads(data)
+    return MESSAGE_MODELS[parsed_data["type"]].model_validate(parsed_data)
+
+
+def _snapshot(num_snakes: int, snake_size: int) -> str:
+    entities = [EntityMessage(body=[(0, 0)], entity_id="food", color=(255, 0, 0))]
+    for index in range(num_snakes):
+        entities.append(
+            EntityMessage(
+                body=[(snake_size - i, index) for i in range(snake_size)],
+                entity_id="snake",
+                color=(0, 255, 0),
+                handle=index,
+            )
+        )
+    return EntitiesMessage(entities=entities, tick=1).model_dump_json()
+
+
+def _messages_per_second(decode, data: str, count: int) -> float:
+    timer = Timer()
+    for _ in range(count):
+        decode(data)
+    return count / timer.elapsed_sec()
+
+
+def _compare(name: str, data: str, count: int):
+    decoder = MessageDecoder()
+    # Both paths have to come up with the same message
+    assert _two_pass(data) == decoder.decode_message(data)
+
+    rates = [
+        _messages_per_second(decode, data, count)
+        for decode in (_two_pass, decoder.decode_message)
+    ]
+    print(
+        f"{name:<26} {len(data):>8} B"
+        + "".join(f" {rate:>12,.0f}" for rate in rates)
+        + f" {rates[1] / rates[0]:>7.1f}x"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(f"\nMessages per second, {count} decodes each")
+    print(
+        f"{'message':<26} {'size':>10} {'two pass':>12} {'one pass':>12}"
+        f" {'speedup':>8}"
+    )
+    for num_snakes, snake_size in ((2, 5), (20, 20), (200, 50)):
+        _compare(
+            f"snapshot {num_snakes}x{snake_size} cells",
+            _snapshot(num_snakes, snake_size),
+            max(count // num_snakes, 10),
+        )
+    command = PlayerCommand(player_name="player0", command={"snake_direction": "UP"})
+    _compare("player command", command.model_dump_json(), count * 10)
+
+
+if __name__ == "__main__":
+    main()
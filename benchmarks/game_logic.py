@@ -0,0 +1,55 @@
+"""
+Measures the GameLogicSystem step cost against body length.
+
+Collisions and food spawns are looked up on the occupancy grid, so the cost
+of a step should follow the number of snakes and stay flat as they grow.
+
+Usage: python -m benchmarks.game_logic [snakes] [steps]
+"""
+
+import sys
+
+from entities.type import Food, Snake
+from systems.game_logic import GameLogicSystem
+from utils.timer import Timer
+
+
+def _room(num_snakes: int, snake_size: int, columns: int):
+    entities = [Food((0, 0))]
+    for index in range(num_snakes):
+        snake = Snake(f"player{index}", (snake_size, 2 * index + 1))
+        snake.body_component.size = snake_size
+        snake.body_component.segments = [
+            (snake_size - i, 2 * index + 1) for i in range(snake_size)
+        ]
+        entities.append(snake)
+    return entities
+
+
+def main():
+    num_snakes = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(f"\n{num_snakes} snakes, {steps} steps")
+    for snake_size in (5, 50, 500):
+        # Wide enough that nobody wraps into another snake during the run
+        columns = snake_size + steps + 2
+        rows = 2 * num_snakes + 2
+        game_logic_system = GameLogicSystem(rows, columns, 1)
+        entities = _room(num_snakes, snake_size, columns)
+        game_logic_system.run(entities)
+
+        logic_ms = 0
+        for _ in range(steps):
+            for entity in entities:
+                if entity.movement_component is not None:
+                    entity.movement_component.move(None)
+            timer = Timer()
+            game_logic_system.run(entities)
+            logic_ms += timer.elapsed_ms()
+
+        print(f"Snake size {snake_size:>4}: {1000 * logic_ms / steps:8.1f} us/step")
+
+
+if __name__ == "__main__":
+    main()
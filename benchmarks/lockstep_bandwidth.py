@@ -0,0 +1,94 @@
+"""
+Compares the per step cost of snapshot and lockstep rooms on the server.
+
+Snapshot rooms serialize every entity on every step, lockstep rooms only
+relay the players' commands. Bytes sent per step and the server time spent
+building the message are measured for growing snakes, along with the number
+of rooms one core could serve at MOVEMENT_STEP_MS. Snapshots are encoded off
+the game loop, their encoding is timed along with the rest of the step.
+
+Usage: python -m benchmarks.lockstep_bandwidth [players] [steps]
+"""
+
+import asyncio
+import sys
+
+from entities.type import Food, Snake
+from game_instances.constants import MOVEMENT_STEP_MS
+from schemas.game import PlayerCommand
+from systems.network.snake_server import SnakeServer
+from systems.network.snapshot_encoder import SnapshotEncoder, SnapshotFrame
+from utils.timer import Timer
+
+HOST = "127.0.0.1"
+PORT = 7794
+
+
+def _room(num_players: int, snake_size: int):
+    entities = [Food((1, 1))]
+    for player_index in range(num_players):
+        snake = Snake(f"player{player_index}", (snake_size, 2 * player_index))
+        snake.body_component.size = snake_size
+        snake.body_component.segments = [
+            (snake_size - i, 2 * player_index) for i in range(snake_size)
+        ]
+        entities.append(snake)
+    return entities
+
+
+def _measure(send, steps: int, server: SnakeServer) -> tuple[float, int]:
+    """Mean ms per step and bytes of the last message"""
+    network_server = server._server._network_server
+    encoder = SnapshotEncoder()
+    timer = Timer()
+    for tick in range(1, steps + 1):
+        send(tick)
+        message = network_server._broadcast_message
+        if isinstance(message, SnapshotFrame):
+            message = encoder.encode_frame(message)
+    elapsed_ms = timer.elapsed_ms() / steps
+    return elapsed_ms, len(message)
+
+
+async def main():
+    num_players = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    # Never started, messages are built and handed to the broadcaster only
+    server = SnakeServer(HOST, PORT, in_process=True)
+    # Players turn every few steps, one command per step is already generous
+    commands = [
+        [
+            PlayerCommand(
+                player_name=f"player{tick % num_players}",
+                command={"snake_direction": "UP"},
+            )
+        ]
+        for tick in range(num_players)
+    ]
+
+    print(f"{num_players} players, {MOVEMENT_STEP_MS} ms steps")
+    print(
+        f"{'snake size':>10} | {'snapshot B':>10} {'ms/step':>8} {'rooms':>7}"
+        f" | {'lockstep B':>10} {'ms/step':>8} {'rooms':>7}"
+    )
+    for snake_size in (5, 50, 500):
+        entities = _room(num_players, snake_size)
+        snapshot_ms, snapshot_bytes = _measure(
+            lambda tick: server.send_game_state(entities, tick), steps, server
+        )
+        lockstep_ms, lockstep_bytes = _measure(
+            lambda tick: server.send_input_step(tick, commands[tick % num_players]),
+            steps,
+            server,
+        )
+        print(
+            f"{snake_size:>10} | {snapshot_bytes:>10} {snapshot_ms:>8.3f}"
+            f" {MOVEMENT_STEP_MS / snapshot_ms:>7.0f}"
+            f" | {lockstep_bytes:>10} {lockstep_ms:>8.3f}"
+            f" {MOVEMENT_STEP_MS / lockstep_ms:>7.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
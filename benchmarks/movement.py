@@ -0,0 +1,84 @@
+"""
+Compares the per object and the batched movement paths.
+
+Many snakes are moved for a number of steps with a share of them turning on
+every step. The per object path is MovementSystem followed by the clipping
+of GameLogicSystem, the batched one is BatchMovementSystem alone since it
+wraps the heads itself.
+
+Usage: python -m benchmarks.movement [steps]
+"""
+
+import random
+import sys
+
+from entities.type import Snake
+from schemas.game import PlayerCommand
+from systems.batch_movement import BatchMovementSystem
+from systems.game_logic import GameLogicSystem
+from systems.movement import MovementSystem
+from utils.timer import Timer
+
+ROWS = 1000
+COLUMNS = 1000
+TURNING_SHARE = 0.1
+
+
+def _snakes(num_snakes: int) -> list[Snake]:
+    return [Snake(f"player{index}", (6, index)) for index in range(num_snakes)]
+
+
+def _commands(num_snakes: int, steps: int) -> list[list[PlayerCommand]]:
+    rng = random.Random(0)
+    return [
+        [
+            PlayerCommand(
+                player_name=f"player{rng.randrange(num_snakes)}",
+                command={"snake_direction": rng.choice(["UP", "DOWN", "RIGHT"])},
+            )
+            for _ in range(int(num_snakes * TURNING_SHARE))
+        ]
+        for _ in range(steps)
+    ]
+
+
+def _per_object(num_snakes: int, commands: list[list[PlayerCommand]]) -> float:
+    entities = _snakes(num_snakes)
+    bodies = [entity.body_component for entity in entities]
+    movement_system = MovementSystem()
+    game_logic_system = GameLogicSystem(ROWS, COLUMNS, 1)
+
+    timer = Timer()
+    for step_commands in commands:
+        movement_system.run(entities, step_commands)
+        game_logic_system._solve_clipping(bodies)
+    return timer.elapsed_ms() / len(commands)
+
+
+def _batched(num_snakes: int, commands: list[list[PlayerCommand]]) -> float:
+    entities = _snakes(num_snakes)
+    movement_system = BatchMovementSystem(ROWS, COLUMNS)
+
+    timer = Timer()
+    for step_commands in commands:
+        movement_system.run(entities, step_commands)
+    return timer.elapsed_ms() / len(commands)
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print(f"\n{steps} steps, {TURNING_SHARE:.0%} of the snakes turning per step")
+    print(f"{'snakes':>7} | {'per object':>10} {'batched':>10} | speedup")
+    for num_snakes in (10, 100, 500, 1000):
+        commands = _commands(num_snakes, steps)
+        per_object_ms = _per_object(num_snakes, commands)
+        batched_ms = _batched(num_snakes, commands)
+        print(
+            f"{num_snakes:>7} | {per_object_ms:>7.3f} ms {batched_ms:>7.3f} ms"
+            f" | {per_object_ms / batched_ms:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
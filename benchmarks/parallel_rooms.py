@@ -0,0 +1,80 @@
+"""
+Runs many independent rooms through the SystemScheduler.
+
+Each room has its own movement, game logic and state hash systems, with the
+despawned snakes flushed before hashing. Within a room they all touch the
+bodies, so they form a chain, but rooms share nothing and run in parallel.
+The same rooms are stepped with a single worker and with a pool, and the
+scheduler reports are printed. Without a
+free threaded build the pool mostly shows the cost of switching threads.
+
+Usage: python -m benchmarks.parallel_rooms [rooms] [steps] [workers]
+"""
+
+import os
+import random
+import sys
+
+from schemas.game import PlayerCommand
+from systems.flush import FlushSystem
+from systems.game_logic import GameLogicSystem
+from systems.movement import MovementSystem
+from systems.state_hash import StateHashSystem
+from systems.system_scheduler import SystemScheduler
+
+ROWS = 40
+COLUMNS = 40
+PLAYERS = 8
+
+
+class _Room:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.movement_system = MovementSystem()
+        self.game_logic_system = GameLogicSystem(ROWS, COLUMNS, 1, rng=self.rng)
+        self.flush_system = FlushSystem()
+        self.state_hash_system = StateHashSystem()
+        self.player_names = [f"player{index}" for index in range(PLAYERS)]
+        self.entities = self.game_logic_system.spawn_entities(self.player_names)
+
+    def calls(self):
+        commands = [
+            PlayerCommand(
+                player_name=self.rng.choice(self.player_names),
+                command={"snake_direction": self.rng.choice(["UP", "DOWN"])},
+            )
+        ]
+        return [
+            (self.movement_system, (self.entities, commands)),
+            (self.game_logic_system, (self.entities,)),
+            (self.flush_system, (self.entities,)),
+            (self.state_hash_system, (self.entities,)),
+        ]
+
+
+def _run(num_rooms: int, steps: int, workers: int) -> SystemScheduler:
+    rooms = [_Room(seed) for seed in range(num_rooms)]
+    scheduler = SystemScheduler(max_workers=workers)
+    for _ in range(steps):
+        scheduler.run_rooms([room.calls() for room in rooms])
+    scheduler.close()
+    return scheduler
+
+
+def main():
+    num_rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+
+    room = _Room(0)
+    waves = SystemScheduler().waves(room.calls())
+    print(f"\nSystem waves within a room: {waves}")
+
+    print(f"\n{num_rooms} rooms, {steps} steps, single worker")
+    print(_run(num_rooms, steps, 1).report())
+    print(f"\n{num_rooms} rooms, {steps} steps, {max(workers, 2)} workers")
+    print(_run(num_rooms, steps, max(workers, 2)).report())
+
+
+if __name__ == "__main__":
+    main()
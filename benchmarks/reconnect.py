@@ -0,0 +1,87 @@
+"""
+Measures the time to resume a session after the connection drops.
+
+Runs the in process server and client on one event loop. The client's
+connection is aborted while playing and the time until the client is
+reattached to its snake, with a keyframe in its mailbox, is recorded.
+
+Usage: python -m benchmarks.reconnect [blips]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from entities.type import Food, Snake
+from systems.network.snake_client import SnakeClient
+from systems.network.snake_server import SnakeServer
+from utils.timer import Timer
+
+HOST = "127.0.0.1"
+PORT = 7791
+PLAYER_NAME = "bench"
+
+
+async def _serve(server: SnakeServer):
+    entities = [Snake(PLAYER_NAME, (6, 0)), Food((1, 1))]
+    tick = 0
+    while True:
+        server.get_players_updates()
+        server.send_game_state(entities, tick, time.monotonic() * 1000)
+        tick += 1
+        await asyncio.sleep(1 / 60)
+
+
+async def _wait_connection_lost(client: SnakeClient):
+    while True:
+        client.get_server_snapshot()
+        if client.connection_lost:
+            return
+        await asyncio.sleep(0.001)
+
+
+async def main():
+    blips = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    server = SnakeServer(HOST, PORT, in_process=True)
+    await server.async_start()
+
+    client = SnakeClient(None, in_process=True)
+    await client.async_connect_to_server(HOST, PORT)
+    await client.async_try_lobby_join(PLAYER_NAME)
+
+    server.start_playing()
+    serve_task = asyncio.create_task(_serve(server))
+    await client.async_wait_game_start()
+
+    resume_times = []
+    for _ in range(blips):
+        await asyncio.sleep(0.2)
+
+        # Connection blip
+        client._client._tcp_conn.writer.transport.abort()
+        timer = Timer()
+
+        await _wait_connection_lost(client)
+        if not await client.async_resume_session():
+            print("Resume failed")
+            continue
+        resume_times.append(timer.elapsed_ms())
+        if client.get_server_snapshot() is None:
+            print("Resumed without a keyframe")
+
+    serve_task.cancel()
+    await client.async_disconnect_from_server()
+    await server.async_stop()
+
+    print(f"\n{len(resume_times)}/{blips} sessions resumed")
+    if resume_times:
+        print(
+            f"Time to resume: p50 {statistics.median(resume_times):.2f} ms, "
+            f"max {max(resume_times):.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
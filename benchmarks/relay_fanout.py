@@ -0,0 +1,99 @@
+"""
+Measures the fan-out throughput of the SpectatorRelay.
+
+An in process game server broadcasts a snapshot at 60 Hz, the relay forwards
+it to many spectator connections at its fan-out rate. Delivered frames and
+bytes per second are counted on the spectators.
+
+Usage: python -m benchmarks.relay_fanout [spectators] [fanout_hz] [seconds]
+"""
+
+import asyncio
+import struct
+import sys
+import time
+
+from entities.type import Food, Snake
+from systems.network.relay import SpectatorRelay
+from systems.network.snake_server import SnakeServer
+
+HOST = "127.0.0.1"
+SERVER_PORT = 7792
+RELAY_PORT = 7793
+
+
+class _Spectator:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def run(self):
+        reader, writer = await asyncio.open_connection(HOST, RELAY_PORT)
+        try:
+            while True:
+                prefix = await reader.readexactly(4)
+                await reader.readexactly(struct.unpack("!I", prefix)[0])
+                self.frames += 1
+                self.bytes += 4 + struct.unpack("!I", prefix)[0]
+        finally:
+            writer.close()
+
+
+async def _broadcast(server: SnakeServer, entities):
+    tick = 0
+    while True:
+        server.send_game_state(entities, tick, time.monotonic() * 1000)
+        tick += 1
+        await asyncio.sleep(1 / 60)
+
+
+async def main():
+    num_spectators = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    fanout_per_second = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    server = SnakeServer(HOST, SERVER_PORT, in_process=True)
+    await server.async_start()
+    entities = [Snake(f"player{i}", (6, 2 * i)) for i in range(8)] + [Food((1, 1))]
+
+    relay = SpectatorRelay(
+        HOST, SERVER_PORT, HOST, RELAY_PORT, fanout_per_second=fanout_per_second
+    )
+    relay_task = asyncio.create_task(relay.run())
+    await asyncio.sleep(0.5)
+
+    server.start_playing()
+    broadcast_task = asyncio.create_task(_broadcast(server, entities))
+
+    spectators = [_Spectator() for _ in range(num_spectators)]
+    spectator_tasks = [asyncio.create_task(s.run()) for s in spectators]
+    while relay.spectator_count < num_spectators:
+        await asyncio.sleep(0.05)
+
+    server_connections = len(server.connected_players)
+    start_frames = sum(s.frames for s in spectators)
+    start_bytes = sum(s.bytes for s in spectators)
+    start = time.perf_counter()
+    await asyncio.sleep(duration)
+    elapsed = time.perf_counter() - start
+    frames = sum(s.frames for s in spectators) - start_frames
+    sent_bytes = sum(s.bytes for s in spectators) - start_bytes
+
+    relay.stop()
+    await relay_task
+    broadcast_task.cancel()
+    for task in spectator_tasks:
+        task.cancel()
+    await server.async_stop()
+
+    print(f"\n{num_spectators} spectators at {fanout_per_second} Hz for {duration} s")
+    print(f"Game server connections: {server_connections}")
+    print(
+        f"Delivered {frames / elapsed:.0f} frames/s, "
+        f"{sent_bytes / elapsed / 1024:.0f} KiB/s, "
+        f"{relay.frames_skipped} frames skipped for slow spectators"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
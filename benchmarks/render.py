@@ -0,0 +1,157 @@
+"""
+Compares redrawing the whole window with the incremental RenderSystem and
+the SurfarrayRenderSystem.
+
+The full path fills the window, draws every segment with pygame.draw.rect
+and flips the display, the way RenderSystem used to. The incremental path
+only draws and pushes the cells that changed. The surfarray path writes the
+cells into a NumPy buffer and scales it onto the window. Growing numbers of
+snakes crawl across a board, a cell per frame as when snapshots are held,
+then blended halfway between steps as when they are interpolated. A large
+arena with hundreds of thousands of cells follows. Every path must leave
+the same pixels on the window, except surfarray on blended frames, which
+snaps segments to cells.
+
+Runs on SDL's dummy video driver unless SDL_VIDEODRIVER is set, so the
+time to push pixels to a real display is not included.
+
+Usage: python -m benchmarks.render [frames]
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+
+import pygame  # noqa: E402
+
+from schemas.entities import EntityMessage  # noqa: E402
+from systems.render import RenderSystem  # noqa: E402
+from systems.render_views import RenderViews  # noqa: E402
+from systems.surfarray_render import SurfarrayRenderSystem  # noqa: E402
+from utils.timer import Timer  # noqa: E402
+
+# (side, cell size, snake size, numbers of snakes, frames divisor)
+ARENAS = (
+    (200, 4, 20, (10, 50, 100), 1),
+    (500, 2, 500, (100, 400), 20),
+)
+
+
+def _render_full(system: RenderSystem, views) -> None:
+    system.window.fill((255, 255, 255))
+    for view in views:
+        for segment in view.segments:
+            pygame.draw.rect(
+                system.window,
+                view.color,
+                (
+                    segment[0] * system.cell_size,
+                    segment[1] * system.cell_size,
+                    system.cell_size,
+                    system.cell_size,
+                ),
+            )
+    pygame.display.flip()
+
+
+def _snapshot(side: int, snake_size: int, num_snakes: int, frame: int) -> list:
+    entities = [
+        EntityMessage.model_construct(
+            body=[
+                ((frame + snake_size - i) % side, 2 * index % side)
+                for i in range(snake_size)
+            ],
+            entity_id="snake",
+            color=(0, 255, 0),
+            handle=index,
+        )
+        for index in range(num_snakes)
+    ]
+    entities.append(
+        EntityMessage.model_construct(
+            body=[(side // 2, side - 1)],
+            entity_id="food",
+            color=(255, 0, 0),
+            handle=num_snakes,
+        )
+    )
+    return entities
+
+
+def _frames(side, snake_size, num_snakes, frames: int, blended: bool) -> list:
+    """Views of every frame, the snakes moving right a cell per frame"""
+    frame_views = []
+    previous = _snapshot(side, snake_size, num_snakes, 0)
+    for frame in range(1, frames + 1):
+        newest = _snapshot(side, snake_size, num_snakes, frame)
+        views = RenderViews()
+        views.clear()
+        if blended:
+            views.add_snapshot(previous, newest, 0.5)
+        else:
+            views.add_snapshot(newest, newest)
+        frame_views.append(views.frame())
+        previous = newest
+    return frame_views
+
+
+def _ms_per_frame(render, frame_views) -> float:
+    timer = Timer()
+    for views in frame_views:
+        render(views)
+    return timer.elapsed_ms() / len(frame_views)
+
+
+def _window_pixels() -> bytes:
+    return pygame.image.tostring(pygame.display.get_surface(), "RGB")
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    pygame.init()
+    for side, cell_size, snake_size, snake_counts, divisor in ARENAS:
+        arena_frames = max(frames // divisor, 2)
+        system = RenderSystem(side, side, cell_size)
+        surfarray_system = SurfarrayRenderSystem(side, side, cell_size)
+
+        print(
+            f"\n{side}x{side} cells of {cell_size} px, snakes of {snake_size},"
+            f" {arena_frames} frames each"
+        )
+        print(
+            f"{'frame':<8} {'snakes':>7} {'segments':>9} {'full ms':>9}"
+            f" {'dirty ms':>9} {'surfarray ms':>13} {'dirty':>6} {'surf.':>6}"
+        )
+        for blended in (False, True):
+            for num_snakes in snake_counts:
+                frame_views = _frames(
+                    side, snake_size, num_snakes, arena_frames, blended
+                )
+                system.setup()
+                full = _ms_per_frame(
+                    lambda views: _render_full(system, views), frame_views
+                )
+                expected = _window_pixels()
+
+                system.setup()
+                dirty = _ms_per_frame(system.run, frame_views)
+                assert _window_pixels() == expected
+
+                surfarray_system.setup()
+                surfarray = _ms_per_frame(surfarray_system.run, frame_views)
+                assert blended or _window_pixels() == expected
+
+                name = "blended" if blended else "stepped"
+                print(
+                    f"{name:<8} {num_snakes:>7} {num_snakes * snake_size + 1:>9}"
+                    f" {full:>9.2f} {dirty:>9.2f} {surfarray:>13.2f}"
+                    f" {full / dirty:>5.1f}x {full / surfarray:>5.1f}x"
+                )
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
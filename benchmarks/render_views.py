@@ -0,0 +1,111 @@
+"""
+Compares building a client frame from snapshots with and without RenderViews.
+
+The old path interpolates the two snapshots around the playback time into
+new EntityMessages, then builds a Snake or a Food for each of them, the way
+ClientLoop used to. The views path writes the same frame into pooled
+RenderViews. Frames are built from growing rooms, both halfway between two
+snapshots and holding the newest one. The time per frame is taken first,
+then the memory blocks a frame leaves allocated while it is in use.
+
+Usage: python -m benchmarks.render_views [frames]
+"""
+
+import sys
+import tracemalloc
+
+from entities.type import Food, Snake
+from schemas.entities import EntityMessage
+from systems.network.jitter_buffer import interpolate_entities
+from systems.render_views import RenderViews
+from utils.timer import Timer
+
+
+def _snapshot(num_snakes: int, snake_size: int, shift: int) -> list[EntityMessage]:
+    entities = [
+        EntityMessage(body=[(0, 0)], entity_id="food", color=(255, 0, 0), handle=0)
+    ]
+    for index in range(num_snakes):
+        entities.append(
+            EntityMessage(
+                body=[(snake_size - i + shift, index) for i in range(snake_size)],
+                entity_id="snake",
+                color=(0, 255, 0),
+                handle=index + 1,
+            )
+        )
+    return entities
+
+
+def _entities_frame(entities_a, entities_b, alpha: float) -> list:
+    if entities_a is not entities_b:
+        entities_b = interpolate_entities(entities_a, entities_b, alpha)
+    frame = []
+    for entity in entities_b:
+        if entity.entity_id == "snake":
+            snake = Snake("ducks_gonna_fly", (0, 0))
+            snake.body_component.segments = entity.body
+            snake.color = entity.color
+            frame.append(snake)
+        elif entity.entity_id == "food":
+            food = Food((0, 0))
+            food.body_component.segments = entity.body
+            frame.append(food)
+    return frame
+
+
+def _views_frame(views: RenderViews):
+    def frame(entities_a, entities_b, alpha: float) -> list:
+        views.clear()
+        views.add_snapshot(entities_a, entities_b, alpha)
+        return views.frame()
+
+    return frame
+
+
+def _us_per_frame(build, pair, frames: int) -> float:
+    timer = Timer()
+    for _ in range(frames):
+        build(*pair)
+    return 1_000_000 * timer.elapsed_sec() / frames
+
+
+def _blocks_per_frame(build, pair) -> int:
+    build(*pair)  # Warm up pools and caches
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    frame = build(*pair)  # noqa: F841, the frame is alive like while rendering
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    print(f"\nClient frames from snapshots, {frames} frames each")
+    print(
+        f"{'room':<16} {'frame':<12} {'entities us':>12} {'views us':>10}"
+        f" {'speedup':>8} {'entities blk':>13} {'views blk':>10}"
+    )
+    for num_snakes, snake_size in ((2, 5), (20, 20), (100, 50)):
+        previous = _snapshot(num_snakes, snake_size, 0)
+        newest = _snapshot(num_snakes, snake_size, 1)
+        for name, pair in (
+            ("interpolated", (previous, newest, 0.5)),
+            ("held", (newest, newest, 0)),
+        ):
+            entities_us = _us_per_frame(_entities_frame, pair, frames)
+            views_us = _us_per_frame(_views_frame(RenderViews()), pair, frames)
+            entities_blocks = _blocks_per_frame(_entities_frame, pair)
+            views_blocks = _blocks_per_frame(_views_frame(RenderViews()), pair)
+            print(
+                f"{f'{num_snakes}x{snake_size} cells':<16} {name:<12}"
+                f" {entities_us:>12.1f} {views_us:>10.1f}"
+                f" {entities_us / views_us:>7.1f}x"
+                f" {entities_blocks:>13} {views_blocks:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
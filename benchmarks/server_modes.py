@@ -0,0 +1,157 @@
+"""
+Side by side benchmark of the multiprocess GameServer and the single process
+AsyncGameServer.
+
+Every client sends a timestamped message, the server tick gathers the player
+data and broadcasts it back. Ticks per second are counted on the server and
+the round trip latency is measured on the clients.
+
+Usage: python -m benchmarks.server_modes [clients] [seconds]
+"""
+
+import asyncio
+import json
+import statistics
+import struct
+import sys
+import threading as th
+import time
+
+from systems.network.async_server import AsyncGameServer
+from systems.network.server import GameServer
+
+HOST = "127.0.0.1"
+PORT = 7790
+
+
+def _no_requests(client_id, data):
+    return ""
+
+
+class _BenchClient:
+    def __init__(self, client_id: int, send_interval: float):
+        self.id = client_id
+        self.latencies = []
+        self._send_interval = send_interval
+
+    async def run(self, stop: th.Event):
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        receiver = asyncio.create_task(self._receive(reader))
+        try:
+            while not stop.is_set():
+                payload = json.dumps({"c": self.id, "t": time.perf_counter_ns()})
+                data = payload.encode()
+                writer.write(struct.pack("!I", len(data)) + data)
+                await writer.drain()
+                await asyncio.sleep(self._send_interval)
+        finally:
+            receiver.cancel()
+            writer.close()
+
+    async def _receive(self, reader: asyncio.StreamReader):
+        while True:
+            prefix = await reader.readexactly(4)
+            message = await reader.readexactly(struct.unpack("!I", prefix)[0])
+            now = time.perf_counter_ns()
+            for _, payload in json.loads(message):
+                payload = json.loads(payload)
+                if payload["c"] == self.id:
+                    self.latencies.append((now - payload["t"]) / 10e5)
+
+
+def _run_clients(clients: list[_BenchClient], stop: th.Event):
+    async def main():
+        await asyncio.gather(
+            *[client.run(stop) for client in clients], return_exceptions=True
+        )
+
+    asyncio.run(main())
+
+
+def _start_clients(num_clients: int, send_interval: float):
+    clients = [_BenchClient(i, send_interval) for i in range(num_clients)]
+    stop = th.Event()
+    thread = th.Thread(target=_run_clients, args=(clients, stop), daemon=True)
+    thread.start()
+    return clients, stop, thread
+
+
+def bench_multiprocess(num_clients: int, duration: float, send_interval: float):
+    server = GameServer(HOST, PORT, _no_requests)
+    server.start()
+    time.sleep(0.5)
+
+    clients, stop, thread = _start_clients(num_clients, send_interval)
+    while len(server.connected_players) < num_clients:
+        time.sleep(0.05)
+    server.start_playing()
+
+    ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        server.broadcast_message(json.dumps(server.gather_player_data()))
+        ticks += 1
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    thread.join()
+    server.stop()
+    # Give the OS time to release the port for the next mode
+    time.sleep(0.5)
+    return ticks / elapsed, clients
+
+
+def bench_in_process(num_clients: int, duration: float, send_interval: float):
+    async def main():
+        server = AsyncGameServer(HOST, PORT, _no_requests)
+        await server.start()
+
+        clients, stop, thread = _start_clients(num_clients, send_interval)
+        while len(server.connected_players) < num_clients:
+            await asyncio.sleep(0.05)
+        server.start_playing()
+
+        ticks = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            server.broadcast_message(json.dumps(server.gather_player_data()))
+            ticks += 1
+            # Yield to the network tasks, as the game tick does
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+        await server.stop()
+        return ticks / elapsed, clients
+
+    return asyncio.run(main())
+
+
+def _report(name: str, ticks_per_sec: float, clients: list[_BenchClient]):
+    latencies = sorted(lat for client in clients for lat in client.latencies)
+    if latencies:
+        p50 = statistics.median(latencies)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        latency = f"latency p50 {p50:.2f} ms, p99 {p99:.2f} ms"
+    else:
+        latency = "no latency samples"
+    print(f"{name:>14}: {ticks_per_sec:10.0f} ticks/s, {latency}")
+
+
+def main():
+    num_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    send_interval = 0.02
+
+    results = [
+        ("multiprocess", *bench_multiprocess(num_clients, duration, send_interval)),
+        ("in process", *bench_in_process(num_clients, duration, send_interval)),
+    ]
+    print(f"\n{num_clients} clients, {duration} s per mode")
+    for result in results:
+        _report(*result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compares encoding a snapshot from scratch with the SnapshotEncoder cache.
+
+A room with snakes and many foods is encoded after every step. The full
+path builds an EntityMessage for every entity and dumps the whole
+EntitiesMessage, the way SnakeServer used to. The cached path only dumps
+the entities whose body changed since the previous snapshot. Steps where
+only the snakes move are timed, then steps where nothing moved, as when
+snapshots go out faster than the simulation steps. Last, what is left on
+the game loop once encoding is offloaded: capturing a SnapshotFrame.
+
+Usage: python -m benchmarks.snapshot_encoding [snakes] [foods] [steps]
+"""
+
+import sys
+
+from entities.type import Food, Snake
+from schemas.entities import EntitiesMessage, EntityMessage
+from systems.network.snapshot_encoder import SnapshotCapture, SnapshotEncoder
+from utils.timer import Timer
+
+
+def _encode_full(entities, tick: int) -> str:
+    return EntitiesMessage(
+        entities=[
+            EntityMessage(
+                entity_id="food" if isinstance(entity, Food) else "snake",
+                body=entity.body_component.segments,
+                color=entity.color,
+                handle=entity.handle,
+            )
+            for entity in entities
+        ],
+        tick=tick,
+    ).model_dump_json()
+
+
+def _room(num_snakes: int, num_foods: int) -> list:
+    entities = [Snake(f"player{index}", (20, 2 * index)) for index in range(num_snakes)]
+    entities += [Food((index % 100, 1 + 2 * (index // 100))) for index in range(num_foods)]
+    for handle, entity in enumerate(entities):
+        entity.handle = handle
+    return entities
+
+
+def _us_per_snapshot(encode, entities, steps: int, moving: bool) -> float:
+    timer = Timer()
+    for tick in range(steps):
+        if moving:
+            for entity in entities:
+                if entity.movement_component is not None:
+                    entity.movement_component.move(None)
+        encode(entities, tick)
+    return 1_000_000 * timer.elapsed_sec() / steps
+
+
+def main():
+    num_snakes = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    num_foods = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    steps = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    encoder = SnapshotEncoder()
+    entities = _room(num_snakes, num_foods)
+    assert encoder.encode(entities, 7) == _encode_full(entities, 7)
+
+    print(f"\n{num_snakes} snakes and {num_foods} foods, {steps} snapshots")
+    for moving in (True, False):
+        full = _us_per_snapshot(_encode_full, entities, steps, moving)
+        cached = _us_per_snapshot(encoder.encode, entities, steps, moving)
+        name = "snakes moved" if moving else "nothing moved"
+        print(
+            f"{name:<14} full {full:9.1f} us  cached {cached:9.1f} us"
+            f"  {full / cached:5.1f}x"
+        )
+    assert encoder.encode(entities, 7) == _encode_full(entities, 7)
+    print(f"Fragments reused: {encoder.hits}, dumped: {encoder.misses}")
+
+    capture = SnapshotCapture()
+    assert encoder.encode_frame(capture.capture(entities, 7)) == _encode_full(entities, 7)
+    inline = _us_per_snapshot(encoder.encode, entities, steps, True)
+    captured = _us_per_snapshot(capture.capture, entities, steps, True)
+    print(
+        f"{'game loop':<14} encode {inline:7.1f} us  capture {captured:8.1f} us"
+        f"  {inline / captured:5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures the per step cost of the incremental state hash.
+
+A room of long snakes is stepped and hashed with StateHashSystem, which only
+looks at the cells that changed, and compared with hashing every body from
+scratch on each step.
+
+Usage: python -m benchmarks.state_hash [snake_size] [steps]
+"""
+
+import sys
+
+from entities.type import Snake
+from systems.state_hash import StateHashSystem
+from utils.timer import Timer
+
+NUM_SNAKES = 4
+
+
+def _room(snake_size: int) -> list[Snake]:
+    snakes = []
+    for index in range(NUM_SNAKES):
+        snake = Snake(f"player{index}", (snake_size, 2 * index))
+        snake.body_component.size = snake_size
+        snake.body_component.segments = [
+            (snake_size - i, 2 * index) for i in range(snake_size)
+        ]
+        snakes.append(snake)
+    return snakes
+
+
+def main():
+    snake_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    entities = _room(snake_size)
+    incremental = StateHashSystem()
+    incremental.run(entities)
+
+    move_ms = incremental_ms = full_ms = 0
+    for _ in range(steps):
+        timer = Timer()
+        for snake in entities:
+            snake.movement_component.move(None)
+        move_ms += timer.elapsed_ms()
+
+        timer.reset()
+        state_hash = incremental.run(entities)
+        incremental_ms += timer.elapsed_ms()
+
+        timer.reset()
+        full_hash = StateHashSystem().run(entities)
+        full_ms += timer.elapsed_ms()
+
+        if state_hash != full_hash:
+            print("Incremental hash diverged from the full hash")
+            return
+
+    print(f"\n{NUM_SNAKES} snakes of {snake_size} segments, {steps} steps")
+    print(f"Movement:         {1000 * move_ms / steps:8.1f} us/step")
+    print(f"Incremental hash: {1000 * incremental_ms / steps:8.1f} us/step")
+    print(f"Full rehash:      {1000 * full_ms / steps:8.1f} us/step")
+
+
+if __name__ == "__main__":
+    main()
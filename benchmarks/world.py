@@ -0,0 +1,125 @@
+"""
+Compares the entity list with the column oriented World.
+
+A board with many foods and a share of snakes is built both as a list of
+Entity objects and as World entities with the same components. The memory
+allocated per entity is measured, then moving every snake is timed: the
+list path filters by isinstance on each tick the way the systems did, the
+World path walks the cached query's columns. Last, MovementSystem and
+GameLogicSystem step a room given as a list and as an EntityRegistry, whose
+World lets them walk query columns as the game loops do.
+
+Usage: python -m benchmarks.world [entities] [ticks]
+"""
+
+import sys
+import tracemalloc
+
+from components.body.component import BodyComponent
+from components.body.snake import SnakeBody
+from components.movement.snake import SnakeMovement
+from entities.registry import EntityRegistry
+from entities.type import Food, Snake
+from entities.world import World
+from systems.game_logic import GameLogicSystem
+from systems.movement import MovementSystem
+from utils.timer import Timer
+
+SNAKE_SHARE = 0.1
+
+
+def _entity_list(num_entities: int) -> list:
+    num_snakes = int(num_entities * SNAKE_SHARE)
+    entities = [Snake(f"player{index}", (6, index)) for index in range(num_snakes)]
+    entities += [Food((index, 0)) for index in range(num_entities - num_snakes)]
+    return entities
+
+
+def _world(num_entities: int) -> World:
+    world = World()
+    num_snakes = int(num_entities * SNAKE_SHARE)
+    for index in range(num_snakes):
+        body = SnakeBody((6, index), 5)
+        world.spawn(f"player{index}", body, SnakeMovement(body, "RIGHT"))
+    for index in range(num_entities - num_snakes):
+        world.spawn("snake_food", BodyComponent((index, 0)))
+    return world
+
+
+def _allocated_per_entity(build, num_entities: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build(num_entities)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del built
+    return allocated / num_entities
+
+
+def _tick_list(entities: list) -> None:
+    snakes = list(filter(lambda entity: isinstance(entity, Snake), entities))
+    for snake in snakes:
+        snake.movement_component.move(None)
+
+
+def _tick_world(world: World) -> None:
+    for _, movements in world.query(SnakeMovement).columns():
+        for movement in movements:
+            movement.move(None)
+
+
+def _room_ms(entities, ticks: int) -> float:
+    """ms per tick of the game systems, the snakes crawl along a wide board"""
+    # Foods line the first row and every snake has a row, see _entity_list
+    columns = len(entities) + ticks
+    rows = int(len(entities) * SNAKE_SHARE) + 1
+    movement_system = MovementSystem()
+    game_logic_system = GameLogicSystem(rows, columns, 1)
+    game_logic_system.run(entities)
+    timer = Timer()
+    for _ in range(ticks):
+        movement_system.run(entities, None)
+        game_logic_system.run(entities)
+    return timer.elapsed_ms() / ticks
+
+
+def _registry(entities: list) -> EntityRegistry:
+    registry = EntityRegistry()
+    for entity in entities:
+        registry.spawn(entity)
+    return registry
+
+
+def main():
+    num_entities = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    list_bytes = _allocated_per_entity(_entity_list, num_entities)
+    world_bytes = _allocated_per_entity(_world, num_entities)
+
+    entities = _entity_list(num_entities)
+    timer = Timer()
+    for _ in range(ticks):
+        _tick_list(entities)
+    list_ms = timer.elapsed_ms() / ticks
+
+    world = _world(num_entities)
+    timer.reset()
+    for _ in range(ticks):
+        _tick_world(world)
+    world_ms = timer.elapsed_ms() / ticks
+
+    print(f"\n{num_entities} entities, {SNAKE_SHARE:.0%} snakes, {ticks} ticks")
+    print(f"Entity list: {list_bytes:6.0f} B/entity, {list_ms:7.2f} ms/tick")
+    print(f"World:       {world_bytes:6.0f} B/entity, {world_ms:7.2f} ms/tick")
+
+    room_size = num_entities // 10
+    list_ms = _room_ms(_entity_list(room_size), ticks)
+    registry_ms = _room_ms(_registry(_entity_list(room_size)), ticks)
+    print(f"\nMovement and game logic, {room_size} entities")
+    print(f"Entity list:    {list_ms:7.2f} ms/tick")
+    print(f"EntityRegistry: {registry_ms:7.2f} ms/tick")
+
+
+if __name__ == "__main__":
+    main()
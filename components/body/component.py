@@ -1,3 +1,16 @@
 class BodyComponent:
+    __slots__ = ("_segments", "version")
+
     def __init__(self, starting_position):
+        # Bumped on every change of the cells, lets the cells be cached
+        self.version = 0
         self.segments = [starting_position]
+
+    @property
+    def segments(self):
+        return self._segments
+
+    @segments.setter
+    def segments(self, segments):
+        self._segments = segments
+        self.version += 1
@@ -1,24 +1,134 @@
+from collections.abc import Sequence
+
 from components.body.component import BodyComponent
 
+# Cells are packed as ((x + OFFSET) << 16) | (y + OFFSET) so a single integer
+# addition moves a cell, negative coordinates included, until it is wrapped
+_CELL_OFFSET = 0x8000
+_CELL_MASK = 0xFFFF
+
+
+def pack_cell(cell) -> int:
+    return ((int(cell[0]) + _CELL_OFFSET) << 16) | (int(cell[1]) + _CELL_OFFSET)
+
+
+def pack_cells(xs, ys):
+    """pack_cell for whole arrays of coordinates at once"""
+    return ((xs + _CELL_OFFSET) << 16) | (ys + _CELL_OFFSET)
+
+
+def unpack_cell(packed: int) -> tuple[int, int]:
+    return ((packed >> 16) - _CELL_OFFSET, (packed & _CELL_MASK) - _CELL_OFFSET)
+
+
+def pack_offset(offset: tuple[int, int]) -> int:
+    """Packed value that moves a packed cell by the offset when added"""
+    return (offset[0] << 16) + offset[1]
+
+
+class SegmentsView(Sequence):
+    """Read only (x, y) view of a SnakeBody, head first, unpacked on access"""
+
+    __slots__ = ("_body",)
+
+    def __init__(self, body: "SnakeBody"):
+        self._body = body
+
+    def __len__(self):
+        return self._body._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return unpack_cell(self._body.packed(index))
+
+    def __iter__(self):
+        body = self._body
+        cells = body._cells
+        capacity = len(cells)
+        for i in range(body._length):
+            yield unpack_cell(cells[(body._head + i) % capacity])
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
 
 class SnakeBody(BodyComponent):
+    """Snake cells in a fixed capacity ring buffer of packed integers.
+
+    The head grows towards lower indices and the tail is dropped from the
+    other end, so advancing a snake is O(1) and does not allocate. The
+    capacity only doubles when the snake outgrows it.
+    """
+
+    __slots__ = ("_cells", "_head", "_length", "size")
+
     def __init__(self, position: tuple[int, int], size):
+        self._cells: list[int] = []
+        self._head = 0
+        self._length = 0
         super().__init__(starting_position=position)
 
         self.size = size
+        self.segments = [(position[0] - i, position[1]) for i in range(self.size)]
 
-        for i in range(1, self.size):
-            self.segments.append((position[0] - i, position[1]))
+    @property
+    def segments(self) -> SegmentsView:
+        return SegmentsView(self)
+
+    @segments.setter
+    def segments(self, segments):
+        segments = list(segments)
+        self._cells = [0] * max(16, 2 * len(segments))
+        self._head = 0
+        self._length = 0
+        for segment in reversed(segments):
+            self.push_head(pack_cell(segment))
 
     @property
     def head(self):
-        return self.segments[0]
+        return unpack_cell(self._cells[self._head])
 
     @head.setter
     def head(self, new_head):
-        self.segments[0] = new_head
+        self._cells[self._head] = pack_cell(new_head)
+        self.version += 1
 
     @property
     def tail(self):
         return self.segments[1:]
 
+    def __len__(self):
+        return self._length
+
+    @property
+    def packed_head(self) -> int:
+        return self._cells[self._head]
+
+    def packed(self, index: int) -> int:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Snake body index out of range")
+        return self._cells[(self._head + index) % len(self._cells)]
+
+    def push_head(self, packed_cell: int) -> None:
+        if self._length == len(self._cells):
+            self._grow()
+        self._head = (self._head - 1) % len(self._cells)
+        self._cells[self._head] = packed_cell
+        self._length += 1
+        self.version += 1
+
+    def pop_tail(self) -> int:
+        self._length -= 1
+        self.version += 1
+        return self._cells[(self._head + self._length) % len(self._cells)]
+
+    def _grow(self):
+        cells = [self.packed(i) for i in range(self._length)]
+        self._cells = cells + [0] * max(16, len(cells))
+        self._head = 0
@@ -1,4 +1,6 @@
 class MovementComponent:
+    __slots__ = ("direction", "speed")
+
     # ! Do not change dictionary order it is being used for checking if the
     # ! snake is doing a 180 degrees turn
     command_translator = {
@@ -8,6 +10,14 @@ class MovementComponent:
         "RIGHT": (1, 0),
     }
 
+    # Opposite direction is by 2 units of difference in the dictionary order
+    opposite_directions = dict(
+        zip(
+            command_translator,
+            list(command_translator)[2:] + list(command_translator)[:2],
+        )
+    )
+
     def __init__(self):
         self.direction = None
         self.speed = 1  # Grid squares per frame
@@ -8,9 +8,13 @@ class MessageTypes(Enum):
     CHOOSE_COLOR = "choose_color"
     SERVER_UPDATE = "server_update"
     PLAYER_COMMAND = "player_command"
+    RESUME_SESSION = "resume_session"
 
     # Server side
     LOBBY_INFO_RESPONSE = "lobby_info_response"
     SERVER_RESPONSE = "server_response"
     GAME_READY = "ready"
     ENTITIES = "entities"
+    JOIN_LOBBY_RESPONSE = "join_lobby_response"
+    RESUME_SESSION_RESPONSE = "resume_session_response"
+    INPUT_BUNDLE = "input_bundle"
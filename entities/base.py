@@ -9,9 +9,14 @@ class Entity:
             raise ValueError("Entity id cannot be None. Enter a valid string")
         self._entity_id = entity_id
         self.color = color
+        # Set by the EntityRegistry the entity is spawned in
+        self.handle = None
 
         self.body_component = None
         self.movement_component = None
+        # Row of the entity in its World archetype, see World.add
+        self._archetype = None
+        self._row = None
 
     def __eq__(self, value) -> bool:
         if not issubclass(type(value), Entity):
@@ -21,29 +26,53 @@ class Entity:
 
 
 class EntityBetter:
+    __slots__ = ("id", "hash", "_components", "world", "_archetype", "_row")
+
     def __init__(self, entity_id, entity_hash):
         self.id = entity_id
         self.hash = entity_hash
         self._components = {}
 
+        # While the entity lives in a World its components are stored in the
+        # world's columns instead of _components, see entities.world
+        self.world = None
+        self._archetype = None
+        self._row = None
+
     def add_component(self, component):
         component_type = type(component)
-        if component_type in self._components:
+        if component_type in self.list_components():
             raise ValueError(
                 f"Component already exists for this entity."
                 + f"Entity hash: '{self.hash}',"
                 + f"Component type: '{component_type.__name__}'"
             )
-        self._components[type(component)] = component
+        if self.world is not None:
+            components = self.world._components_of(self)
+            components[component_type] = component
+            self.world._move(self, components)
+        else:
+            self._components[type(component)] = component
 
     def get_component(self, component_type):
+        if self.world is not None:
+            column = self._archetype.columns.get(component_type)
+            return column[self._row] if column is not None else None
         return self._components.get(component_type)
 
     def list_components(self):
+        if self.world is not None:
+            return list(self._archetype.component_types)
         return list(self._components.keys())
 
     def remove_component(self, component_type):
-        if component_type in self._components:
+        if component_type not in self.list_components():
+            return
+        if self.world is not None:
+            components = self.world._components_of(self)
+            del components[component_type]
+            self.world._move(self, components)
+        else:
             del self._components[component_type]
 
     def __eq__(self, value) -> bool:
@@ -0,0 +1,111 @@
+from typing import Iterator
+
+from entities.base import Entity
+from entities.world import Query, World
+
+# Low bits of a handle are the slot index, the high bits its generation
+_INDEX_BITS = 20
+_INDEX_MASK = (1 << _INDEX_BITS) - 1
+
+
+class EntityRegistry:
+    """Entities of a game addressed by generational integer handles.
+
+    A handle packs a slot index with the generation of that slot, so a stale
+    handle of a despawned entity never resolves to the entity that reuses
+    its slot. Entities are also indexed by player name, by type and, in a
+    World, by their component types, so systems iterate the columns of a
+    query instead of checking the type of every entity.
+
+    Despawning is deferred, the entity stays in place until flush is called
+    at the end of the tick, so systems can despawn while iterating. It
+    iterates and removes like a list of entities, in spawn order.
+    """
+
+    def __init__(self):
+        self._slots: list[Entity | None] = []
+        self._generations: list[int] = []
+        self._free_indexes: list[int] = []
+
+        self._alive: dict[int, Entity] = {}  # Handle -> entity, in spawn order
+        self._by_player: dict[str, int] = {}
+        self._by_type: dict[type, dict[int, Entity]] = {}
+        self._pending_despawns: list[int] = []
+        self._world = World()
+
+    def spawn(self, entity: Entity, player_name: str = None) -> int:
+        if self._free_indexes:
+            index = self._free_indexes.pop()
+        else:
+            index = len(self._slots)
+            self._slots.append(None)
+            self._generations.append(0)
+        handle = (self._generations[index] << _INDEX_BITS) | index
+
+        self._slots[index] = entity
+        entity.handle = handle
+        self._alive[handle] = entity
+        self._by_type.setdefault(type(entity), {})[handle] = entity
+        self._world.add(entity)
+        if player_name is not None:
+            self._by_player[player_name] = handle
+        return handle
+
+    def get(self, handle: int) -> Entity | None:
+        index = handle & _INDEX_MASK
+        if index >= len(self._slots) or self._generations[index] != (
+            handle >> _INDEX_BITS
+        ):
+            return None
+        return self._slots[index]
+
+    def player(self, player_name: str) -> Entity | None:
+        handle = self._by_player.get(player_name)
+        return self.get(handle) if handle is not None else None
+
+    def player_handles(self) -> dict[str, int]:
+        return dict(self._by_player)
+
+    def of_type(self, entity_type: type) -> list[Entity]:
+        return list(self._by_type.get(entity_type, {}).values())
+
+    def query(self, *component_types: type) -> Query:
+        """Entities with all the component types, see World.query"""
+        return self._world.query(*component_types)
+
+    def despawn(self, handle: int) -> None:
+        """Marks the entity for removal on the next flush"""
+        if self.get(handle) is not None:
+            self._pending_despawns.append(handle)
+
+    def remove(self, entity: Entity) -> None:
+        self.despawn(entity.handle)
+
+    def flush(self) -> None:
+        """Removes the entities despawned during the tick"""
+        for handle in self._pending_despawns:
+            entity = self.get(handle)
+            if entity is None:
+                # Despawned twice in the same tick
+                continue
+
+            index = handle & _INDEX_MASK
+            self._slots[index] = None
+            self._generations[index] += 1
+            self._free_indexes.append(index)
+
+            del self._alive[handle]
+            del self._by_type[type(entity)][handle]
+            self._world.discard(entity)
+            if self._by_player.get(entity._entity_id) == handle:
+                del self._by_player[entity._entity_id]
+        self._pending_despawns.clear()
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self._alive.values())
+
+    def __len__(self):
+        return len(self._alive)
+
+    def __contains__(self, entity: Entity):
+        return self._alive.get(getattr(entity, "handle", None)) is entity
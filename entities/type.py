@@ -27,4 +27,4 @@ class Food(Entity):
 
     @position.setter
     def position(self, new_position: tuple[int, int]):
-        self.body_component.segments[0] = new_position
+        self.body_component.segments = [new_position]
@@ -0,0 +1,187 @@
+from typing import Iterator
+
+from entities.base import Entity, EntityBetter
+
+
+class Archetype:
+    """All the entities with exactly the same component types.
+
+    Components are stored by column, one dense list per component type, and
+    row i of every column belongs to entities[i]. Removing a row moves the
+    last one into its place so the columns never have holes.
+    """
+
+    __slots__ = ("component_types", "entities", "columns")
+
+    def __init__(self, component_types: frozenset[type]):
+        self.component_types = component_types
+        self.entities: list[EntityBetter] = []
+        self.columns: dict[type, list] = {
+            component_type: [] for component_type in component_types
+        }
+
+    def __len__(self):
+        return len(self.entities)
+
+    def append(self, entity: EntityBetter, components: dict[type, object]) -> None:
+        entity._archetype = self
+        entity._row = len(self.entities)
+        self.entities.append(entity)
+        for component_type, column in self.columns.items():
+            column.append(components[component_type])
+
+    def remove(self, entity: EntityBetter) -> None:
+        row = entity._row
+        last = len(self.entities) - 1
+        if row != last:
+            moved = self.entities[last]
+            moved._row = row
+            self.entities[row] = moved
+            for column in self.columns.values():
+                column[row] = column[last]
+        self.entities.pop()
+        for column in self.columns.values():
+            column.pop()
+        entity._archetype = None
+        entity._row = None
+
+
+class Query:
+    """Cached set of the archetypes holding some component types.
+
+    A component type also matches its subclasses, querying BodyComponent
+    finds SnakeBody columns too. The world adds new matching archetypes as
+    they are created, so running a query never scans any entity.
+    """
+
+    __slots__ = ("component_types", "_archetypes")
+
+    def __init__(self, component_types: tuple[type, ...]):
+        self.component_types = component_types
+        # Archetype and the concrete column type for each queried type
+        self._archetypes: list[tuple[Archetype, tuple[type, ...]]] = []
+
+    def _try_add(self, archetype: Archetype) -> None:
+        concrete_types = []
+        for component_type in self.component_types:
+            concrete_type = next(
+                (
+                    archetype_type
+                    for archetype_type in archetype.component_types
+                    if issubclass(archetype_type, component_type)
+                ),
+                None,
+            )
+            if concrete_type is None:
+                return
+            concrete_types.append(concrete_type)
+        self._archetypes.append((archetype, tuple(concrete_types)))
+
+    def __len__(self):
+        return sum(len(archetype) for archetype, _ in self._archetypes)
+
+    def columns(self) -> Iterator[tuple[list, ...]]:
+        """Yields the entities and the queried columns of each archetype"""
+        for archetype, concrete_types in self._archetypes:
+            if archetype.entities:
+                yield (
+                    archetype.entities,
+                    *(archetype.columns[column] for column in concrete_types),
+                )
+
+    def __iter__(self) -> Iterator[tuple]:
+        """Yields (entity, *components) rows"""
+        for columns in self.columns():
+            yield from zip(*columns)
+
+
+class World:
+    """Column oriented storage for EntityBetter entities.
+
+    Entities spawned here keep working as plain EntityBetter objects, but
+    their components live in the columns of their archetype. Adding or
+    removing a component moves them to the archetype of their new set of
+    component types.
+
+    Game Entity objects are added as they are instead, see add, so the
+    systems can query them by component like any other entity.
+    """
+
+    def __init__(self):
+        self._archetypes: dict[frozenset[type], Archetype] = {}
+        self._queries: dict[tuple[type, ...], Query] = {}
+        self._next_hash = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def spawn(self, entity_id, *components) -> EntityBetter:
+        entity = EntityBetter(entity_id, self._next_hash)
+        self._next_hash += 1
+        for component in components:
+            entity.add_component(component)
+
+        components = entity._components
+        entity._components = None
+        entity.world = self
+        self._move(entity, components)
+        self._count += 1
+        return entity
+
+    def despawn(self, entity: EntityBetter) -> None:
+        """Takes the entity out, it keeps its components as a plain entity"""
+        components = self._components_of(entity)
+        entity._archetype.remove(entity)
+        entity._components = components
+        entity.world = None
+        self._count -= 1
+
+    def add(self, entity: Entity) -> None:
+        """Files a game Entity under the types of its components.
+
+        The columns hold the entity's own component objects, which it keeps
+        using, so its components must not be replaced while it is here.
+        """
+        components = {
+            type(component): component
+            for component in (entity.body_component, entity.movement_component)
+            if component is not None
+        }
+        self._archetype(frozenset(components)).append(entity, components)
+        self._count += 1
+
+    def discard(self, entity: Entity) -> None:
+        """Takes out a game Entity added with add"""
+        entity._archetype.remove(entity)
+        self._count -= 1
+
+    def query(self, *component_types: type) -> Query:
+        query = self._queries.get(component_types)
+        if query is None:
+            query = Query(component_types)
+            for archetype in self._archetypes.values():
+                query._try_add(archetype)
+            self._queries[component_types] = query
+        return query
+
+    def _components_of(self, entity: EntityBetter) -> dict[type, object]:
+        return {
+            component_type: column[entity._row]
+            for component_type, column in entity._archetype.columns.items()
+        }
+
+    def _move(self, entity: EntityBetter, components: dict[type, object]) -> None:
+        """Moves the entity to the archetype of the given components"""
+        if entity._archetype is not None:
+            entity._archetype.remove(entity)
+        self._archetype(frozenset(components)).append(entity, components)
+
+    def _archetype(self, component_types: frozenset[type]) -> Archetype:
+        archetype = self._archetypes.get(component_types)
+        if archetype is None:
+            archetype = Archetype(component_types)
+            self._archetypes[component_types] = archetype
+            for query in self._queries.values():
+                query._try_add(archetype)
+        return archetype
@@ -0,0 +1,232 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from components.movement.snake import SnakeMovement
+from entities.type import Snake
+
+# Actions are direction indexes in the command translator, NO_ACTION keeps
+# the current direction
+DIRECTIONS = list(SnakeMovement.command_translator)
+NO_ACTION = len(DIRECTIONS)
+
+# Observation cell values
+EMPTY = 0
+BODY = 1
+HEAD = 2
+FOOD = 3
+
+
+class BatchSnakeEnv:
+    """Many headless single player games of snake stepped together.
+
+    Every game is a snake and a food on a wrapping board, played by the rules
+    of SnakeMovement and GameLogicSystem: turning back onto the body is
+    ignored, the tail moves out before the head moves in, eating makes the
+    snake one cell longer from the next step on and respawns the food on a
+    free cell, and running into the body ends the game. Games that end are
+    reset right away, the step that ended them reports it.
+
+    Bodies are ring buffers of cell indexes, one row per game, next to a
+    board of the covered cells. A step is the same handful of array
+    operations for all the games, however many there are.
+    """
+
+    def __init__(self, num_envs: int, rows: int = 10, columns: int = 10, seed=None):
+        self.num_envs = num_envs
+        self.rows = rows
+        self.columns = columns
+        self._rng = np.random.default_rng(seed)
+
+        deltas = np.array(list(SnakeMovement.command_translator.values()))
+        self._dx = deltas[:, 0]
+        self._dy = deltas[:, 1]
+        # NO_ACTION is its own opposite so it never counts as a turn
+        self._opposites = np.array(
+            [DIRECTIONS.index(SnakeMovement.opposite_directions[d]) for d in DIRECTIONS]
+            + [NO_ACTION]
+        )
+
+        # Games start like the first player of a room
+        spawn = Snake("batch_env", (6, 0))
+        if any(x >= columns or y >= rows for x, y in spawn.body_component.segments):
+            raise ValueError(f"A {rows}x{columns} board is too small for a snake")
+        self._spawn_cells = np.array(
+            [y * columns + x for x, y in spawn.body_component.segments]
+        )
+        self._spawn_size = spawn.body_component.size
+        self._spawn_direction = DIRECTIONS.index(spawn.movement_component.direction)
+
+        self._capacity = rows * columns
+        self._games = np.arange(num_envs)
+        self._occupied = np.zeros((num_envs, self._capacity), dtype=bool)
+        self._bodies = np.zeros((num_envs, self._capacity), dtype=np.int64)
+        self._heads = np.zeros(num_envs, dtype=np.int64)  # Ring index of the head
+        self._lengths = np.zeros(num_envs, dtype=np.int64)
+        self._sizes = np.zeros(num_envs, dtype=np.int64)
+        self._directions = np.zeros(num_envs, dtype=np.int64)
+        self._food = np.zeros(num_envs, dtype=np.int64)  # Cell index, -1 if none
+        # Steps played in the current game of each env
+        self.game_steps = np.zeros(num_envs, dtype=np.int64)
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        self._reset_games(self._games)
+        return self.observe()
+
+    def step(self, actions) -> tuple[np.ndarray, np.ndarray]:
+        """Plays one step of every game.
+
+        Returns the rewards, 1 for eating and -1 for dying, and which games
+        ended and were reset.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        games = self._games
+        turning = actions != self._opposites[self._directions]
+        turning &= actions != NO_ACTION
+        self._directions = np.where(turning, actions, self._directions)
+
+        head_cells = self._bodies[games, self._heads]
+        x = head_cells % self.columns + self._dx[self._directions]
+        y = head_cells // self.columns + self._dy[self._directions]
+        new_heads = (y % self.rows) * self.columns + x % self.columns
+
+        # The tail moves out before the head moves in, a head may follow
+        # right behind its tail
+        full = self._lengths == self._sizes
+        tails = self._bodies[games, (self._heads + self._lengths - 1) % self._capacity]
+        self._occupied[games[full], tails[full]] = False
+        self._lengths -= full
+
+        dead = self._occupied[games, new_heads]
+        self._heads = (self._heads - 1) % self._capacity
+        self._bodies[games, self._heads] = new_heads
+        self._occupied[games, new_heads] = True
+        self._lengths += 1
+
+        ate = new_heads == self._food
+        self._sizes += ate
+        self.game_steps += 1
+        rewards = ate.astype(np.float32) - dead
+
+        if ate.any():
+            self._spawn_food(np.flatnonzero(ate))
+        if dead.any():
+            self._reset_games(np.flatnonzero(dead))
+        return rewards, dead
+
+    def observe(self) -> np.ndarray:
+        """(num_envs, rows, columns) boards of EMPTY, BODY, HEAD and FOOD"""
+        observations = self._occupied.astype(np.int8)
+        observations[self._games, self._bodies[self._games, self._heads]] = HEAD
+        has_food = self._food >= 0
+        observations[self._games[has_food], self._food[has_food]] = FOOD
+        return observations.reshape(self.num_envs, self.rows, self.columns)
+
+    def _reset_games(self, games: np.ndarray) -> None:
+        length = len(self._spawn_cells)
+        self._occupied[games] = False
+        self._occupied[games[:, None], self._spawn_cells] = True
+        self._bodies[games, :length] = self._spawn_cells
+        self._heads[games] = 0
+        self._lengths[games] = length
+        self._sizes[games] = self._spawn_size
+        self._directions[games] = self._spawn_direction
+        self.game_steps[games] = 0
+        self._spawn_food(games)
+
+    def _spawn_food(self, games: np.ndarray) -> None:
+        """Puts the food of the games on a free cell picked uniformly"""
+        food = np.full(len(games), -1, dtype=np.int64)
+        pending = np.arange(len(games))
+        # Random cells until a free one is hit, a few tries are enough
+        # unless the board is nearly full
+        for _ in range(8):
+            cells = self._rng.integers(self._capacity, size=len(pending))
+            free = ~self._occupied[games[pending], cells]
+            food[pending[free]] = cells[free]
+            pending = pending[~free]
+            if not len(pending):
+                break
+        for index in pending:
+            free_cells = np.flatnonzero(~self._occupied[games[index]])
+            if len(free_cells):
+                food[index] = self._rng.choice(free_cells)
+        self._food[games] = food
+
+
+class ProcessBatchEnv:
+    """BatchSnakeEnv split across worker processes.
+
+    Each worker steps its share of the games, the results are put back
+    together in env order. Only worth it when the games of one process
+    already keep a core busy.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        num_workers: int,
+        rows: int = 10,
+        columns: int = 10,
+        seed=None,
+    ):
+        self.num_envs = num_envs
+        self.rows = rows
+        self.columns = columns
+        shares = np.array_split(np.arange(num_envs), num_workers)
+        self._bounds = np.cumsum([len(share) for share in shares])[:-1]
+        seeds = np.random.SeedSequence(seed).spawn(num_workers)
+
+        self._connections = []
+        self._processes = []
+        for share, worker_seed in zip(shares, seeds):
+            connection, worker_connection = mp.Pipe()
+            process = mp.Process(
+                target=_worker,
+                args=(worker_connection, len(share), rows, columns, worker_seed),
+                daemon=True,
+            )
+            process.start()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def reset(self) -> np.ndarray:
+        return np.concatenate(self._call("reset"))
+
+    def step(self, actions) -> tuple[np.ndarray, np.ndarray]:
+        actions = np.split(np.asarray(actions), self._bounds)
+        results = self._call("step", actions)
+        return (
+            np.concatenate([rewards for rewards, _ in results]),
+            np.concatenate([dones for _, dones in results]),
+        )
+
+    def observe(self) -> np.ndarray:
+        return np.concatenate(self._call("observe"))
+
+    def close(self) -> None:
+        for connection in self._connections:
+            connection.send(("close", None))
+        for process in self._processes:
+            process.join()
+
+    def _call(self, command: str, data: list = None) -> list:
+        for index, connection in enumerate(self._connections):
+            connection.send((command, None if data is None else data[index]))
+        return [connection.recv() for connection in self._connections]
+
+
+def _worker(connection, num_envs: int, rows: int, columns: int, seed) -> None:
+    env = BatchSnakeEnv(num_envs, rows, columns, seed)
+    while True:
+        command, data = connection.recv()
+        if command == "reset":
+            connection.send(env.reset())
+        elif command == "step":
+            connection.send(env.step(data))
+        elif command == "observe":
+            connection.send(env.observe())
+        else:
+            break
+    connection.close()
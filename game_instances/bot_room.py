@@ -0,0 +1,86 @@
+import random
+
+from entities.type import Snake
+from schemas.game import PlayerCommand
+from systems.bots import BotCommandSystem, RoomFields
+from systems.flush import FlushSystem
+from systems.game_logic import GameLogicSystem
+from systems.movement import MovementSystem
+from systems.system_scheduler import SystemScheduler
+from utils.timer import Timer
+
+
+class BotRoom:
+    """Headless room played by bots only, stepped as fast as it can go.
+
+    The room's RoomFields are updated once per step and every bot picks its
+    move from them, so adding bots only adds the cost of their own moves.
+    Rooms share nothing, many of them are stepped side by side with
+    step_rooms.
+    """
+
+    def __init__(self, num_bots: int, rows: int, columns: int, seed=None):
+        self._rng = random.Random(seed)
+        self._game_logic_system = GameLogicSystem(rows, columns, 1, rng=self._rng)
+        self._movement_system = MovementSystem()
+        self._flush_system = FlushSystem()
+        self.fields = RoomFields(rows, columns)
+        self._bot_system = BotCommandSystem(self.fields)
+        # Filled by the bot system, read by the movement system
+        self._commands: list[PlayerCommand] = []
+
+        self.entities = self._game_logic_system.spawn_entities(
+            [f"bot{index}" for index in range(num_bots)]
+        )
+        self._game_logic_system.run(self.entities)
+        self.tick = 0
+
+    def calls(self) -> list:
+        """The systems of the next step, as SystemScheduler calls"""
+        return [
+            (self._bot_system, (self.entities, self.tick, self._commands)),
+            (self._movement_system, (self.entities, self._commands)),
+            (self._game_logic_system, (self.entities,)),
+            (self._flush_system, (self.entities,)),
+        ]
+
+    def snakes(self) -> list[Snake]:
+        return self.entities.of_type(Snake)
+
+
+def step_rooms(rooms: list[BotRoom], scheduler: SystemScheduler) -> None:
+    """Steps every room once, the rooms in parallel on the scheduler's pool"""
+    scheduler.run_rooms([room.calls() for room in rooms])
+    for room in rooms:
+        room.tick += 1
+
+
+if __name__ == "__main__":
+    import sys
+
+    num_bots = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    num_rooms = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    # One worker with the GIL by default, see SystemScheduler
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    # Snakes spawn on every other row
+    size = max(2 * num_bots, 20)
+    rooms = [BotRoom(num_bots, size, size, seed=index) for index in range(num_rooms)]
+    scheduler = SystemScheduler(max_workers=workers)
+    timer = Timer()
+    for _ in range(steps):
+        rooms = [room for room in rooms if room.snakes()]
+        if not rooms:
+            break
+        step_rooms(rooms, scheduler)
+    elapsed_ms = timer.elapsed_ms()
+    scheduler.close()
+
+    lengths = [len(snake.body_component) for room in rooms for snake in room.snakes()]
+    print(
+        f"{num_rooms} rooms of {num_bots} bots, {scheduler.runs} steps"
+        f" in {elapsed_ms:.0f} ms"
+    )
+    print(scheduler.report())
+    print(f"Alive: {len(lengths)}, longest: {max(lengths, default=0)}")
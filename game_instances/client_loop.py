@@ -1,17 +1,23 @@
+import asyncio
 import hashlib
 import os
 import random
 import time
 from enum import Enum, auto
 
-from schemas.entities import EntityMessage
+from schemas.entities import EntitiesMessage
 from utils.timer import Timer
 
-from entities.type import Food, Snake
-from systems.network.constants import GAME_PORT
+from systems.bots import BotInputSystem, RoomFields
+from systems.network.constants import GAME_PORT, RELAY_PORT
+from systems.network.jitter_buffer import JitterBuffer
+from systems.lockstep import LockstepSimulation
 from systems.network.snake_client import SnakeClient
-from systems.player_input import InputSystem
-from systems.render import RenderSystem
+from systems.player_input import InputSystem, NullInputSystem
+from systems.prediction import PredictionSystem
+from systems.render import NullRenderSystem, RenderSystem
+from systems.render_views import RenderViews
+from systems.surfarray_render import SurfarrayRenderSystem
 
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
 import pygame  # noqa: E402
@@ -27,21 +33,55 @@ class ClientGameState(Enum):
 
 
 class ClientLoop:
-    def __init__(self, rows, columns, cell_size, tick_rate=60):
+    def __init__(
+        self,
+        rows,
+        columns,
+        cell_size,
+        tick_rate=60,
+        headless=False,
+        input_system=None,
+        rendering_system=None,
+        in_process=False,
+        spectator=False,
+    ):
         self.rows = rows
         self.columns = columns
         self.cell_size = cell_size
+        self.headless = headless
+        # Spectators watch through a SpectatorRelay and never join the lobby
+        self.spectator = spectator
 
         coordinate_space = (self.rows, self.columns, self.cell_size)
-        self.rendering_system = RenderSystem(*coordinate_space)
-        self.input_system = InputSystem()
+        if self.headless:
+            self.rendering_system = NullRenderSystem(*coordinate_space)
+            self.input_system = input_system or NullInputSystem()
+        else:
+            self.rendering_system = rendering_system or RenderSystem(
+                *coordinate_space
+            )
+            self.input_system = input_system or InputSystem()
+        # Reused every frame instead of building entities from snapshots
+        self.render_views = RenderViews()
 
         self._running = False
         self._clock = None
         self._tick_rate = tick_rate
+        self._resume_attempts = 3
         self.state = None
 
-        self.client = SnakeClient(self)
+        self.jitter_buffer = JitterBuffer()
+        self.prediction_system = PredictionSystem(*coordinate_space)
+        # Set when the server runs the game in lockstep, see _start_game
+        self.lockstep: LockstepSimulation = None
+        self.desyncs = 0
+        # Handle of the player's snake in the server snapshots
+        self.player_handle: int = None
+        # Newest snapshot received, read by input systems such as bots
+        self.latest_snapshot: EntitiesMessage = None
+
+        # In process clients are driven by async_run on the caller's loop
+        self.client = SnakeClient(self, in_process=in_process)
 
         # TODO - Add UI system and execute after render system
 
@@ -64,11 +104,37 @@ class ClientLoop:
             pass
         self._close()
 
+    async def async_run(self, server_ip="localhost", server_port=None):
+        """Runs the client on the current event loop, see AsyncGameClient"""
+        if server_port is None:
+            server_port = RELAY_PORT if self.spectator else GAME_PORT
+        self._setup()
+        try:
+            while self.state != ClientGameState.EXITING:
+                if self.state == ClientGameState.IDLE:
+                    self._idle()
+                elif self.state == ClientGameState.CONNECTING:
+                    await self._async_connecting(server_ip, server_port)
+                elif self.state == ClientGameState.LOBBY:
+                    await self._async_lobby()
+                elif self.state == ClientGameState.PLAYING:
+                    await asyncio.sleep(1 / self._tick_rate)
+                    await self._async_playing()
+                elif self.state == ClientGameState.DISCONNECTING:
+                    self._disconnecting()
+        except asyncio.CancelledError:
+            await self.client.async_disconnect_from_server()
+            raise
+        finally:
+            self._close()
+
     def _setup(self):
-        pygame.init()
+        if not self.headless:
+            pygame.init()
         self._clock = pygame.time.Clock()
 
         self.input_system.setup()
+        self.prediction_system.setup()
         self.rendering_system.setup()
         player_code = str(random.randint(0, 10000))
         self.player_name = hashlib.sha256(player_code.encode()).hexdigest()[0:6]
@@ -77,7 +143,8 @@ class ClientLoop:
         self._running = True
 
     def _close(self):
-        pygame.quit()
+        if not self.headless:
+            pygame.quit()
 
     def _idle(self):
         # TODO - Main menu UI
@@ -90,11 +157,15 @@ class ClientLoop:
         #   Continue to lobby if server approved
 
         print("--Connecting to server...")
-        connected = self.client.connect_to_server("localhost", GAME_PORT)
+        server_port = RELAY_PORT if self.spectator else GAME_PORT
+        connected = self.client.connect_to_server("localhost", server_port)
         if not connected:
             print("Could not connect to server")
             self.state = ClientGameState.IDLE
             return
+        if self.spectator:
+            self.state = ClientGameState.PLAYING
+            return
 
         while True:
             lobby_joined = self.client.try_lobby_join(self.player_name)
@@ -106,6 +177,24 @@ class ClientLoop:
         print("Lobby joined")
         self.state = ClientGameState.LOBBY
 
+    async def _async_connecting(self, server_ip, server_port):
+        print("--Connecting to server...")
+        connected = await self.client.async_connect_to_server(server_ip, server_port)
+        if not connected:
+            print("Could not connect to server")
+            self.state = ClientGameState.IDLE
+            await asyncio.sleep(1)
+            return
+        if self.spectator:
+            self.state = ClientGameState.PLAYING
+            return
+
+        while not await self.client.async_try_lobby_join(self.player_name):
+            print("Could not join lobby")
+            await asyncio.sleep(1)
+        print("Lobby joined")
+        self.state = ClientGameState.LOBBY
+
     def _lobby(self):
         # Lobby:
         #   Choose available colors
@@ -130,6 +219,38 @@ class ClientLoop:
             print("Waiting for game start...")
 
         print("Lobby ready. Starting the game...")
+        self._start_game()
+
+    async def _async_lobby(self):
+        print("--At lobby")
+        lobby_info = None
+        while lobby_info is None:
+            lobby_info = await self.client.async_get_lobby_info()
+            print("Lobby info:", lobby_info)
+            if lobby_info is None:
+                print("Waiting for lobby info...")
+                await asyncio.sleep(0.5)
+        while not await self.client.async_wait_game_start():
+            print("Waiting for game start...")
+
+        print("Lobby ready. Starting the game...")
+        self._start_game()
+
+    def _start_game(self):
+        game_ready = self.client.game_ready
+        # Snapshots address the snakes by handle, not by player name
+        self.player_handle = game_ready.player_handles.get(self.player_name)
+        if game_ready.lockstep_seed is not None:
+            print(f"Lockstep game with seed {game_ready.lockstep_seed}")
+            self.lockstep = LockstepSimulation(
+                self.rows,
+                self.columns,
+                self.cell_size,
+                game_ready.lockstep_seed,
+                game_ready.player_names,
+            )
+        else:
+            self.lockstep = None
         self.state = ClientGameState.PLAYING
 
     def _playing(self, dt):
@@ -139,40 +260,172 @@ class ClientLoop:
         #   Get player input, if any
         #   Send player command
 
-        def deserialize_entities(entities: list[EntityMessage]):
-            deserialized_entities = []
-            for entity in entities:
-                if entity.entity_id == "snake":
-                    snake = Snake("ducks_gonna_fly", (0, 0))
-                    snake.body_component.segments = entity.body
-                    snake.color = entity.color
-                    deserialized_entities.append(snake)
-                elif entity.entity_id == "food":
-                    food = Food((0, 0))
-                    food.body_component.segments = entity.body
-                    deserialized_entities.append(food)
-            return deserialized_entities
+        if not self._handle_input():
+            self.client.disconnect_from_server()
+            return
+
+        snapshot = self._receive_update()
+        if self.client.connection_lost:
+            timer = Timer()
+            for _ in range(self._resume_attempts):
+                if self.client.resume_session():
+                    break
+                time.sleep(0.1)
+            if not self._check_resume(timer):
+                self.client.disconnect_from_server()
+                return
+
+        self._render(snapshot)
+
+    async def _async_playing(self):
+        if not self._handle_input():
+            await self.client.async_disconnect_from_server()
+            return
+
+        snapshot = self._receive_update()
+        if self.client.connection_lost:
+            timer = Timer()
+            for _ in range(self._resume_attempts):
+                if await self.client.async_resume_session():
+                    break
+                await asyncio.sleep(0.1)
+            if not self._check_resume(timer):
+                await self.client.async_disconnect_from_server()
+                return
+
+        self._render(snapshot)
+
+    def _receive_update(self) -> EntitiesMessage | None:
+        """Newest server snapshot, or None after advancing the lockstep game"""
+        if self.lockstep is None:
+            snapshot = self.client.get_server_snapshot()
+            if snapshot is not None:
+                self.latest_snapshot = snapshot
+            return snapshot
+
+        steps = self.client.get_input_steps()
+        try:
+            self.lockstep.run(steps)
+        except ValueError as e:
+            # More steps were lost than the bundles repeat
+            print(f"Lockstep desync: {e}")
+            self.state = ClientGameState.EXITING
+            return None
+
+        if steps and self.client.server_state_hash is not None:
+            if not self.lockstep.verify(*self.client.server_state_hash):
+                self.desyncs += 1
+                print(f"Lockstep desync: state differs at step {self.lockstep.tick}")
+        return None
+
+    def _check_resume(self, timer: Timer) -> bool:
+        if self.client.connection_lost:
+            print("Server connection lost")
+            self.state = ClientGameState.EXITING
+            return False
+        print(f"Session resumed in {round(timer.elapsed_ms(), 1)} ms")
+        return True
+
+    def _render(self, snapshot: EntitiesMessage):
+        # Rendering runs every frame, independent of the snapshot rate.
+        # Remote entities are interpolated from the jitter buffer and the
+        # player's own snake comes from the local prediction.
+        if self.headless:
+            return
+        views = self.render_views
+        views.clear()
+        if self.lockstep is not None:
+            views.add_entities(self.lockstep.entities)
+            self.rendering_system.run(views.frame())
+            return
+
+        now_ms = time.monotonic() * 1000
+        if snapshot is not None:
+            self.jitter_buffer.push(snapshot, now_ms)
+            self.prediction_system.reconcile(snapshot, self.player_handle, now_ms)
+
+        pair = self.jitter_buffer.sample_pair(now_ms)
+        if pair is None:
+            return
 
+        predicted_snake = self.prediction_system.run(now_ms)
+        skip_player = self.player_handle if predicted_snake is not None else None
+        views.add_snapshot(*pair, skip_handle=skip_player)
+        if predicted_snake is not None:
+            views.add_entities((predicted_snake,))
+
+        self.rendering_system.run(views.frame())  # Client side
+
+    def _handle_input(self) -> bool:
+        """Sends the player command, returns False when the player quits"""
         # TODO - Make input specific for the player's snake
         player_command, quit_game = self.input_system.run()  # Client side
 
         if quit_game:  # Client side
-            self.client.disconnect_from_server()
             self.state = ClientGameState.EXITING
-            return
+            return False
 
-        if player_command is not None:
+        if player_command is not None and not self.spectator:
             self.client.send_player_command(self.player_name, player_command)
-
-        entities = self.client.get_server_update()
-        if entities is not None:
-            entities = deserialize_entities(entities)
-
-            self.rendering_system.run(entities)  # Client side
+            self.prediction_system.add_command(player_command)
+        return True
 
     def _disconnecting(self):
         pass
 
 
+async def run_headless_clients(num_clients: int, input_system_factory=None):
+    """Drives many headless clients from a single process and event loop"""
+    clients = [
+        ClientLoop(
+            10,
+            10,
+            20,
+            headless=True,
+            input_system=input_system_factory() if input_system_factory else None,
+            in_process=True,
+        )
+        for _ in range(num_clients)
+    ]
+    await asyncio.gather(*[client.async_run() for client in clients])
+
+
+async def run_bot_clients(num_bots: int):
+    """Headless clients played by bots, all in the same room.
+
+    The bots share one RoomFields, so the fields are computed once per
+    server step however many bots there are.
+    """
+    fields = RoomFields(10, 10)
+    clients = []
+    for _ in range(num_bots):
+        bot = BotInputSystem(fields)
+        client = ClientLoop(
+            10, 10, 20, headless=True, input_system=bot, in_process=True
+        )
+        bot.game = client
+        clients.append(client)
+    await asyncio.gather(*[client.async_run() for client in clients])
+
+
 if __name__ == "__main__":
-    ClientLoop(10, 10, 20).run()
+    import sys
+
+    if "--spectate" in sys.argv:
+        ClientLoop(10, 10, 20, spectator=True).run()
+    elif "--bots" in sys.argv:
+        num_bots = int(sys.argv[sys.argv.index("--bots") + 1])
+        try:
+            asyncio.run(run_bot_clients(num_bots))
+        except KeyboardInterrupt:
+            pass
+    elif "--headless" in sys.argv:
+        num_clients = int(sys.argv[sys.argv.index("--headless") + 1])
+        try:
+            asyncio.run(run_headless_clients(num_clients))
+        except KeyboardInterrupt:
+            pass
+    elif "--surfarray" in sys.argv:
+        ClientLoop(10, 10, 20, rendering_system=SurfarrayRenderSystem(10, 10, 20)).run()
+    else:
+        ClientLoop(10, 10, 20).run()
@@ -4,3 +4,7 @@ from enum import Enum, auto
 class GameState(Enum):
     LOBBY = auto()
     PLAYING = auto()
+
+
+# Time between two simulation steps, in milliseconds
+MOVEMENT_STEP_MS = 200
@@ -2,24 +2,30 @@ import pygame
 import random
 from enum import Enum, auto
 
+from entities.registry import EntityRegistry
 from entities.type import Food, Snake
 
 from systems.game_logic import GameLogicSystem
 from systems.movement import MovementSystem
 from systems.player_input import InputSystem
 from systems.render import RenderSystem
+from systems.render_views import RenderViews
 
 
 class LocalLoop:
-    def __init__(self, rows, columns, cell_size, tick_rate=60):
+    def __init__(self, rows, columns, cell_size, tick_rate=60, seed=None):
         self.rows = rows
         self.columns = columns
         self.cell_size = cell_size
         self.tick_rate = tick_rate
 
+        # Same seed, same food spawns
+        self._rng = random.Random(seed)
+
         coordinate_space = (self.rows, self.columns, self.cell_size)
-        self.game_logic_system = GameLogicSystem(*coordinate_space)
+        self.game_logic_system = GameLogicSystem(*coordinate_space, rng=self._rng)
         self.rendering_system = RenderSystem(*coordinate_space)
+        self.render_views = RenderViews()
         self.movement_system = MovementSystem()
         self.input_system = InputSystem()
 
@@ -42,15 +48,15 @@ class LocalLoop:
     def run(self):
         self.setup()
 
-        entities = []
+        entities = EntityRegistry()
         snake = Snake("ducks_gonna_fly", (6, 0))
         snake.movement_component.speed = 1
-        entities.append(snake)
-        entities.append(
+        entities.spawn(snake, "ducks_gonna_fly")
+        entities.spawn(
             Food(
                 (
-                    random.randint(0, self.columns - 1),
-                    random.randint(0, self.rows - 1),
+                    self._rng.randint(0, self.columns - 1),
+                    self._rng.randint(0, self.rows - 1),
                 )
             )
         )
@@ -65,9 +71,12 @@ class LocalLoop:
 
             self.movement_system.run(entities, player_command)
 
-            entities = self.game_logic_system.run(entities)
+            self.game_logic_system.run(entities)
+            entities.flush()
 
-            self.rendering_system.run(entities)
+            self.render_views.clear()
+            self.render_views.add_entities(entities)
+            self.rendering_system.run(self.render_views.frame())
 
             self._clock.tick(self.tick_rate)
             
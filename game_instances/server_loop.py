@@ -1,17 +1,21 @@
-import os
+import asyncio
 import queue
 import random
 import time
 from enum import Enum, auto
 
-from entities.type import Food, Snake
+from entities.registry import EntityRegistry
+from game_instances.constants import MOVEMENT_STEP_MS
+from schemas.game import GameReady
+from systems.flush import FlushSystem
 from systems.game_logic import GameLogicSystem
+from systems.lockstep import LockstepSimulation
 from systems.movement import MovementSystem
 from systems.network.constants import GAME_PORT
 from systems.network.snake_server import SnakeServer
-
-os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
-import pygame  # noqa: E402
+from systems.state_hash import StateHashSystem
+from systems.system_scheduler import SystemScheduler
+from systems.tick_scheduler import TickScheduler
 
 
 class GameState(Enum):
@@ -22,24 +26,73 @@ class GameState(Enum):
 
 
 class ServerLoop:
-    def __init__(self, rows, columns, cell_size, server_ip, tick_rate=60):
+    def __init__(
+        self,
+        rows,
+        columns,
+        cell_size,
+        server_ip,
+        tick_rate=60,
+        lockstep=False,
+        seed=None,
+        state_hashes=False,
+        batch_movement=False,
+        sim_hz=1000 / MOVEMENT_STEP_MS,
+        snapshot_hz=None,
+        input_hz=None,
+    ):
         self._rows = rows
         self._columns = columns
         self._cell_size = cell_size
 
         coordinate_space = (self._rows, self._columns, self._cell_size)
-        self._game_logic_system = GameLogicSystem(*coordinate_space)
-        self._movement_system = MovementSystem()
+        # All the randomness of a game comes from here, seeded on game start
+        self._rng = random.Random()
+        self._seed = seed
+        # Moving all snakes at once pays off with hundreds of them
+        self._game_logic_system = GameLogicSystem(
+            *coordinate_space, rng=self._rng, clip_heads=not batch_movement
+        )
+        if batch_movement:
+            # NumPy is only loaded by the rooms that move snakes in batches
+            from systems.batch_movement import BatchMovementSystem
+
+            self._movement_system = BatchMovementSystem(self._rows, self._columns)
+        else:
+            self._movement_system = MovementSystem()
         # self.rendering_system = RenderSystem(*coordinate_space)
-        self._server = SnakeServer(server_ip, GAME_PORT)
+        self._server_ip = server_ip
+        # Built on setup, see _create_server
+        self._server: SnakeServer = None
 
         self._state = GameState.IDLE
-        self._clock = pygame.time.Clock()
         self._tick_rate = tick_rate
+        # Steps, snapshots and input sampling each run at their own rate, the
+        # loop itself only polls the scheduler
+        self._scheduler = TickScheduler(sim_hz, snapshot_hz, input_hz or tick_rate)
+        # Runs the systems of a step, side by side where their components
+        # allow it
+        self._system_scheduler = SystemScheduler()
+        self._flush_system = FlushSystem()
         self._players = []
+        self._entities: EntityRegistry = None
+        # In lockstep only the players' commands are relayed, every client
+        # simulates the game on its own
+        self._lockstep = lockstep
+        self._step_commands = {}
+        # Optional per step state hashes sent to clients to detect desyncs
+        self._state_hash_system = StateHashSystem() if state_hashes else None
+        self._lockstep_simulation: LockstepSimulation = None
+        self._state_hash = None
+
+        self._sim_tick = 0
+        self._sim_time = 0
+
+    def _create_server(self) -> SnakeServer:
+        return SnakeServer(self._server_ip, GAME_PORT)
 
     def _setup(self):
-        pygame.init()
+        self._server = self._create_server()
 
         self._movement_system.setup()
         self._game_logic_system.setup()
@@ -51,7 +104,7 @@ class ServerLoop:
     def close(self):
         self._state = GameState.EXITING
         self._server.stop()
-        pygame.quit()
+        self._system_scheduler.close()
 
     def run(self):
         self._setup()
@@ -81,17 +134,51 @@ class ServerLoop:
             # TODO - Wait for a ready message
             # TODO - Limit players
             # TODO - Block new connections after game start
-            print("Players in lobby:", self._server.get_joined_players())
+            joined_players = self._server.get_joined_players()
+            print("Players in lobby:", joined_players)
 
-            # Assuming lobby ends after a certain number of players join
-            if len(self._server.connected_players) >= 2:
-                print(f"Game players: {self._server.connected_players}")
+            # Assuming lobby ends after a certain number of players join.
+            # Spectator relays are connected but never join.
+            if len(joined_players) >= 2:
+                print(f"Game players: {joined_players}")
                 break
 
             time.sleep(2)
         print("Lobby ready. Starting the game...")
         time.sleep(2)
-        self._server.start_playing()
+        self._start_playing()
+
+    def _start_playing(self):
+        self._players = self._server.get_joined_players()
+
+        # Logged so any game can be replayed from its seed and inputs
+        seed = self._seed if self._seed is not None else random.getrandbits(32)
+        print(f"Game seed: {seed}")
+        self._rng.seed(seed)
+        self._state_hash = None
+        if self._state_hash_system is not None:
+            self._state_hash_system.reset()
+        self._entities = self._spawn_entities()
+
+        if self._lockstep:
+            self._step_commands.clear()
+            if self._state_hash_system is not None:
+                # Clients are checked against a reference run of their own game
+                self._lockstep_simulation = LockstepSimulation(
+                    self._rows, self._columns, self._cell_size, seed, self._players
+                )
+            self._server.start_playing(
+                GameReady(
+                    lockstep_seed=seed,
+                    player_names=self._players,
+                    step_ms=self._scheduler.sim_period_ms,
+                    player_handles=self._entities.player_handles(),
+                )
+            )
+        else:
+            self._server.start_playing(
+                GameReady(player_handles=self._entities.player_handles())
+            )
         self._state = GameState.PLAYING
 
     def _playing(self):
@@ -103,49 +190,200 @@ class ServerLoop:
         #   On game end, go back to lobby
         #   Or start a new game automatically
 
-        entities = []
-        entities.append(
-            Food(
-                (
-                    random.randint(0, self._columns - 1),
-                    random.randint(0, self._rows - 1),
+        players_updates = self._start_ticking()
+        try:
+            while self._state == GameState.PLAYING:
+                time.sleep(
+                    self._scheduler.ms_until_due(time.monotonic() * 1000) / 1000
                 )
-            )
-        )
+                self._tick(self._entities, players_updates)
+        finally:
+            # Games usually end with Ctrl+C, the report must still be shown
+            self._report()
 
-        for player_index, player_name in enumerate(self._server.get_joined_players()):
-            player_color = [0, 0, 0]
-            player_color[player_index % 3] = 255
-            snake = Snake(
-                player_name,
-                start_position=(6, 0 + 2 * player_index),
-                color=player_color,
-            )
-            entities.append(snake)
+    def _report(self):
+        print(self._scheduler.report())
+        if not self._lockstep:
+            print(self._system_scheduler.report())
+            # Snapshots are only captured on the loop, see SnakeServer
+            print("Snapshots off the game loop")
+            print(self._server.stage_report())
+
+    def _spawn_entities(self):
+        return self._game_logic_system.spawn_entities(self._players)
+
+    def _start_ticking(self) -> queue.Queue:
+        """Resets the clocks of a new game, returns its command queue"""
+        self._sim_tick = 0
+        self._sim_time = time.monotonic() * 1000
+        self._scheduler.start(self._sim_time)
+        if not self._lockstep:
+            # Puts the spawned entities on the grid before the first step
+            self._game_logic_system.run(self._entities)
+        return queue.Queue(maxsize=2)
 
-        acu_dt = 0
-        players_updates = queue.Queue(maxsize=2)
-        while self._state == GameState.PLAYING:
-            # Initialize players snakes
-            dt = self._clock.tick(self._tick_rate)
-            acu_dt += dt
-            self._server.send_game_state(entities)
+    def _tick(self, entities, players_updates: queue.Queue):
+        """Runs the steps, input sampling and snapshot due since the last call"""
+        scheduler = self._scheduler
+        steps = scheduler.advance(time.monotonic() * 1000)
+        if self._lockstep:
+            self._lockstep_tick(steps)
+        else:
+            self._snapshot_tick(entities, players_updates, steps)
+        scheduler.end_tick(time.monotonic() * 1000)
 
+    def _snapshot_tick(self, entities, players_updates: queue.Queue, steps: int):
+        scheduler = self._scheduler
+        if scheduler.input_due():
             # TODO - Make the systems run for all players commands
-            updates = self._server.get_players_updates()
-            if updates:
-                if not players_updates.full():
-                    players_updates.put(updates)
+            with scheduler.timed("input"):
+                updates = self._server.get_players_updates()
+            if updates and not players_updates.full():
+                players_updates.put(updates)
+
+        for _ in range(steps):
+            self._sim_time = scheduler.step()
+            self._sim_tick += 1
+            commands = None if players_updates.empty() else players_updates.get()
+            calls = self._step_calls(entities, commands)
+            with scheduler.timed("step"):
+                results = self._system_scheduler.run(calls)
+            if self._state_hash_system is not None:
+                self._state_hash = results[-1]
+
+        if scheduler.snapshot_due():
+            with scheduler.timed("capture"):
+                self._server.send_game_state(
+                    entities, self._sim_tick, self._sim_time, self._state_hash
+                )
+            # Players whose snake died can not resume it
+            self._server.expire_sessions(entities.player_handles())
 
-            if acu_dt > 200:
-                if not players_updates.empty():
-                    self._movement_system.run(entities, players_updates.get())
-                else:
-                    self._movement_system.run(entities, None)
-                acu_dt = 0
+    def _step_calls(self, entities, commands) -> list:
+        """The systems of a simulation step, as SystemScheduler calls"""
+        calls = [
+            (self._movement_system, (entities, commands)),
+            (self._game_logic_system, (entities,)),
+            # Dead snakes must be gone before the state is hashed
+            (self._flush_system, (entities,)),
+        ]
+        if self._state_hash_system is not None:
+            calls.append((self._state_hash_system, (entities,)))
+        return calls
 
-            entities = self._game_logic_system.run(entities)
+    def _lockstep_tick(self, steps: int):
+        # Nothing is simulated or serialized here, commands are only relayed
+        scheduler = self._scheduler
+        if scheduler.input_due():
+            for command in self._server.get_players_updates():
+                # The newest command of each player is applied on the next step
+                self._step_commands[command.player_name] = command
+            self._server.expire_sessions()
+
+        for _ in range(steps):
+            self._sim_time = scheduler.step()
+            self._sim_tick += 1
+            commands = list(self._step_commands.values())
+            if self._lockstep_simulation is not None:
+                with scheduler.timed("lockstep"):
+                    self._lockstep_simulation.step(self._sim_tick, commands)
+                self._state_hash = self._lockstep_simulation.state_hash
+            with scheduler.timed("input_bundle"):
+                self._server.send_input_step(
+                    self._sim_tick, commands, self._state_hash
+                )
+            self._step_commands.clear()
+
+
+class AsyncServerLoop(ServerLoop):
+    """Single process server loop.
+
+    The game tick runs as a task on the same asyncio event loop as the
+    network server, so no pipes, queues or manager process are involved.
+    """
+
+    def _create_server(self) -> SnakeServer:
+        # Only called from _run, the server must be created inside the
+        # running event loop
+        return SnakeServer(self._server_ip, GAME_PORT, in_process=True)
+
+    def run(self):
+        try:
+            asyncio.run(self._run())
+        except KeyboardInterrupt:
+            pass
+
+    async def _run(self):
+        self._server = self._create_server()
+
+        self._movement_system.setup()
+        self._game_logic_system.setup()
+        await self._server.async_start()
+        self._state = GameState.LOBBY
+
+        try:
+            while self._state != GameState.EXITING:
+                if self._state == GameState.LOBBY:
+                    await self._lobby()
+                elif self._state == GameState.PLAYING:
+                    await self._playing()
+        finally:
+            self._state = GameState.EXITING
+            await self._server.async_stop()
+            self._system_scheduler.close()
+
+    async def _lobby(self):
+        print("Listening for players...")
+        while self._state == GameState.LOBBY:
+            joined_players = self._server.get_joined_players()
+            print("Players in lobby:", joined_players)
+
+            # Assuming lobby ends after a certain number of players join.
+            # Spectator relays are connected but never join.
+            if len(joined_players) >= 2:
+                print(f"Game players: {joined_players}")
+                break
+
+            await asyncio.sleep(2)
+        print("Lobby ready. Starting the game...")
+        await asyncio.sleep(2)
+        self._start_playing()
+
+    async def _playing(self):
+        players_updates = self._start_ticking()
+        try:
+            while self._state == GameState.PLAYING:
+                # Sleeping hands the loop over to the network tasks
+                await asyncio.sleep(
+                    self._scheduler.ms_until_due(time.monotonic() * 1000) / 1000
+                )
+                self._tick(self._entities, players_updates)
+        finally:
+            # Also reported when the task is cancelled on Ctrl+C
+            self._report()
+
+
+def server_options(argv: list[str]) -> dict:
+    """Server loop keyword arguments from the command line flags"""
+    options = dict(
+        lockstep="--lockstep" in argv,
+        state_hashes="--state-hashes" in argv,
+        batch_movement="--batch-movement" in argv,
+    )
+    if "--seed" in argv:
+        options["seed"] = int(argv[argv.index("--seed") + 1])
+    for rate in ("sim_hz", "snapshot_hz", "input_hz"):
+        flag = "--" + rate.replace("_", "-")
+        if flag in argv:
+            options[rate] = float(argv[argv.index(flag) + 1])
+    return options
 
 
 if __name__ == "__main__":
-    ServerLoop(10, 10, 20, "127.0.0.1").run()
+    import sys
+
+    options = server_options(sys.argv)
+    if "--in-process" in sys.argv:
+        AsyncServerLoop(10, 10, 20, "127.0.0.1", **options).run()
+    else:
+        ServerLoop(10, 10, 20, "127.0.0.1", **options).run()
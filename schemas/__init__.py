@@ -1,6 +1,14 @@
-from .game import PlayerCommand, ServerUpdate
+from .game import (
+    GameReady,
+    InputBundle,
+    PlayerCommand,
+    ResumeSessionRequest,
+    ResumeSessionResponse,
+    ServerUpdate,
+)
 from .lobby import (
     JoinLobbyRequest,
+    JoinLobbyResponse,
     LobbyInfoRequest,
     LobbyInfoResponse,
     PlayerConfigRequest,
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -9,8 +9,16 @@ class EntityMessage(BaseModel):
     body: list[tuple[int, int]]
     entity_id: str
     color: tuple[int, int, int]
+    # EntityRegistry handle, stays the same for the whole life of the entity
+    handle: Optional[int] = None
 
 
 class EntitiesMessage(BaseModel):
     type: str = MessageTypes.ENTITIES.value
     entities: List[EntityMessage]
+    # Simulation step the entities belong to and the server time in ms when
+    # it was simulated, used by the client to space out interpolation
+    tick: int = 0
+    server_time: float = 0
+    # StateHashSystem hash of the entities, if the server computes them
+    state_hash: Optional[int] = None
@@ -1,13 +1,21 @@
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
 from constants.message_types import MessageTypes
+from schemas.entities import EntitiesMessage
 from schemas.response import ServerResponse
 
 
 class GameReady(BaseModel):
     type: str = MessageTypes.GAME_READY.value
+    # Only set in lockstep rooms, every client then runs the simulation from
+    # the same seed and players, see InputBundle
+    lockstep_seed: Optional[int] = None
+    player_names: List[str] = []
+    step_ms: float = 0
+    # EntityRegistry handle of each player's snake
+    player_handles: Dict[str, int] = {}
 
 
 class Position(BaseModel):
@@ -26,7 +34,34 @@ class PlayerCommand(BaseModel):
     command: dict
 
 
+class InputBundle(BaseModel):
+    type: str = MessageTypes.INPUT_BUNDLE.value
+    # Commands of the latest lockstep steps by player name, oldest first.
+    # Each step is sent again in the following bundles so a dropped bundle
+    # loses nothing.
+    first_tick: int
+    steps: List[Dict[str, dict]]
+    # Server's StateHashSystem hash after the newest step, if enabled
+    state_hash: Optional[int] = None
+
+
 class ServerUpdate(ServerResponse):
     type: str = MessageTypes.SERVER_UPDATE.value
     players: List[PlayerUpdate]
     game_state: str
+
+
+class ResumeSessionRequest(BaseModel):
+    type: str = MessageTypes.RESUME_SESSION.value
+    session_token: str
+    # Newest simulation step the client has seen
+    last_tick: int = -1
+
+
+class ResumeSessionResponse(ServerResponse):
+    type: str = MessageTypes.RESUME_SESSION_RESPONSE.value
+    player_name: str = ""
+    # Keyframes newer than the client's last step, oldest first
+    keyframes: List[EntitiesMessage] = []
+    # Lockstep steps newer than the client's last step, in lockstep rooms
+    input_bundle: Optional[InputBundle] = None
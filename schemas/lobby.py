@@ -22,6 +22,12 @@ class PlayerConfigRequest(BaseModel):
 
 
 # Server responses
+class JoinLobbyResponse(ServerResponse):
+    type: str = MessageTypes.JOIN_LOBBY_RESPONSE.value
+    # Used to resume the session after a lost connection
+    session_token: str = ""
+
+
 class LobbyInfoResponse(ServerResponse):
     type: str = MessageTypes.LOBBY_INFO_RESPONSE.value
     player_names: List[str]
@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+
+from schemas.entities import EntitiesMessage
+from schemas.game import (
+    GameReady,
+    InputBundle,
+    PlayerCommand,
+    ResumeSessionRequest,
+    ResumeSessionResponse,
+    ServerUpdate,
+)
+from schemas.lobby import (
+    JoinLobbyRequest,
+    JoinLobbyResponse,
+    LobbyInfoRequest,
+    LobbyInfoResponse,
+    PlayerConfigRequest,
+)
+from schemas.response import ServerResponse
+
+# Every message schema by the default of its type field, built once on import.
+# A new message schema has to be added here to be decoded.
+MESSAGE_MODELS: dict[str, type[BaseModel]] = {
+    model.model_fields["type"].default: model
+    for model in (
+        EntitiesMessage,
+        GameReady,
+        InputBundle,
+        PlayerCommand,
+        ResumeSessionRequest,
+        ResumeSessionResponse,
+        ServerUpdate,
+        JoinLobbyRequest,
+        JoinLobbyResponse,
+        LobbyInfoRequest,
+        LobbyInfoResponse,
+        PlayerConfigRequest,
+        ServerResponse,
+    )
+}
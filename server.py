@@ -0,0 +1,9 @@
+import sys
+
+from game_instances.server_loop import AsyncServerLoop, server_options
+
+
+if "__main__" == __name__:
+    # Headless single process room, the quickest to start serving. Neither
+    # pygame nor NumPy are imported, see benchmarks/cold_start.py
+    AsyncServerLoop(10, 10, 20, "127.0.0.1", **server_options(sys.argv)).run()
@@ -0,0 +1,137 @@
+import operator
+
+import numpy as np
+
+from components.body.component import BodyComponent
+from components.body.snake import pack_cells
+from components.movement.component import MovementComponent
+from components.movement.snake import SnakeMovement
+from entities.base import Entity
+from entities.registry import EntityRegistry
+
+from schemas.game import PlayerCommand
+from systems.system import System
+
+
+# Directions are handled by their index in the command translator
+_DIRECTIONS = list(SnakeMovement.command_translator)
+_DELTAS = np.array(list(SnakeMovement.command_translator.values()), dtype=np.int64)
+_OPPOSITES = np.array(
+    [_DIRECTIONS.index(SnakeMovement.opposite_directions[d]) for d in _DIRECTIONS]
+)
+
+
+class BatchMovementSystem(System):
+    """Moves every snake in one set of array operations.
+
+    Heads, directions and speeds of all snakes live in NumPy arrays. The
+    tick's commands are checked against the opposite directions at once and
+    all heads are advanced and wrapped around the board together, so no
+    separate clipping pass is needed. Only the O(1) push of the new head and
+    pop of the tail are done per snake.
+    """
+
+    reads = frozenset({Entity, MovementComponent})
+    writes = frozenset({BodyComponent, MovementComponent})
+
+    def __init__(self, rows: int, columns: int):
+        self._grid_rows = rows
+        self._grid_columns = columns
+
+        self._snakes: list[Entity] = []
+        self._snake_rows: dict[str, int] = {}  # Player name -> array row
+        self._heads = np.zeros((0, 2), dtype=np.int64)
+        self._direction_indexes = np.zeros(0, dtype=np.int64)
+        self._speeds = np.zeros(0, dtype=np.int64)
+
+    def setup(self):
+        pass
+
+    def run(
+        self,
+        entities: EntityRegistry | list[Entity],
+        move_commands: list[PlayerCommand],
+    ):
+        if isinstance(entities, EntityRegistry):
+            snakes = [
+                entity
+                for column, _ in entities.query(SnakeMovement).columns()
+                for entity in column
+            ]
+        else:
+            snakes = [
+                entity
+                for entity in entities
+                if isinstance(entity.movement_component, SnakeMovement)
+            ]
+        if len(snakes) != len(self._snakes) or not all(
+            map(operator.is_, snakes, self._snakes)
+        ):
+            self._register(snakes)
+        if not snakes:
+            return
+
+        if move_commands:
+            self._apply_commands(move_commands)
+
+        max_speed = int(self._speeds.max())
+        for step in range(max_speed):
+            moving = self._speeds > step if max_speed > 1 else slice(None)
+            heads = self._heads[moving] + _DELTAS[self._direction_indexes[moving]]
+            heads %= (self._grid_columns, self._grid_rows)
+            self._heads[moving] = heads
+
+            if max_speed == 1:
+                moving_snakes = snakes
+            else:
+                moving_snakes = [snakes[i] for i in np.flatnonzero(moving)]
+            packed_heads = pack_cells(heads[:, 0], heads[:, 1]).tolist()
+            for snake, packed_head in zip(moving_snakes, packed_heads):
+                snake.body_component.push_head(packed_head)
+
+        for snake in snakes:
+            body = snake.body_component
+            while len(body) > body.size:
+                body.pop_tail()
+
+    def _register(self, snakes: list[Entity]):
+        self._snakes = snakes
+        self._snake_rows = {snake._entity_id: row for row, snake in enumerate(snakes)}
+        self._heads = np.array(
+            [snake.body_component.head for snake in snakes], dtype=np.int64
+        ).reshape(-1, 2)
+        self._direction_indexes = np.array(
+            [
+                _DIRECTIONS.index(snake.movement_component.direction)
+                for snake in snakes
+            ],
+            dtype=np.int64,
+        )
+        self._speeds = np.array(
+            [snake.movement_component.speed for snake in snakes], dtype=np.int64
+        )
+
+    def _apply_commands(self, move_commands: list[PlayerCommand]):
+        # The first command of each player wins, as in MovementSystem
+        requested = {}
+        for command in move_commands:
+            row = self._snake_rows.get(command.player_name)
+            if row is not None and row not in requested:
+                requested[row] = _DIRECTIONS.index(
+                    command.command["snake_direction"]
+                )
+        if not requested:
+            return
+
+        rows = np.fromiter(requested.keys(), dtype=np.int64, count=len(requested))
+        directions = np.fromiter(
+            requested.values(), dtype=np.int64, count=len(requested)
+        )
+        allowed = directions != _OPPOSITES[self._direction_indexes[rows]]
+        rows = rows[allowed]
+        directions = directions[allowed]
+        self._direction_indexes[rows] = directions
+
+        # The components keep their direction for anyone reading it
+        for row, direction in zip(rows.tolist(), directions.tolist()):
+            self._snakes[row].movement_component.direction = _DIRECTIONS[direction]
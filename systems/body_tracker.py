@@ -0,0 +1,93 @@
+from collections import deque
+
+from entities.base import Entity
+
+
+class BodyTracker:
+    """Mirrors entity bodies to tell which cells changed since the last sync.
+
+    Bodies only change at their ends, new heads come first and the old head
+    follows them, so comparing the current head with the mirrored one is
+    enough to find the pushed heads and the popped tail cells. Anything else,
+    like a respawned food, is reported as the whole body being swapped.
+
+    Bodies whose version did not change since the last sync are not looked
+    at, a room full of food only costs its moving snakes.
+
+    Entities are kept by reference so their ids stay unique while tracked.
+    """
+
+    def __init__(self):
+        self._bodies: dict[int, deque[tuple[int, int]]] = {}
+        self._entities: dict[int, Entity] = {}
+        self._versions: dict[int, int] = {}
+
+    def __contains__(self, entity: Entity):
+        return id(entity) in self._bodies
+
+    def clear(self):
+        self._bodies.clear()
+        self._entities.clear()
+        self._versions.clear()
+
+    def track(self, entity: Entity) -> list[tuple[int, int]]:
+        """Starts mirroring an entity, returns all of its cells"""
+        body = deque(_cell(segment) for segment in entity.body_component.segments)
+        self._bodies[id(entity)] = body
+        self._entities[id(entity)] = entity
+        self._versions[id(entity)] = entity.body_component.version
+        return list(body)
+
+    def untrack(self, entity: Entity) -> list[tuple[int, int]]:
+        """Stops mirroring an entity, returns the cells it had"""
+        del self._entities[id(entity)]
+        del self._versions[id(entity)]
+        return list(self._bodies.pop(id(entity)))
+
+    def untrack_missing(
+        self, entities: list[Entity]
+    ) -> list[tuple[Entity, list[tuple[int, int]]]]:
+        """Stops mirroring the entities not in the list anymore"""
+        alive = set(id(entity) for entity in entities)
+        missing = [
+            entity for key, entity in self._entities.items() if key not in alive
+        ]
+        return [(entity, self.untrack(entity)) for entity in missing]
+
+    def update(
+        self, entity: Entity
+    ) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+        """Syncs the mirror, returns the added and removed cells in order"""
+        version = entity.body_component.version
+        if self._versions[id(entity)] == version:
+            return [], []
+        self._versions[id(entity)] = version
+        segments = entity.body_component.segments
+        body = self._bodies[id(entity)]
+
+        pushed = None
+        if body:
+            old_head = body[0]
+            for index in range(min(len(segments), 3)):
+                if _cell(segments[index]) == old_head:
+                    pushed = index
+                    break
+
+        removed = []
+        if pushed is None:
+            removed.extend(body)
+            body.clear()
+            pushed = len(segments)
+
+        added = []
+        for index in range(pushed - 1, -1, -1):
+            cell = _cell(segments[index])
+            body.appendleft(cell)
+            added.append(cell)
+        while len(body) > len(segments):
+            removed.append(body.pop())
+        return added, removed
+
+
+def _cell(segment) -> tuple[int, int]:
+    return (int(segment[0]), int(segment[1]))
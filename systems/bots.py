@@ -0,0 +1,363 @@
+import heapq
+
+import numpy as np
+
+from components.body.component import BodyComponent
+from components.movement.component import MovementComponent
+from entities.base import Entity
+from entities.type import Food, Snake
+from schemas.game import PlayerCommand
+from systems.system import System
+
+_DIRECTIONS = MovementComponent.command_translator
+_OPPOSITES = MovementComponent.opposite_directions
+_SHIFTS = ((1, 0), (-1, 0), (1, 1), (-1, 1))
+
+
+class RoomFields:
+    """Grid distance fields of a room, shared by all the bots playing in it.
+
+    Once per tick, a breadth first search from the food gives every free cell
+    its distance to the nearest food. A flood fill of the free cells gives
+    every cell the size of the open region it is in. Both wrap around the
+    board like the snakes do and are computed with whole-grid NumPy shifts,
+    so their cost does not depend on the number of bots.
+    """
+
+    def __init__(self, rows: int, columns: int):
+        self.rows = rows
+        self.columns = columns
+        self.tick = None
+        self.free = np.ones((rows, columns), dtype=bool)
+        self.food_distance = np.full((rows, columns), -1, dtype=np.int32)
+        self.region_size = np.zeros((rows, columns), dtype=np.int32)
+        # Highest head priority next to each cell, the snake with the
+        # highest priority takes a cell several heads could move into
+        self.head_reach = np.zeros((rows, columns), dtype=np.int64)
+        # Head cell -> priority of the snake
+        self.heads: dict[tuple[int, int], int] = {}
+        # Cells picked by the bots this tick and the priorities that picked
+        self.claimed = set()
+        self.decided = set()
+
+    def update(self, tick: int, bodies, food_cells) -> None:
+        """Recomputes the fields, unless they are already as new as the tick"""
+        if self.tick is not None and tick <= self.tick:
+            return
+        self.tick = tick
+        self.claimed.clear()
+        self.decided.clear()
+
+        self.free[:] = True
+        self.heads.clear()
+        heads = np.zeros(self.free.shape, dtype=np.int64)
+        for body in bodies:
+            for x, y in body:
+                self.free[y, x] = False
+            if len(body):
+                priority = self.head_priority(body)
+                heads[body[0][1], body[0][0]] = priority
+                self.heads[tuple(body[0])] = priority
+
+        food = np.zeros_like(self.free)
+        for x, y in food_cells:
+            food[y, x] = True
+        self.food_distance = _breadth_first(self.free, food & self.free)
+        self.region_size = _region_sizes(self.free)
+        self.head_reach = np.maximum.reduce(
+            [np.roll(heads, shift, axis) for shift, axis in _SHIFTS]
+        )
+
+    def head_priority(self, body) -> int:
+        """Longer snakes first, then the head cell, so no two snakes tie"""
+        head_x, head_y = body[0]
+        return len(body) * self.free.size + head_y * self.columns + head_x + 1
+
+    def free_moves(self, head) -> int:
+        """Free cells next to the head that no bot claimed this tick"""
+        moves = 0
+        for dx, dy in _DIRECTIONS.values():
+            x = (head[0] + dx) % self.columns
+            y = (head[1] + dy) % self.rows
+            if self.free[y, x] and (x, y) not in self.claimed:
+                moves += 1
+        return moves
+
+    def update_from_entities(self, tick: int, entities) -> None:
+        bodies = []
+        food_cells = []
+        for entity in entities:
+            if isinstance(entity, Snake):
+                bodies.append(entity.body_component.segments)
+            elif isinstance(entity, Food):
+                food_cells.append(entity.position)
+        self.update(tick, bodies, food_cells)
+
+
+def choose_direction(fields: RoomFields, body, direction: str = None) -> str:
+    """Direction towards the closest food that does not trap the snake.
+
+    Moves are ranked, worst first: cells another bot picked this tick, as
+    two heads in one cell both die, then cells of a body, then the last free
+    cell left to another head that has not picked yet, then cells of a
+    region smaller than the snake, then cells a snake of higher priority
+    that has not picked yet can also reach. Shorter food distances break
+    the ties, then bigger regions. The picked cell is claimed in the fields.
+
+    A trapped bot runs into a body rather than into another head, the body
+    may be a tail that moves away. When the most constrained bots pick
+    first, see choose_directions, two bots only collide head on when a cell
+    is the last free move of both.
+    """
+    body = [tuple(cell) for cell in body]
+    if direction is None:
+        direction = _direction_of(body, fields.rows, fields.columns)
+    head_x, head_y = body[0]
+    priority = fields.head_priority(body)
+
+    best_direction, best_score = direction, None
+    for candidate, (dx, dy) in _DIRECTIONS.items():
+        if candidate == _OPPOSITES[direction]:
+            continue
+        x = (head_x + dx) % fields.columns
+        y = (head_y + dy) % fields.rows
+        free = bool(fields.free[y, x])
+        region_size = int(fields.region_size[y, x])
+        food_distance = int(fields.food_distance[y, x])
+        if food_distance < 0:
+            food_distance = fields.rows * fields.columns
+        # Two heads moving into the same cell both die
+        claimed = (x, y) in fields.claimed
+        needed = free and _last_move_of_other(fields, (x, y), priority)
+        reach = int(fields.head_reach[y, x])
+        contested = reach > priority and reach not in fields.decided
+        score = (
+            not claimed,
+            free,
+            not needed,
+            region_size >= len(body),
+            not contested,
+            -food_distance,
+            region_size,
+        )
+        if best_score is None or score > best_score:
+            best_direction, best_score = candidate, score
+
+    dx, dy = _DIRECTIONS[best_direction]
+    fields.claimed.add(((head_x + dx) % fields.columns, (head_y + dy) % fields.rows))
+    fields.decided.add(priority)
+    return best_direction
+
+
+class BotCommandSystem(System):
+    """Commands of every snake of a room played by bots only.
+
+    The room's RoomFields are updated once per step and the bots pick from
+    them, see choose_directions. The commands are written into the list it
+    is given, the one the MovementSystem is called with next.
+    """
+
+    reads = frozenset({Entity, BodyComponent, MovementComponent})
+
+    def __init__(self, fields: RoomFields):
+        self.fields = fields
+
+    def setup(self):
+        pass
+
+    def run(self, entities, tick: int, commands: list[PlayerCommand]):
+        self.fields.update_from_entities(tick, entities)
+        snakes = entities.of_type(Snake)
+        directions = choose_directions(
+            self.fields,
+            [
+                (snake.body_component.segments, snake.movement_component.direction)
+                for snake in snakes
+            ],
+        )
+        commands[:] = [
+            PlayerCommand(
+                player_name=snake._entity_id,
+                command={"snake_direction": direction},
+            )
+            for snake, direction in zip(snakes, directions)
+        ]
+
+
+class BotInputSystem(System):
+    """Input system of a client played by a bot.
+
+    Bots of the same room share one RoomFields. A command is picked once
+    per new server step, from the newest snapshot or the lockstep state of
+    the ClientLoop set as game.
+    """
+
+    def __init__(self, fields: RoomFields):
+        self.fields = fields
+        self.game = None
+        self._last_tick = None
+
+    def setup(self):
+        pass
+
+    def run(self):
+        if self.game is None:
+            return None, False
+        if self.game.lockstep is not None:
+            return self._run_lockstep(self.game.lockstep), False
+
+        snapshot = self.game.latest_snapshot
+        if snapshot is None or snapshot.tick == self._last_tick:
+            return None, False
+        self._last_tick = snapshot.tick
+
+        bodies = []
+        food_cells = []
+        own_body = None
+        for entity in snapshot.entities:
+            if entity.entity_id == "food":
+                food_cells.append(entity.body[0])
+            else:
+                bodies.append(entity.body)
+                if entity.handle == self.game.player_handle:
+                    own_body = entity.body
+        if own_body is None:
+            # Dead or spectating
+            return None, False
+
+        self.fields.update(snapshot.tick, bodies, food_cells)
+        return {"snake_direction": choose_direction(self.fields, own_body)}, False
+
+    def _run_lockstep(self, lockstep) -> dict | None:
+        if lockstep.tick == self._last_tick:
+            return None
+        self._last_tick = lockstep.tick
+
+        snake = lockstep.entities.player(self.game.player_name)
+        if snake is None:
+            return None
+        self.fields.update_from_entities(lockstep.tick, lockstep.entities)
+        direction = choose_direction(
+            self.fields,
+            snake.body_component.segments,
+            snake.movement_component.direction,
+        )
+        return {"snake_direction": direction}
+
+
+def choose_directions(fields: RoomFields, snakes) -> list[str]:
+    """Directions of all the snakes of a room, given as (body, direction).
+
+    The bot with the fewest free moves left picks next, so a snake never
+    loses its last way out to one that had others. Picking a cell only
+    changes the moves of the heads next to it, those are queued again and
+    the entries of bots that already picked are skipped.
+    """
+    bodies = [[tuple(cell) for cell in body] for body, _ in snakes]
+    directions = [direction for _, direction in snakes]
+    by_head = {body[0]: index for index, body in enumerate(bodies)}
+
+    def entry(index: int):
+        # Fewest moves first, then higher priorities, as in choose_direction
+        body = bodies[index]
+        return fields.free_moves(body[0]), -fields.head_priority(body), index
+
+    queue = [entry(index) for index in range(len(bodies))]
+    heapq.heapify(queue)
+    picked = [False] * len(bodies)
+    while queue:
+        index = heapq.heappop(queue)[2]
+        if picked[index]:
+            continue
+        picked[index] = True
+        body = bodies[index]
+        directions[index] = choose_direction(fields, body, directions[index])
+
+        dx, dy = _DIRECTIONS[directions[index]]
+        x = (body[0][0] + dx) % fields.columns
+        y = (body[0][1] + dy) % fields.rows
+        for near_dx, near_dy in _DIRECTIONS.values():
+            near = ((x + near_dx) % fields.columns, (y + near_dy) % fields.rows)
+            near_index = by_head.get(near)
+            if near_index is not None and not picked[near_index]:
+                heapq.heappush(queue, entry(near_index))
+    return directions
+
+
+def _last_move_of_other(fields: RoomFields, cell, priority: int) -> bool:
+    """Whether the free cell is the last move no bot claimed of a head next
+    to it that has not picked yet. Taking it kills that snake and this one."""
+    for dx, dy in _DIRECTIONS.values():
+        head = ((cell[0] + dx) % fields.columns, (cell[1] + dy) % fields.rows)
+        head_priority = fields.heads.get(head)
+        if head_priority in (None, priority) or head_priority in fields.decided:
+            continue
+        other_moves = fields.free_moves(head) - (cell not in fields.claimed)
+        if other_moves == 0:
+            return True
+    return False
+
+
+def _direction_of(body, rows: int, columns: int) -> str:
+    if len(body) < 2:
+        return "RIGHT"
+    dx = (body[0][0] - body[1][0]) % columns
+    dy = (body[0][1] - body[1][1]) % rows
+    # Offsets of -1 wrap to the last row or column
+    offset = (dx if dx <= 1 else dx - columns, dy if dy <= 1 else dy - rows)
+    for direction, delta in _DIRECTIONS.items():
+        if delta == offset:
+            return direction
+    return "RIGHT"
+
+
+def _neighbours(cells: np.ndarray) -> np.ndarray:
+    return (
+        np.roll(cells, 1, axis=0)
+        | np.roll(cells, -1, axis=0)
+        | np.roll(cells, 1, axis=1)
+        | np.roll(cells, -1, axis=1)
+    )
+
+
+def _breadth_first(free: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    """Steps from the nearest source through free cells, -1 if unreachable"""
+    distance = np.full(free.shape, -1, dtype=np.int32)
+    distance[sources] = 0
+    visited = sources.copy()
+    frontier = sources
+    steps = 0
+    while frontier.any():
+        steps += 1
+        frontier = _neighbours(frontier) & free & ~visited
+        distance[frontier] = steps
+        visited |= frontier
+    return distance
+
+
+def _region_sizes(free: np.ndarray) -> np.ndarray:
+    """Size of the connected free region of each cell, 0 for blocked ones"""
+    blocked_label = free.size
+    labels = np.where(free, np.arange(free.size).reshape(free.shape), blocked_label)
+    # Every free cell takes the smallest label around it until the labels
+    # of each region settle on a single value. Labels are cell indexes, so
+    # a label can also jump to the label of the cell it names.
+    while True:
+        spread = np.minimum.reduce(
+            [
+                labels,
+                np.roll(labels, 1, axis=0),
+                np.roll(labels, -1, axis=0),
+                np.roll(labels, 1, axis=1),
+                np.roll(labels, -1, axis=1),
+            ]
+        )
+        spread = np.where(free, spread, blocked_label)
+        spread = np.append(spread.ravel(), blocked_label)[spread]
+        if np.array_equal(spread, labels):
+            break
+        labels = spread
+
+    sizes = np.bincount(labels.ravel(), minlength=blocked_label + 1)
+    sizes[blocked_label] = 0
+    return sizes[labels].astype(np.int32)
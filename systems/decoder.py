@@ -1,78 +1,70 @@
-import importlib.util
 import json
-import os
-from typing import Dict
+
 from pydantic import BaseModel, ValidationError
 
-from constants.message_types import MessageTypes
+from schemas.registry import MESSAGE_MODELS
+
+# Every message is a model_dump_json and type is the first field of every
+# schema, so the tag can be sliced off the front without parsing
+_TYPE_PREFIX = '{"type":"'
 
 
 class MessageDecoder:
+    """Decodes a message string into the schema its type names.
+
+    The type tag is peeked from the front of the string, then the string is
+    parsed and validated in one go by the schema's compiled validator.
+    """
+
     def __init__(self):
-        self._MESSAGE_MODELS = self._import_schema_models()
+        self._MESSAGE_MODELS = MESSAGE_MODELS
+
+    def peek_type(self, data: str) -> str | None:
+        """Type tag of a message without decoding it, None if it cannot be
+        read off the front of the string"""
+        return _peek_type(data)
 
     def decode_message(self, data: str) -> BaseModel:
         """
         Function to decode a string into a Pydantic model based on message type
         """
-        # Check if the input data is a string
         if not isinstance(data, str):
-            print("Input data:", data)
-            raise ValueError("Input data must be a string")
-
-        # Try parsing the string into a dictionary
-        try:
-            parsed_data = json.loads(data)
-        except Exception as e:
-            print("Error parsing JSON:", e)
-            print("Input data:", data)
-            raise ValueError("Invalid input data format")
+            raise ValueError(
+                f"Input data must be a string, not {type(data).__name__}"
+            )
 
-        # Check if parsed_data is a dictionary
-        if not isinstance(parsed_data, dict):
-            print("Input data:", parsed_data)
-            raise ValueError("Parsed data is not a dictionary")
+        message_type = _peek_type(data)
+        if message_type is None:
+            # Not written by model_dump_json, the tag can be anywhere
+            try:
+                parsed_data = json.loads(data)
+            except ValueError as e:
+                raise ValueError(f"Invalid input data format: {e}") from e
+            if not isinstance(parsed_data, dict):
+                raise ValueError("Parsed data is not a dictionary")
+            message_type = parsed_data.get("type")
+            if not message_type:
+                raise ValueError("Message type is missing")
 
-        # Get the message type
-        message_type = parsed_data.get("type")
-        if not message_type:
-            raise ValueError("Message type is missing")
-
-        # Get the corresponding model based on message type
         message_model = self._MESSAGE_MODELS.get(message_type)
         if not message_model:
             raise ValueError(f"No matching message schema found for type '{message_type}'")
 
-        # Try parsing the parsed dictionary into the selected Pydantic model
         try:
-            return message_model.model_validate(parsed_data)
+            return message_model.model_validate_json(data)
         except ValidationError as e:
-            print("Input data:", message_model)
-            print("Validation error:", e)
-            raise ValueError(f"Validation error for message type '{message_type}': {e}")
-
-    def _import_schema_models(self) -> Dict[MessageTypes, BaseModel]:
-        """
-        Function to dynamically import all Pydantic models from the schemas directory
-        """
-        message_models = dict()
-
-        directory = "schemas"
-
-        # Get a list of all Python files in the directory
-        files = [f[:-3] for f in os.listdir(directory) if f.endswith('.py') and not f.startswith('__')]
+            raise ValueError(
+                f"Validation error for message type '{message_type}': {e}"
+            ) from e
 
-        # Import all Pydantic models from the files
-        for file in files:
-            module_name = f'schemas.{file}'
-            module = importlib.import_module(module_name)
 
-            # Get all classes defined in the module
-            for name in dir(module):
-                obj = getattr(module, name)
-                if isinstance(obj, type) and issubclass(obj, BaseModel) and obj != BaseModel:
-                    # Ensure the model has a 'type' attribute for message type
-                    if "type" in obj.model_fields:
-                        message_models[obj.model_fields['type'].default] = obj
+def _peek_type(data: str) -> str | None:
+    if not data.startswith(_TYPE_PREFIX):
+        return None
+    end = data.find('"', len(_TYPE_PREFIX))
+    if end < 0:
+        return None
+    message_type = data[len(_TYPE_PREFIX) : end]
+    # An escaped character needs a real parse
+    return None if "\\" in message_type else message_type
 
-        return message_models
@@ -0,0 +1,21 @@
+from entities.base import Entity
+from entities.registry import EntityRegistry
+
+from systems.system import System
+
+
+class FlushSystem(System):
+    """Drops the entities despawned so far, see EntityRegistry.flush.
+
+    Placed between the systems that despawn and the ones that must not see
+    the despawned entities, like the state hash after the game logic.
+    """
+
+    reads = frozenset({Entity})
+    writes = frozenset({Entity})
+
+    def setup(self):
+        pass
+
+    def run(self, entities: EntityRegistry):
+        entities.flush()
@@ -1,70 +1,165 @@
 import random
 
+from components.body.component import BodyComponent
+from components.movement.component import MovementComponent
 from entities.base import Entity
+from entities.registry import EntityRegistry
 from entities.type import Food, Snake
 
+from systems.body_tracker import BodyTracker
+from systems.occupancy import occupancy_grid
 from systems.system import System
 
 
 class GameLogicSystem(System):
-    def __init__(self, rows: int, columns: int, cell_size: int) -> None:
+    # Snakes grow, food moves and dead snakes are removed
+    reads = frozenset({Entity, BodyComponent})
+    writes = frozenset({Entity, BodyComponent})
+
+    def __init__(
+        self,
+        rows: int,
+        columns: int,
+        cell_size: int,
+        rng: random.Random = None,
+        clip_heads: bool = True,
+    ) -> None:
         self._grid_rows = rows
         self._grid_columns = columns
         self._cell_size = cell_size
+        # BatchMovementSystem wraps the heads itself
+        self._clip_heads = clip_heads
+        # Lockstep peers pass generators seeded alike to spawn the same food
+        self._rng = rng or random.Random()
+
+        # Collisions and food spawns are looked up on the grid, which follows
+        # the bodies' head and tail changes, huge arenas get a chunked grid
+        self._grid = occupancy_grid(rows, columns)
+        self._tracker = BodyTracker()
 
     def setup(self):
         pass
 
-    def run(self, entities: list[Entity]):
-        snakes: list[Snake] = list(filter(lambda entity: isinstance(entity, Snake), entities))
-        foods: list[Food] = list(filter(lambda entity: isinstance(entity, Food), entities))
-
-        self._solve_clipping(snakes)
+    def run(self, entities: EntityRegistry | list[Entity]):
+        """Dead snakes are removed, a registry drops them on its next flush"""
+        if isinstance(entities, EntityRegistry):
+            # The columns of a query, no entity type is checked
+            if self._clip_heads:
+                for _, snake_bodies, _ in entities.query(
+                    BodyComponent, MovementComponent
+                ).columns():
+                    self._solve_clipping(snake_bodies)
+            bodied = [
+                entity
+                for column, _ in entities.query(BodyComponent).columns()
+                for entity in column
+            ]
+        else:
+            if self._clip_heads:
+                self._solve_clipping(
+                    [
+                        entity.body_component
+                        for entity in entities
+                        if isinstance(entity, Snake)
+                    ]
+                )
+            bodied = entities
+
+        # Entities that left the game give their cells back
+        for entity, cells in self._tracker.untrack_missing(bodied):
+            self._vacate(entity, cells)
+
+        # Popped tails are freed before any new head is placed, a head may
+        # follow right behind a tail
+        moves = []
+        for entity in bodied:
+            if entity not in self._tracker:
+                for cell in self._tracker.track(entity):
+                    if self._grid.occupant(cell) is None:
+                        self._grid.occupy(cell, entity)
+                continue
+
+            added, removed = self._tracker.update(entity)
+            for cell in removed:
+                self._grid.vacate(cell, entity)
+            if added:
+                moves.append((entity, added))
+
+        heads = {}
+        dead_snakes = []
+        for entity, added in moves:
+            for cell in added:
+                occupant = self._grid.occupant(cell)
+                if isinstance(entity, Snake) and occupant is not None:
+                    if isinstance(occupant, Food):
+                        entity.body_component.size += 1
+                        # Taken first so the food cannot respawn right here
+                        self._grid.occupy(cell, entity)
+                        self._spawn_valid_food(entities, occupant)
+                    else:
+                        # Checking snake collision
+                        dead_snakes.append(entity)
+                        if heads.get(cell) is occupant:
+                            # Head on, both heads are in each other's body
+                            dead_snakes.append(occupant)
+                        break
 
-        for snake in snakes:
-            for food in foods:
-                if self._check_collision(snake, food):
-                    snake.body_component.size += 1
-                    self._spawn_valid_food(entities, food)
+                self._grid.occupy(cell, entity)
+                heads[cell] = entity
 
-        for snake_1 in snakes:
-            for snake_2 in snakes:
-                # Checking snake collision
-                if snake_1 == snake_2:
-                    body_2 = snake_2.body_component.tail
-                else:
-                    body_2 = snake_2.body_component.segments
-                if snake_1.body_component.head in body_2:
-                    entities.remove(snake_1)
+        for snake in dead_snakes:
+            if snake in self._tracker:
+                entities.remove(snake)
+                self._vacate(snake, self._tracker.untrack(snake))
 
-                # TODO - Check collision between different snakes
+        return entities
 
+    def spawn_entities(self, player_names: list[str]) -> EntityRegistry:
+        """Initial entities of a game, one snake per player"""
+        entities = EntityRegistry()
+        entities.spawn(
+            Food(
+                (
+                    self._rng.randint(0, self._grid_columns - 1),
+                    self._rng.randint(0, self._grid_rows - 1),
+                )
+            )
+        )
+
+        for player_index, player_name in enumerate(player_names):
+            player_color = [0, 0, 0]
+            player_color[player_index % 3] = 255
+            snake = Snake(
+                player_name,
+                start_position=(6, 0 + 2 * player_index),
+                color=player_color,
+            )
+            entities.spawn(snake, player_name)
         return entities
 
-    def _spawn_valid_food(self, entities: list[Entity], food: Food):
-        invalid_position = True
+    def _spawn_valid_food(self, entities: EntityRegistry | list[Entity], food: Food):
+        food_position = self._grid.random_free_cell(self._rng)
+        if food_position is None:
+            # The board is full, the food is gone for good
+            entities.remove(food)
+            self._vacate(food, self._tracker.untrack(food))
+            return
 
-        while invalid_position:
-            food_position = (
-                random.randint(0, self._grid_columns - 1),
-                random.randint(0, self._grid_rows - 1),
-            )
-            invalid_position = False
-
-            for entity in entities:
-                entity: Food
-                for segment in entity.body_component.segments:
-                    if (
-                        food_position[0] == segment[0]
-                        and food_position[1] == segment[1]
-                    ):
-                        invalid_position = True
-                        break
         food.position = food_position
+        added, removed = self._tracker.update(food)
+        for cell in removed:
+            self._grid.vacate(cell, food)
+        for cell in added:
+            self._grid.occupy(cell, food)
 
-    def _solve_clipping(self, snakes: list[Snake]):
-        for snake in snakes:
-            snake_head = list(snake.body_component.head)
+    def _vacate(self, entity: Entity, cells: list[tuple[int, int]]):
+        for cell in cells:
+            self._grid.vacate(cell, entity)
+        self._grid.release(entity)
+
+    def _solve_clipping(self, snake_bodies: list[BodyComponent]):
+        for body in snake_bodies:
+            snake_head = list(body.head)
 
             if snake_head[0] >= self._grid_columns:
                 snake_head[0] = 0
@@ -75,13 +170,4 @@ class GameLogicSystem(System):
             elif snake_head[1] < 0:
                 snake_head[1] = self._grid_rows - 1
 
-            snake.body_component.head = snake_head
-
-    def _check_collision(self, entity_a: Entity, entity_b: Entity):
-        if (
-            entity_a.body_component.segments[0][0] == entity_b.body_component.segments[0][0]
-            and entity_a.body_component.segments[0][1] == entity_b.body_component.segments[0][1]
-        ):
-            return True
-        else:
-            False
+            body.head = snake_head
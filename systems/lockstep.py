@@ -0,0 +1,56 @@
+import random
+
+from entities.registry import EntityRegistry
+from schemas.game import PlayerCommand
+from systems.game_logic import GameLogicSystem
+from systems.movement import MovementSystem
+from systems.state_hash import StateHashSystem
+
+
+class LockstepSimulation:
+    """Runs a whole room from the players' commands alone.
+
+    Every peer starts from the same seed and player list and applies the same
+    commands on the same steps, so all of them reach the same state without
+    any entity ever being sent over the network.
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        columns: int,
+        cell_size: int,
+        seed: int,
+        player_names: list[str],
+    ):
+        self._game_logic_system = GameLogicSystem(
+            rows, columns, cell_size, rng=random.Random(seed)
+        )
+        self._movement_system = MovementSystem()
+        self._state_hash_system = StateHashSystem()
+
+        self.entities: EntityRegistry = self._game_logic_system.spawn_entities(
+            player_names
+        )
+        self.tick = 0
+        self.state_hash = self._state_hash_system.run(self.entities)
+
+    def run(self, steps: list[tuple[int, list[PlayerCommand]]]) -> None:
+        for tick, commands in steps:
+            self.step(tick, commands)
+
+    def step(self, tick: int, commands: list[PlayerCommand]) -> None:
+        if tick != self.tick + 1:
+            raise ValueError(
+                f"Lockstep step {tick} cannot be applied after step {self.tick}"
+            )
+
+        self._movement_system.run(self.entities, commands)
+        self._game_logic_system.run(self.entities)
+        self.entities.flush()
+        self.state_hash = self._state_hash_system.run(self.entities)
+        self.tick = tick
+
+    def verify(self, tick: int, state_hash: int) -> bool:
+        """False if the given hash of the current step differs from ours"""
+        return tick != self.tick or state_hash == self.state_hash
@@ -1,29 +1,42 @@
+from components.body.component import BodyComponent
+from components.movement.component import MovementComponent
 from entities.base import Entity
+from entities.registry import EntityRegistry
 
 from schemas.game import PlayerCommand
 from systems.system import System
 
 
 class MovementSystem(System):
+    reads = frozenset({Entity, MovementComponent})
+    writes = frozenset({BodyComponent, MovementComponent})
+
     def setup(self):
         pass
 
-    def run(self, entities: list[Entity], move_commands: list[PlayerCommand]):
+    def run(
+        self,
+        entities: EntityRegistry | list[Entity],
+        move_commands: list[PlayerCommand],
+    ):
+        if isinstance(entities, EntityRegistry):
+            # Only the columns of the entities that move are walked
+            movers = entities.query(MovementComponent)
+        else:
+            movers = (
+                (entity, entity.movement_component)
+                for entity in entities
+                if entity.movement_component is not None
+            )
+
         if not move_commands:
-            for entity in entities:
-                if entity.movement_component is not None:
-                    entity.movement_component.move(None)
+            for _, movement in movers:
+                movement.move(None)
             return
 
-        commanded_players = [command.player_name for command in move_commands]
-        for entity in entities:
-            if entity.movement_component is not None:
-                if entity._entity_id in commanded_players:
-                    player_command = next(
-                        command
-                        for command in move_commands
-                        if command.player_name == entity._entity_id
-                    )
-                    entity.movement_component.move(player_command.command)
-                else:
-                    entity.movement_component.move(None)
+        # The first command of each player wins
+        player_commands = {}
+        for command in move_commands:
+            player_commands.setdefault(command.player_name, command.command)
+        for entity, movement in movers:
+            movement.move(player_commands.get(entity._entity_id))
@@ -0,0 +1,119 @@
+import asyncio
+import struct
+
+from systems.network.client import ClientState, _TCPClient
+from systems.network.constants import CONNECTION_EXCEPTION
+
+
+class AsyncGameClient:
+    """In process alternative to GameClient.
+
+    Runs inside the caller's event loop instead of spawning a process with
+    pipes, so a single process can drive hundreds of clients. Must be used
+    from inside a running event loop.
+    """
+
+    def __init__(self, server_ip, server_port):
+        self._tcp_conn = _TCPClient(server_ip, server_port)
+        self._responses = asyncio.Queue()
+        self._read_server_task = None
+
+        self.state = ClientState.IDLE
+
+    async def connect(self, timeout_sec: float = 1) -> bool:
+        self.state = ClientState.CONNECTING
+        # Messages of a previous connection are stale
+        self._responses = asyncio.Queue()
+        try:
+            await asyncio.wait_for(self._tcp_conn.connect(), timeout_sec)
+        except (ConnectionRefusedError, asyncio.TimeoutError, OSError):
+            print("Connection refused")
+            self.state = ClientState.IDLE
+            return False
+
+        self.state = ClientState.RUNNING
+        self._read_server_task = asyncio.create_task(self._read_server())
+        return True
+
+    async def disconnect(self):
+        self.state = ClientState.DISCONNECTING
+        if self._read_server_task is not None:
+            self._read_server_task.cancel()
+            self._read_server_task = None
+        try:
+            await self._tcp_conn.disconnect()
+        except CONNECTION_EXCEPTION:
+            pass
+        self.state = ClientState.IDLE
+
+    def is_running(self):
+        return self.state == ClientState.RUNNING
+
+    async def send(self, data: str) -> bool:
+        """
+        Sends a message to the server, waiting for the transport to drain.
+
+        Returns:
+            bool: True if the message was successfully sent, False otherwise.
+        """
+        if not self.send_message(data):
+            return False
+        try:
+            await self._tcp_conn.writer.drain()
+        except CONNECTION_EXCEPTION:
+            self.state = ClientState.IDLE
+            return False
+        return True
+
+    async def recv(self, timeout: float = None) -> str | None:
+        """
+        Waits for the next message from the server.
+
+        Returns:
+            str or None: The message, "" if the server disconnected or None
+            on timeout.
+        """
+        try:
+            return await asyncio.wait_for(self._responses.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def send_message(self, data: str) -> bool:
+        """Non blocking send, the data is buffered by the transport"""
+        if not isinstance(data, str) or not self.is_running():
+            return False
+        data = data.encode("utf-8")
+        try:
+            self._tcp_conn.writer.write(struct.pack("!I", len(data)) + data)
+        except CONNECTION_EXCEPTION:
+            self.state = ClientState.IDLE
+            return False
+        return True
+
+    def read_response(self) -> str | None:
+        """Non blocking read of the next message from the server"""
+        try:
+            return self._responses.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    def read_responses(self) -> list[str]:
+        """Non blocking read of all pending messages, oldest first"""
+        responses = []
+        while not self._responses.empty():
+            responses.append(self._responses.get_nowait())
+        return responses
+
+    async def _read_server(self):
+        while self.is_running():
+            try:
+                prefix_length = await self._tcp_conn.receive_exactly(4)
+                message_length = struct.unpack("!I", prefix_length)[0]
+                server_data = await self._tcp_conn.receive_exactly(message_length)
+            except (asyncio.IncompleteReadError, *CONNECTION_EXCEPTION):
+                print("Connection lost")
+                self.state = ClientState.IDLE
+                self._responses.put_nowait("")
+                break
+
+            self._responses.put_nowait(server_data.decode())
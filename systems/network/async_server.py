@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from systems.network.constants import CONNECTION_EXCEPTION
+from systems.network.server import NetworkConnection, ServerState
+from systems.network.snapshot_encoder import SnapshotEncoder, SnapshotFrame
+from systems.tick_scheduler import SystemTiming
+
+
+class LocalClientConnection(NetworkConnection):
+    """Client connection living on the same event loop as the game tick.
+
+    Player data is kept by reference in a single slot instead of going
+    through a process pipe. Only the newest message is kept.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        network_writer: asyncio.StreamWriter,
+        network_reader: asyncio.StreamReader,
+    ):
+        super().__init__(client_id, network_writer, network_reader)
+        self.client_data = None
+
+    def read_client_data(self):
+        data = self.client_data
+        self.client_data = None
+        return data
+
+
+class AsyncTCPServer:
+    def __init__(self, host_ip, host_port, request_handler: Callable):
+        self._clients: list[LocalClientConnection] = []
+        self._req_handler = request_handler
+
+        self._broadcast_message = None
+        self._broadcast_event = asyncio.Event()
+        # Snapshot frames are encoded on a worker thread, the event loop
+        # keeps running the game tick and the connections meanwhile
+        self._encoder = SnapshotEncoder()
+        self._encode_worker = ThreadPoolExecutor(1, "snapshot-encoder")
+        self.send_timing = SystemTiming()
+
+        self.state = ServerState.IDLE
+
+        self.ip = host_ip
+        self.port = host_port
+
+        self._server = None
+        self._broadcaster_task = None
+
+    def broadcast_data(self, data: str | SnapshotFrame):
+        # Older messages not sent yet are replaced by the newest one
+        self._broadcast_message = data
+        self._broadcast_event.set()
+
+    def stage_report(self) -> str:
+        """Time spent on snapshots after the game loop handed them over"""
+        return "\n".join(
+            [
+                self._encoder.timing.summary("encode"),
+                self.send_timing.summary("send"),
+            ]
+        )
+
+    def send_data(self, client_id: str, data: str) -> bool:
+        for client in self._clients:
+            if client.id == client_id:
+                asyncio.create_task(self._send_to(client, data))
+                return True
+        return False
+
+    def get_clients(self) -> list[LocalClientConnection]:
+        return list(self._clients)
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle_client, self.ip, self.port
+        )
+        addr = self._server.sockets[0].getsockname()
+        print(f"Serving on {addr}")
+
+        self._broadcaster_task = asyncio.create_task(self._broadcaster())
+
+    async def stop(self):
+        self.state = ServerState.EXITING
+        self._broadcast_event.set()
+
+        if self._server is not None:
+            self._server.close()
+        for client in list(self._clients):
+            try:
+                await client.disconnect()
+            except CONNECTION_EXCEPTION:
+                pass
+        if self._broadcaster_task is not None:
+            await self._broadcaster_task
+        self._encode_worker.shutdown()
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        addr = writer.get_extra_info("peername")
+
+        client_conn = LocalClientConnection(
+            self._generate_unique_id(addr[0], addr[1])[:6], writer, reader
+        )
+        self._clients.append(client_conn)
+
+        print(f"Connected to {client_conn.id}")
+
+        # Connection loop
+        while self.state != ServerState.EXITING:
+            try:
+                data = await client_conn.network_receive()
+            except CONNECTION_EXCEPTION:
+                break
+            if data is None:
+                break
+
+            if self.state == ServerState.LOBBY:
+                # Requests are answered right away, no queue in between
+                response: str = self._req_handler(client_conn.id, data.decode())
+                try:
+                    await client_conn.network_send(response)
+                except CONNECTION_EXCEPTION:
+                    break
+            elif self.state == ServerState.PLAYING:
+                client_conn.client_data = data.decode()
+
+        # Disconnected
+        print(f"Client {client_conn.id} disconnected")
+        if client_conn in self._clients:
+            self._clients.remove(client_conn)
+        try:
+            await client_conn.disconnect()
+        except CONNECTION_EXCEPTION:
+            pass
+
+    async def _send_to(self, client: LocalClientConnection, data: str):
+        try:
+            await client.network_send(data)
+        except CONNECTION_EXCEPTION:
+            pass
+
+    async def _broadcaster(self):
+        """This asyncio task runs along the server"""
+        while self.state != ServerState.EXITING:
+            await self._broadcast_event.wait()
+            self._broadcast_event.clear()
+
+            message = self._broadcast_message
+            self._broadcast_message = None
+            if message is None:
+                continue
+            if isinstance(message, SnapshotFrame):
+                message = await asyncio.get_running_loop().run_in_executor(
+                    self._encode_worker, self._encoder.encode_frame, message
+                )
+
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *[client.network_send(message) for client in self._clients],
+                return_exceptions=True,
+            )
+            self.send_timing.record((time.perf_counter() - start) * 1000)
+            for result in results:
+                if isinstance(result, Exception) and not isinstance(
+                    result, CONNECTION_EXCEPTION
+                ):
+                    raise result
+
+    def _generate_unique_id(self, ip, port):
+        unique_str = f"{ip}:{port}"
+        hashed = hashlib.sha256(unique_str.encode()).hexdigest()
+        if hashed not in [client.id for client in self._clients]:
+            return hashed
+        else:
+            print(f"Failed to generate unique id for {unique_str}")
+            return self._generate_unique_id(ip, port)
+
+
+class AsyncGameServer:
+    """Single process alternative to GameServer.
+
+    The network server and the game tick share one asyncio event loop, so
+    player data and snapshots are handed over by reference instead of
+    crossing process boundaries. Must be created and used inside a running
+    event loop.
+    """
+
+    def __init__(
+        self,
+        server_ip,
+        server_port,
+        request_handler: Callable,
+        ticks_per_second: float = 50,
+    ):
+        # NOTE - ticks_per_second is kept for parity with GameServer, the
+        # NOTE - broadcaster here is event driven and needs no throttle
+        self._network_server = AsyncTCPServer(server_ip, server_port, request_handler)
+
+    async def start(self):
+        await self._network_server.start()
+
+    def start_lobby(self):
+        self._network_server.state = ServerState.LOBBY
+
+    def start_playing(self):
+        self._network_server.state = ServerState.PLAYING
+
+    def gather_player_data(self) -> list[tuple[str, str]]:
+        """Returns the pending (client id, data) pairs of all players"""
+        data = []
+        for connection in self._network_server.get_clients():
+            player_data = connection.read_client_data()
+            if player_data is not None:
+                data.append((connection.id, player_data))
+        return data
+
+    def send_to_client(self, client_id: str, message: str) -> bool:
+        return self._network_server.send_data(client_id, message)
+
+    def broadcast_message(self, message):
+        self._network_server.broadcast_data(message)
+
+    def broadcast_snapshot(self, frame: SnapshotFrame):
+        """Broadcasts the frame once the encoder worker turned it into JSON"""
+        self._network_server.broadcast_data(frame)
+
+    def stage_report(self) -> str:
+        return self._network_server.stage_report()
+
+    async def stop(self):
+        print(f"[{self.__class__.__name__}] Shutting down server...")
+        await self._network_server.stop()
+        print(f"[{self.__class__.__name__}] closed gracefully")
+
+    @property
+    def connected_players(self):
+        return set(client.id for client in self._network_server.get_clients())
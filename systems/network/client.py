@@ -35,6 +35,9 @@ class _TCPClient:
     async def receive_message(self, num_bytes: int = 1024):
         return await self.reader.read(num_bytes)
 
+    async def receive_exactly(self, num_bytes: int):
+        return await self.reader.readexactly(num_bytes)
+
     async def disconnect(self):
         if self.writer:
             self.writer.close()
@@ -75,6 +78,9 @@ class _NetworkClient:
     def read_response_stream(self, timeout: float = 0):
         return self._response_stream.read(timeout)
 
+    def read_all_response_stream(self) -> list[str]:
+        return self._response_stream.read_all()
+
     def write_message_stream(self, data: str, timeout: float = 0) -> bool:
         return self._message_stream.write(data, timeout)
 
@@ -144,17 +150,25 @@ class _NetworkClient:
                     prefix_length = await asyncio.wait_for(
                         self._tcp_conn.receive_message(4), None
                     )
-                    if prefix_length is not None and len(prefix_length) == 4:
+                    if prefix_length == b"":
+                        # The server closed the connection
+                        print("Connection lost")
+                        self.state = ClientState.IDLE
+                        self._response_stream.push("")
+                    elif prefix_length is not None and len(prefix_length) == 4:
                         message_length = struct.unpack("!I", prefix_length)[0]
                         server_data = await asyncio.wait_for(
                             self._tcp_conn.receive_message(message_length), None
                         )
 
+                        # Nothing is refused here, stale snapshots are
+                        # discarded by the reader, see SnapshotMailbox
                         server_data = server_data.decode()
-                        self._response_stream.write(server_data)
+                        self._response_stream.push(server_data)
                 except CONNECTION_EXCEPTION:
                     print("Connection lost")
                     self.state = ClientState.IDLE
+                    self._response_stream.push("")
 
     async def _send_data(self):
         while self.state != ClientState.EXITING:
@@ -232,6 +246,15 @@ class GameClient:
         data = self._network_client.read_response_stream(timeout)
         return data
 
+    def read_responses(self) -> list[str]:
+        """
+        Reads all pending responses from the server without blocking.
+
+        Returns:
+            list[str]: The responses, oldest first.
+        """
+        return self._network_client.read_all_response_stream()
+
     def send_message(self, data: str, timeout: float = 0) -> bool:
         """
         Sends a message to the server.
@@ -1,4 +1,5 @@
 GAME_PORT = 7777
+RELAY_PORT = 7778
 CONNECTION_EXCEPTION = (
     ConnectionResetError,
     ConnectionAbortedError,
@@ -30,3 +30,14 @@ class DataStream:
         if not self._read.poll(timeout):
             return None
         return self._read.recv()
+
+    def push(self, data) -> None:
+        """Thread and Process safe. Queues data even if unread data is pending"""
+        self._write.send(data)
+
+    def read_all(self) -> list:
+        """Thread and Process safe. Reads all pending data without blocking"""
+        data = []
+        while self._read.poll():
+            data.append(self._read.recv())
+        return data
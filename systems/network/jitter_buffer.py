@@ -0,0 +1,147 @@
+from collections import deque
+
+from schemas.entities import EntitiesMessage, EntityMessage
+
+
+class JitterBuffer:
+    """Plays server snapshots back with a small adaptive delay.
+
+    Snapshots are kept per simulation step and spaced by the server time of
+    the step, so network jitter only changes how far behind the playback is,
+    not how smooth it looks. The delay follows the step interval plus a
+    multiple of the measured arrival jitter.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 16,
+        jitter_factor: float = 2,
+        max_delay_ms: float = 1000,
+        smoothing: float = 0.1,
+    ):
+        self._snapshots: deque[EntitiesMessage] = deque(maxlen=capacity)
+        self._jitter_factor = jitter_factor
+        self._max_delay_ms = max_delay_ms
+        self._smoothing = smoothing
+
+        # Exponential moving averages of the one way transit time (which
+        # includes the clock offset), its deviation and the step interval
+        self._transit_ms = None
+        self._jitter_ms = 0
+        self._interval_ms = 0
+
+    @property
+    def delay_ms(self) -> float:
+        delay = self._interval_ms + self._jitter_factor * self._jitter_ms
+        return min(delay, self._max_delay_ms)
+
+    def push(self, snapshot: EntitiesMessage, arrival_ms: float) -> None:
+        if self._snapshots:
+            newest = self._snapshots[-1]
+            if snapshot.server_time < newest.server_time:
+                return
+            elif snapshot.tick == newest.tick:
+                # Same step, keep the newest content but not its timing
+                self._snapshots[-1] = snapshot
+                return
+            elif snapshot.tick < newest.tick:
+                # A new game started
+                self.clear()
+            else:
+                self._update_interval(snapshot.server_time - newest.server_time)
+
+        self._update_transit(arrival_ms - snapshot.server_time)
+        self._snapshots.append(snapshot)
+
+    def sample(self, now_ms: float) -> list[EntityMessage] | None:
+        """Returns the entities interpolated at the current playback time"""
+        pair = self.sample_pair(now_ms)
+        if pair is None:
+            return None
+        entities_a, entities_b, alpha = pair
+        if entities_a is entities_b:
+            return entities_b
+        return interpolate_entities(entities_a, entities_b, alpha)
+
+    def sample_pair(
+        self, now_ms: float
+    ) -> tuple[list[EntityMessage], list[EntityMessage], float] | None:
+        """The two snapshots around the current playback time and how far
+        between them it is, alpha in [0, 1]. Both are the same snapshot when
+        there is nothing to interpolate."""
+        if not self._snapshots:
+            return None
+
+        playback_time = now_ms - self._transit_ms - self.delay_ms
+
+        previous = self._snapshots[0]
+        if playback_time <= previous.server_time:
+            return previous.entities, previous.entities, 0
+        for snapshot in self._snapshots:
+            if snapshot.server_time > playback_time:
+                span = snapshot.server_time - previous.server_time
+                if span <= 0:
+                    return snapshot.entities, snapshot.entities, 0
+                alpha = (playback_time - previous.server_time) / span
+                return previous.entities, snapshot.entities, alpha
+            previous = snapshot
+
+        # Ran out of snapshots, hold the newest one instead of extrapolating
+        return previous.entities, previous.entities, 0
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+        self._transit_ms = None
+
+    def _update_transit(self, transit_ms: float) -> None:
+        if self._transit_ms is None:
+            self._transit_ms = transit_ms
+            return
+        deviation = abs(transit_ms - self._transit_ms)
+        self._jitter_ms += self._smoothing * (deviation - self._jitter_ms)
+        self._transit_ms += self._smoothing * (transit_ms - self._transit_ms)
+
+    def _update_interval(self, interval_ms: float) -> None:
+        if self._interval_ms == 0:
+            self._interval_ms = interval_ms
+        else:
+            self._interval_ms += self._smoothing * (interval_ms - self._interval_ms)
+
+
+def interpolate_entities(
+    entities_a: list[EntityMessage], entities_b: list[EntityMessage], alpha: float
+) -> list[EntityMessage]:
+    """Blends the entities of two consecutive snapshots, alpha in [0, 1]"""
+    previous_bodies = {entity.handle: entity.body for entity in entities_a}
+
+    interpolated = []
+    for entity in entities_b:
+        previous_body = previous_bodies.get(entity.handle)
+        if previous_body is None:
+            interpolated.append(entity)
+            continue
+        interpolated.append(
+            EntityMessage.model_construct(
+                body=_interpolate_body(previous_body, entity.body, alpha),
+                entity_id=entity.entity_id,
+                color=entity.color,
+                handle=entity.handle,
+            )
+        )
+    return interpolated
+
+
+def _interpolate_body(body_a, body_b, alpha: float):
+    body = []
+    last_a = len(body_a) - 1
+    for index, segment_b in enumerate(body_b):
+        # Grown segments start from the old tail
+        segment_a = body_a[min(index, last_a)]
+        dx = segment_b[0] - segment_a[0]
+        dy = segment_b[1] - segment_a[1]
+        if abs(dx) + abs(dy) == 1:
+            body.append((segment_a[0] + dx * alpha, segment_a[1] + dy * alpha))
+        else:
+            # Wrapped around the board or teleported, do not slide across it
+            body.append(segment_a if alpha < 0.5 else segment_b)
+    return body
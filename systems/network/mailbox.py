@@ -0,0 +1,45 @@
+class SnapshotMailbox:
+    """Holds only the newest decoded snapshot received from the server.
+
+    Reading never blocks. Snapshots replaced before being read are counted
+    as dropped, and reads that find no new snapshot are counted as skipped
+    frames.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._unread = False
+
+        self.received = 0
+        self.dropped = 0
+        self.skipped = 0
+
+    def put(self, snapshot) -> None:
+        if self._unread:
+            self.dropped += 1
+        self._snapshot = snapshot
+        self._unread = True
+        self.received += 1
+
+    def discard(self, count: int = 1) -> None:
+        """Counts snapshots that were never decoded because a newer one arrived"""
+        self.received += count
+        self.dropped += count
+
+    def take(self):
+        """Returns the newest unread snapshot or None if there is none"""
+        if not self._unread:
+            self.skipped += 1
+            return None
+        self._unread = False
+        return self._snapshot
+
+    def peek(self):
+        """Returns the newest snapshot, read or not"""
+        return self._snapshot
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(received={self.received}, "
+            f"dropped={self.dropped}, skipped={self.skipped})"
+        )
@@ -0,0 +1,206 @@
+import asyncio
+import multiprocessing as mp
+import struct
+import traceback as tb
+from collections import deque
+
+from constants.message_types import MessageTypes
+from systems.decoder import MessageDecoder
+from systems.network.async_client import AsyncGameClient
+from systems.network.constants import CONNECTION_EXCEPTION, GAME_PORT, RELAY_PORT
+from utils.timer import Timer
+
+
+class SpectatorRelay:
+    """Fans out one room's snapshot stream to many spectators.
+
+    The relay connects to the game server as a single subscriber, so the
+    authoritative server serializes and sends every snapshot once no matter
+    how many spectators are watching. Messages are forwarded as they came,
+    without decoding, optionally delayed. Only snapshots are thinned to the
+    fan-out rate, control messages like GameReady and lockstep input
+    bundles are all forwarded in order.
+    """
+
+    def __init__(
+        self,
+        server_ip,
+        server_port=GAME_PORT,
+        relay_ip="0.0.0.0",
+        relay_port=RELAY_PORT,
+        fanout_per_second: float = 10,
+        delay_sec: float = 0,
+        max_buffered_bytes: int = 256 * 1024,
+    ):
+        self._server_ip = server_ip
+        self._server_port = server_port
+        self.ip = relay_ip
+        self.port = relay_port
+
+        self._throttle = 1 / fanout_per_second
+        self._delay_sec = delay_sec
+        # Spectators with more than this pending are skipped until they catch up
+        self._max_buffered_bytes = max_buffered_bytes
+
+        self._decoder = MessageDecoder()
+        # Received time, whether it is a snapshot and the frame. Frames are
+        # only kept until they are due, see _pop_due_frames.
+        self._frames: deque[tuple[float, bool, bytes]] = deque()
+        # Newest due snapshot, sent on the next fan-out
+        self._snapshot: bytes | None = None
+        self._spectators: set[asyncio.StreamWriter] = set()
+        self._running = mp.Value("b", False)
+
+        self._process = None
+        self._close_timeout = 5
+
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+    def start(self):
+        self._running.value = True
+        self._process = mp.Process(target=self.asyncio_run)
+        self._process.start()
+
+    def stop(self):
+        self._running.value = False
+        print(f"[{self.__class__.__name__}] Shutting down relay...")
+        if self._process is None:
+            # Running on the caller's event loop, see run
+            return
+
+        self._process.join(timeout=self._close_timeout)
+        if self._process.exitcode is None:
+            self._process.terminate()
+            print(f"[{self.__class__.__name__}] killed")
+        else:
+            print(f"[{self.__class__.__name__}] closed gracefully")
+        self._process = None
+
+    def asyncio_run(self):
+        """Process main loop"""
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            pass
+        except Exception:
+            print("\nAsyncio relay exception not handled:")
+            tb.print_exc()
+
+    async def run(self):
+        """Runs the relay on the current event loop until stopped"""
+        self._running.value = True
+        server = await asyncio.start_server(self._handle_spectator, self.ip, self.port)
+        addr = server.sockets[0].getsockname()
+        print(f"Relaying on {addr}")
+
+        upstream_task = asyncio.create_task(self._upstream())
+        try:
+            while self._running.value:
+                timer = Timer()
+                self._fan_out()
+                await asyncio.sleep(max(0, self._throttle - timer.elapsed_sec()))
+        finally:
+            upstream_task.cancel()
+            server.close()
+            for spectator in list(self._spectators):
+                spectator.close()
+            await server.wait_closed()
+
+    @property
+    def spectator_count(self):
+        return len(self._spectators)
+
+    async def _upstream(self):
+        """Keeps the newest frames of the room, reconnecting if needed"""
+        upstream = AsyncGameClient(self._server_ip, self._server_port)
+        loop = asyncio.get_running_loop()
+        while True:
+            if not upstream.is_running() and not await upstream.connect():
+                await asyncio.sleep(1)
+                continue
+
+            message = await upstream.recv()
+            if not message:
+                continue
+            is_snapshot = (
+                self._decoder.peek_type(message) == MessageTypes.ENTITIES.value
+            )
+            data = message.encode()
+            self._frames.append(
+                (loop.time(), is_snapshot, struct.pack("!I", len(data)) + data)
+            )
+            if not is_snapshot:
+                # Control messages do not wait for the next fan-out
+                self._forward_controls()
+
+    def _fan_out(self):
+        self._forward_controls()
+        frame, self._snapshot = self._snapshot, None
+        if frame is None:
+            return
+
+        for spectator in list(self._spectators):
+            transport = spectator.transport
+            if transport.is_closing():
+                self._spectators.discard(spectator)
+            elif transport.get_write_buffer_size() > self._max_buffered_bytes:
+                self.frames_skipped += 1
+            else:
+                spectator.write(frame)
+                self.frames_sent += 1
+
+    def _forward_controls(self):
+        """Sends the due control messages to every spectator, slow ones too"""
+        controls = self._pop_due_frames(asyncio.get_running_loop().time())
+        for spectator in list(self._spectators):
+            if spectator.transport.is_closing():
+                self._spectators.discard(spectator)
+                continue
+            for frame in controls:
+                spectator.write(frame)
+            self.frames_sent += len(controls)
+
+    def _pop_due_frames(self, now: float) -> list[bytes]:
+        """Control frames older than the delay, in order.
+
+        The newest snapshot among them is kept for the next fan-out and the
+        snapshots before it are dropped, so the frames held are never older
+        than the delay.
+        """
+        controls = []
+        while self._frames and self._frames[0][0] <= now - self._delay_sec:
+            _, is_snapshot, frame = self._frames.popleft()
+            if is_snapshot:
+                self._snapshot = frame
+            else:
+                controls.append(frame)
+        return controls
+
+    async def _handle_spectator(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        self._spectators.add(writer)
+        try:
+            # Spectators never send anything, this only waits for them to leave
+            while await reader.read(1024):
+                pass
+        except CONNECTION_EXCEPTION:
+            pass
+        finally:
+            self._spectators.discard(writer)
+            writer.close()
+
+
+def main():
+    import sys
+
+    fanout_per_second = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    delay_sec = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    SpectatorRelay(
+        "127.0.0.1", fanout_per_second=fanout_per_second, delay_sec=delay_sec
+    ).asyncio_run()
+
+
+if __name__ == "__main__":
+    main()
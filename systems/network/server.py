@@ -11,6 +11,8 @@ from typing import Callable
 
 from systems.network.constants import CONNECTION_EXCEPTION
 from systems.network.data_stream import DataStream
+from systems.network.snapshot_encoder import SnapshotEncoder, SnapshotFrame
+from systems.tick_scheduler import SystemTiming
 from utils.timer import Timer  # , print_async_func_time, print_func_time
 
 
@@ -54,7 +56,7 @@ class AwaitableQueue:
         self._queue.put(item, timeout=timeout)
 
 
-class ClientConnection:
+class NetworkConnection:
     def __init__(
         self,
         client_id: str,
@@ -68,9 +70,6 @@ class ClientConnection:
 
         self.id = client_id
 
-        self.response_pipe = DataStream()
-        self.client_data_pipe = DataStream()
-
     async def disconnect(self):
         async with self._network_lock:
             self._network_writer.close()
@@ -92,19 +91,11 @@ class ClientConnection:
         else:
             return None
 
-    async def read_server_response(self, timeout=0):
-        return await self._network_loop.run_in_executor(
-            None, self.response_pipe.read, timeout
-        )
-
-    def write_client_data(self, data):
-        self.client_data_pipe.write(data)
-
     def __hash__(self):
         return hash(self.id)
 
     def __eq__(self, other):
-        if isinstance(other, ClientConnection):
+        if isinstance(other, NetworkConnection):
             return self.id == other.id
         return False
 
@@ -112,10 +103,32 @@ class ClientConnection:
         return self.id
 
 
+class ClientConnection(NetworkConnection):
+    def __init__(
+        self,
+        client_id: str,
+        network_writer: asyncio.StreamWriter,
+        network_reader: asyncio.StreamReader,
+    ):
+        super().__init__(client_id, network_writer, network_reader)
+
+        self.response_pipe = DataStream()
+        self.client_data_pipe = DataStream()
+
+    async def read_server_response(self, timeout=0):
+        return await self._network_loop.run_in_executor(
+            None, self.response_pipe.read, timeout
+        )
+
+    def write_client_data(self, data):
+        self.client_data_pipe.write(data)
+
+
 class MPClientConnection:
     def __init__(self, client_connection: ClientConnection):
         self.id = client_connection.id
         self.client_data_pipe = client_connection.client_data_pipe
+        self.response_pipe = client_connection.response_pipe
 
     def __eq__(self, other):
         if isinstance(other, MPClientConnection):
@@ -131,14 +144,27 @@ class ClientList:
         self._manager = mp.Manager()
         self._shared = self._manager.list()
         self._private: list[ClientConnection] = []
+        # Bumped on every change so other processes can skip re-reading the
+        # shared list when nothing changed
+        self._version = mp.Value("i", 0)
 
     def append(self, client: ClientConnection):
         self._private.append(client)
         self._shared.append(MPClientConnection(client))
+        self._bump_version()
 
     def remove(self, client: ClientConnection):
         self._private.remove(client)
         self._shared.remove(MPClientConnection(client))
+        self._bump_version()
+
+    @property
+    def version(self):
+        return self._version.value
+
+    def _bump_version(self):
+        with self._version.get_lock():
+            self._version.value += 1
 
     def public_get(self):
         return list(self._shared)
@@ -153,12 +179,23 @@ class ClientList:
         return iter(self._private)
 
 
+# Stages of a snapshot timed in the network process, see TCPServer
+_STAGES = ("encode", "send")
+
+
 class TCPServer:
     def __init__(self, host_ip, host_port, ticks_per_second: int = 50):
         self._request_queue = AwaitableQueue(maxsize=10)
         self._broadcast_queue = AwaitableQueue(maxsize=1)
         self._internal_state = mp.Value("i", ServerState.IDLE.value)
 
+        # Snapshot frames from the game process are encoded here, in the
+        # network process. The runs, total and worst ms of each stage are
+        # shared back for the report.
+        self._encoder = SnapshotEncoder()
+        self._send_timing = SystemTiming()
+        self._stage_stats = mp.Array("d", 3 * len(_STAGES))
+
         self._clients = ClientList()
 
         self.ip = host_ip
@@ -168,7 +205,7 @@ class TCPServer:
 
         self._loop = None
 
-    def broadcast_data(self, data: str, timeout: float = None):
+    def broadcast_data(self, data: str | SnapshotFrame, timeout: float = None):
         self._broadcast_queue.put(data, timeout=timeout)
 
     def read_request(self, timeout=None) -> tuple[str, DataStream, str]:
@@ -180,6 +217,28 @@ class TCPServer:
     def get_clients(self) -> list[MPClientConnection]:
         return self._clients.public_get()
 
+    def get_clients_version(self) -> int:
+        return self._clients.version
+
+    def stage_report(self) -> str:
+        """Time spent on snapshots after the game loop handed them over"""
+        lines = []
+        with self._stage_stats.get_lock():
+            stats = list(self._stage_stats)
+        for index, name in enumerate(_STAGES):
+            timing = SystemTiming()
+            runs, timing.total_ms, timing.worst_ms = stats[3 * index : 3 * index + 3]
+            timing.runs = int(runs)
+            lines.append(timing.summary(name))
+        return "\n".join(lines)
+
+    def _share_stage_stats(self) -> None:
+        stats = []
+        for timing in (self._encoder.timing, self._send_timing):
+            stats += [timing.runs, timing.total_ms, timing.worst_ms]
+        with self._stage_stats.get_lock():
+            self._stage_stats[:] = stats
+
     def asyncio_run(self):
         """Process main loop"""
         self._loop = asyncio.get_event_loop()
@@ -276,13 +335,20 @@ class TCPServer:
         """This asyncio task runs along the server"""
         while self.state != ServerState.EXITING:
             message = await self._broadcast_queue.async_get(timeout=1)
-            if message is not None:
-                try:
-                    await asyncio.gather(
-                        *[client.network_send(message) for client in self._clients]
-                    )
-                except CONNECTION_EXCEPTION:
-                    break
+            if message is None:
+                continue
+            if isinstance(message, SnapshotFrame):
+                message = self._encoder.encode_frame(message)
+
+            start = time.perf_counter()
+            try:
+                await asyncio.gather(
+                    *[client.network_send(message) for client in self._clients]
+                )
+            except CONNECTION_EXCEPTION:
+                break
+            self._send_timing.record((time.perf_counter() - start) * 1000)
+            self._share_stage_stats()
 
     def _generate_unique_id(self, ip, port):
         unique_str = f"{ip}:{port}"
@@ -308,6 +374,9 @@ class GameServer:
         self._responder_thread = None
         self._req_handler = request_handler
 
+        self._players: list[MPClientConnection] = []
+        self._players_version = None
+
         self._close_timeout = 5
 
     def start(self):
@@ -321,25 +390,46 @@ class GameServer:
         self._network_server.state = ServerState.LOBBY
 
     def start_playing(self):
-        self.player_pipes = [
-            client.client_data_pipe for client in self._network_server.get_clients()
-        ]
+        self._refresh_players()
         self._network_server.state = ServerState.PLAYING
 
-    def gather_player_data(self):
+    def gather_player_data(self) -> list[tuple[str, str]]:
+        """Returns the pending (client id, data) pairs of all players"""
+        if self._players_version != self._network_server.get_clients_version():
+            # Someone connected or left, e.g. a player resuming its session
+            self._refresh_players()
+
         data = []
-        for pipe in self.player_pipes:
-            player_data = pipe.read()
+        for player in self._players:
+            player_data = player.client_data_pipe.read()
             if player_data is not None:
-                data.append(player_data)
+                data.append((player.id, player_data))
         return data
 
+    def send_to_client(self, client_id: str, message: str) -> bool:
+        for player in self._players:
+            if player.id == client_id:
+                player.response_pipe.push(message)
+                return True
+        return False
+
+    def _refresh_players(self):
+        self._players_version = self._network_server.get_clients_version()
+        self._players = self._network_server.get_clients()
+
     def broadcast_message(self, message):
         try:
             self._network_server.broadcast_data(message, timeout=10)
         except q.Full:
             print(f"[{self.__class__.__name__}] Broadcast queue full!")
 
+    def broadcast_snapshot(self, frame: SnapshotFrame):
+        """Sends the frame to the network process, which encodes it"""
+        self.broadcast_message(frame)
+
+    def stage_report(self) -> str:
+        return self._network_server.stage_report()
+
     def stop(self):
         self._network_server.state = ServerState.EXITING
         print(f"[{self.__class__.__name__}] Shutting down server...")
@@ -2,23 +2,56 @@ import time
 
 from pydantic import BaseModel
 
+from constants.message_types import MessageTypes
 from schemas.entities import EntitiesMessage, EntityMessage
-from schemas.game import GameReady, PlayerCommand
-from schemas.lobby import JoinLobbyRequest, LobbyInfoRequest, LobbyInfoResponse
+from schemas.game import (
+    GameReady,
+    InputBundle,
+    PlayerCommand,
+    ResumeSessionRequest,
+    ResumeSessionResponse,
+)
+from schemas.lobby import (
+    JoinLobbyRequest,
+    JoinLobbyResponse,
+    LobbyInfoRequest,
+    LobbyInfoResponse,
+)
 from schemas.response import ServerResponse
 from systems.decoder import MessageDecoder
+from systems.network.async_client import AsyncGameClient
 from systems.network.client import GameClient
 from systems.network.constants import GAME_PORT
+from systems.network.mailbox import SnapshotMailbox
 from utils.timer import Timer  # , print_async_func_time, print_func_time
 
 
 class SnakeClient:
-    def __init__(self, game, connection_timeout_sec: float = 5):
-        self._client = None
+    def __init__(
+        self, game, connection_timeout_sec: float = 5, in_process: bool = False
+    ):
+        # In process mode the client runs on the caller's event loop, use the
+        # async_* methods instead of their blocking counterparts
+        self._client: GameClient | AsyncGameClient = None
+        self._in_process = in_process
         self._conn_timeout = connection_timeout_sec
         self._get_game_state = lambda: game.state
         self._decoder = MessageDecoder()
 
+        self.snapshots = SnapshotMailbox()
+        self._last_tick = -1
+
+        # Start message of the current game, holds the seed in lockstep rooms
+        self.game_ready: GameReady = None
+        # (tick, hash) of the newest lockstep step hashed by the server
+        self.server_state_hash: tuple[int, int] = None
+
+        # Set on join, used to resume the session if the connection drops
+        self.session_token = None
+        self.connection_lost = False
+        # Lockstep steps missed while disconnected
+        self._resumed_bundle: InputBundle = None
+
     # @print_func_time
     def _get_server_message(self, timeout: float = 0) -> ServerResponse:
         # NOTE - This is the only method to get data from the server
@@ -32,10 +65,23 @@ class SnakeClient:
             print("Server disconnected")
             self.disconnect_from_server()
             return None
-        elif server_message is None:
-            return None
+        return self._decode_server_message(server_message)
+
+    async def _async_get_server_message(self, timeout: float = 0) -> ServerResponse:
+        if timeout:
+            server_message = await self._client.recv(timeout)
         else:
-            return self._decoder.decode_message(server_message)
+            server_message = self._client.read_response()
+        if server_message == "":
+            print("Server disconnected")
+            await self.async_disconnect_from_server()
+            return None
+        return self._decode_server_message(server_message)
+
+    def _decode_server_message(self, server_message: str) -> ServerResponse:
+        if server_message is None:
+            return None
+        return self._decoder.decode_message(server_message)
 
     def _send_client_message(self, message: BaseModel, timeout: float = 0) -> None:
         # NOTE - This is the only method to send data to the server
@@ -43,14 +89,28 @@ class SnakeClient:
         #    1. Data sent
         #    2. Error raised
 
-        self._client.send_message(message.model_dump_json(), timeout)
+        if self._in_process:
+            self._client.send_message(message.model_dump_json())
+        else:
+            self._client.send_message(message.model_dump_json(), timeout)
 
     def _request(
         self, request: BaseModel, response_schema: ServerResponse, timeout: float = 0
     ) -> ServerResponse:
         self._send_client_message(request)
         response = self._get_server_message(timeout)
+        return self._check_response(response, response_schema)
 
+    async def _async_request(
+        self, request: BaseModel, response_schema: ServerResponse, timeout: float = 0
+    ) -> ServerResponse:
+        self._send_client_message(request)
+        response = await self._async_get_server_message(timeout)
+        return self._check_response(response, response_schema)
+
+    def _check_response(
+        self, response: BaseModel, response_schema: ServerResponse
+    ) -> ServerResponse:
         if response is not None:
             if not isinstance(response, response_schema):
                 print(f"Unexpected server message: {response}")
@@ -79,13 +139,33 @@ class SnakeClient:
         else:
             return False
 
+    def is_connected(self) -> bool:
+        return self._client is not None and self._client.is_running()
+
+    async def async_disconnect_from_server(self) -> None:
+        if self._client:
+            await self._client.disconnect()
+
+    async def async_connect_to_server(self, server_ip, server_port) -> bool:
+        self._client = AsyncGameClient(server_ip, server_port)
+        return await self._client.connect(self._conn_timeout)
+
     def try_lobby_join(self, player_name: str) -> bool:
         join_request = JoinLobbyRequest(player_name=player_name)
         response = self._request(join_request, ServerResponse, timeout=1)
+        return self._check_lobby_join(response)
 
+    async def async_try_lobby_join(self, player_name: str) -> bool:
+        join_request = JoinLobbyRequest(player_name=player_name)
+        response = await self._async_request(join_request, ServerResponse, timeout=1)
+        return self._check_lobby_join(response)
+
+    def _check_lobby_join(self, response: ServerResponse) -> bool:
         if response is None:
             return False
         elif response.status == 0:
+            if isinstance(response, JoinLobbyResponse):
+                self.session_token = response.session_token
             return True
         else:
             print("Error joining lobby: ", response.message)
@@ -105,6 +185,13 @@ class SnakeClient:
         )
         return lobby_message
 
+    async def async_get_lobby_info(self):
+        lobby_info_req = LobbyInfoRequest()
+        lobby_message: LobbyInfoResponse = await self._async_request(
+            lobby_info_req, LobbyInfoResponse, timeout=2
+        )
+        return lobby_message
+
     def choose_color(self, color: str) -> bool:
         # NOTE - Test in server if the color is available
         pass
@@ -114,17 +201,191 @@ class SnakeClient:
 
     def wait_game_start(self) -> bool:
         server_message = self._get_server_message(timeout=2)
+        return self._check_game_ready(server_message)
+
+    async def async_wait_game_start(self) -> bool:
+        server_message = await self._async_get_server_message(timeout=2)
+        return self._check_game_ready(server_message)
+
+    def _check_game_ready(self, server_message: ServerResponse) -> bool:
         if isinstance(server_message, GameReady):
+            self.game_ready = server_message
+            self._last_tick = 0 if server_message.lockstep_seed is not None else -1
             return True
         return False
 
     # Play loop
     def get_server_update(self) -> list[EntityMessage]:
-        server_message = self._get_server_message(timeout=0.1)
+        """Returns the newest unread entities without blocking, if any"""
+        snapshot = self.get_server_snapshot()
+        return snapshot.entities if snapshot is not None else None
+
+    def get_server_snapshot(self) -> EntitiesMessage:
+        """
+        Returns the newest unread snapshot without blocking, if any.
+
+        Sets connection_lost if the server went away, see resume_session.
+        """
+        if not self._receive_snapshots():
+            self.connection_lost = True
+        return self.snapshots.take()
+
+    def resume_session(self, timeout_sec: float = 1) -> bool:
+        """Reconnects with the same client and reattaches to the player's snake"""
+        if self._client is None or self.session_token is None:
+            return False
+        if not self._client.is_running() and not self._client.connect(timeout_sec):
+            return False
+
+        self._send_client_message(self._resume_request())
+        timer = Timer()
+        while (remaining := timeout_sec - timer.elapsed_sec()) > 0:
+            resumed = self._check_resume(self._client.read_response(remaining))
+            if resumed is not None:
+                return resumed
+        return False
+
+    async def async_resume_session(self, timeout_sec: float = 1) -> bool:
+        if self._client is None or self.session_token is None:
+            return False
+        if not self._client.is_running() and not await self._client.connect(
+            timeout_sec
+        ):
+            return False
+
+        self._send_client_message(self._resume_request())
+        timer = Timer()
+        while (remaining := timeout_sec - timer.elapsed_sec()) > 0:
+            resumed = self._check_resume(await self._client.recv(remaining))
+            if resumed is not None:
+                return resumed
+        return False
+
+    def _resume_request(self) -> ResumeSessionRequest:
+        return ResumeSessionRequest(
+            session_token=self.session_token, last_tick=self._last_tick
+        )
+
+    def _check_resume(self, server_message: str) -> bool | None:
+        """True if resumed, False if it failed and None to keep waiting"""
+        if server_message == "":
+            return False
+        server_message = self._decode_server_message(server_message)
         if isinstance(server_message, EntitiesMessage):
-            return server_message.entities
+            # Broadcasts can arrive before the response
+            self._put_snapshot(server_message)
+        elif isinstance(server_message, ResumeSessionResponse):
+            return self._apply_resume(server_message)
         return None
 
+    def _apply_resume(self, response: ResumeSessionResponse) -> bool:
+        if response.status != 0:
+            print("Error resuming session: ", response.message)
+            return False
+        if response.keyframes:
+            self._put_snapshot(response.keyframes[-1])
+        if response.input_bundle is not None:
+            # Played before the next bundle, see get_input_steps
+            self._resumed_bundle = response.input_bundle
+        self.connection_lost = False
+        return True
+
+    def _put_snapshot(self, snapshot: EntitiesMessage) -> None:
+        self.snapshots.put(snapshot)
+        self._last_tick = snapshot.tick
+
+    def get_input_steps(self) -> list[tuple[int, list[PlayerCommand]]]:
+        """
+        Returns the unread lockstep steps as (tick, commands), oldest first,
+        without blocking.
+
+        Sets connection_lost if the server went away, see resume_session.
+        """
+        server_messages, connected = self._read_server_messages()
+        if not connected:
+            self.connection_lost = True
+
+        steps = []
+        if self._resumed_bundle is not None:
+            steps = self._bundle_steps(self._resumed_bundle)
+            self._resumed_bundle = None
+
+        # Bundles repeat the previous steps, the newest one holds all we need
+        for server_message in reversed(server_messages):
+            bundle = self._decode_server_message(server_message)
+            if isinstance(bundle, InputBundle):
+                steps += self._bundle_steps(bundle)
+                if bundle.state_hash is not None:
+                    last_tick = bundle.first_tick + len(bundle.steps) - 1
+                    self.server_state_hash = (last_tick, bundle.state_hash)
+                break
+        return steps
+
+    def _bundle_steps(self, bundle: InputBundle) -> list[tuple[int, list]]:
+        """Steps of the bundle newer than the last one read"""
+        steps = [
+            (
+                bundle.first_tick + index,
+                [
+                    PlayerCommand(player_name=player_name, command=command)
+                    for player_name, command in commands.items()
+                ],
+            )
+            for index, commands in enumerate(bundle.steps)
+            if bundle.first_tick + index > self._last_tick
+        ]
+        if steps:
+            self._last_tick = steps[-1][0]
+        return steps
+
+    def _read_server_messages(self) -> tuple[list[str], bool]:
+        """Pending server messages and False if the server left"""
+        server_messages = self._client.read_responses()
+        connected = "" not in server_messages
+        if not connected:
+            print("Server disconnected")
+            server_messages = server_messages[: server_messages.index("")]
+        return server_messages, connected
+
+    def _receive_snapshots(self) -> bool:
+        """Moves pending snapshots to the mailbox, False if the server left"""
+        server_messages, connected = self._read_server_messages()
+
+        # Only the newest snapshot is decoded, the older ones are dropped
+        # unread. Other messages are handled in the order they came.
+        message_types = [
+            self._decoder.peek_type(server_message)
+            for server_message in server_messages
+        ]
+        entities_type = MessageTypes.ENTITIES.value
+        newest = max(
+            (
+                index
+                for index, message_type in enumerate(message_types)
+                if message_type == entities_type
+            ),
+            default=None,
+        )
+        for index, server_message in enumerate(server_messages):
+            if message_types[index] == entities_type and index != newest:
+                self.snapshots.discard()
+            else:
+                self._handle_server_message(
+                    self._decode_server_message(server_message)
+                )
+        return connected
+
+    def _handle_server_message(self, server_message: ServerResponse) -> None:
+        """Applies a message that arrived while playing"""
+        if isinstance(server_message, EntitiesMessage):
+            self._put_snapshot(server_message)
+        elif isinstance(server_message, GameReady):
+            self._check_game_ready(server_message)
+        elif isinstance(server_message, ResumeSessionResponse):
+            self._apply_resume(server_message)
+        else:
+            print(f"Unexpected server message: {server_message}")
+
     def send_player_command(self, player_name, command: dict) -> None:
         self._send_client_message(
             PlayerCommand(player_name=player_name, command=command)
@@ -1,19 +1,63 @@
+import secrets
 import time
+from collections import deque
 
-from entities.type import Food, Snake
-from schemas.entities import EntitiesMessage, EntityMessage
-from schemas.game import GameReady, PlayerCommand
-from schemas.lobby import JoinLobbyRequest, LobbyInfoRequest, LobbyInfoResponse
+from schemas.game import (
+    GameReady,
+    InputBundle,
+    PlayerCommand,
+    ResumeSessionRequest,
+    ResumeSessionResponse,
+)
+from schemas.lobby import (
+    JoinLobbyRequest,
+    JoinLobbyResponse,
+    LobbyInfoRequest,
+    LobbyInfoResponse,
+)
 from schemas.response import ServerResponse
 from systems.decoder import MessageDecoder
+from systems.network.async_server import AsyncGameServer
 from systems.network.constants import GAME_PORT
 from systems.network.server import GameServer
+from systems.network.snapshot_encoder import SnapshotCapture
+from systems.network.snapshot_history import SnapshotHistory
 from utils.timer import Timer  # , print_async_func_time, print_func_time
 
 
+# Lockstep steps repeated in every input bundle
+INPUT_REDUNDANCY = 8
+# Lockstep steps kept to catch up resumed sessions, 10 s at 60 Hz
+INPUT_HISTORY = 600
+# Sessions of players disconnected for longer can not be resumed
+SESSION_TIMEOUT_SEC = 30
+# Sessions are checked at most this often, see expire_sessions
+SESSION_CHECK_SEC = 1
+
+
+class _Session:
+    """A joined player, the connection it plays from and when it was seen"""
+
+    __slots__ = ("player_name", "client_id", "last_seen")
+
+    def __init__(self, player_name: str, client_id):
+        self.player_name = player_name
+        self.client_id = client_id
+        self.last_seen = time.monotonic()
+
+
 class SnakeServer:
-    def __init__(self, server_ip, server_port, ticks_per_second: float = 50):
-        self._server = GameServer(
+    def __init__(
+        self,
+        server_ip,
+        server_port,
+        ticks_per_second: float = 50,
+        in_process: bool = False,
+    ):
+        # In process mode the network server shares the caller's event loop,
+        # use async_start/async_stop instead of start/stop
+        server_class = AsyncGameServer if in_process else GameServer
+        self._server = server_class(
             server_ip, server_port, self.request_responder, ticks_per_second
         )
 
@@ -21,14 +65,40 @@ class SnakeServer:
 
         self._joined_players = set()
         self._player_names = {}
+        self._sessions: dict[str, _Session] = {}  # Session token -> session
+        self._sessions_checked_at = 0
+
+        # The game loop only captures frames of the entities, the network
+        # server encodes them, see SnapshotEncoder. Recent frames are kept to
+        # catch up resumed sessions.
+        self._capture = SnapshotCapture()
+        self._history = SnapshotHistory()
+        # Commands of the latest lockstep steps, resent with every new step,
+        # and of the steps resumed lockstep sessions may have missed
+        self._input_steps: deque[dict[str, dict]] = deque(maxlen=INPUT_REDUNDANCY)
+        self._input_history: deque[dict[str, dict]] = deque(maxlen=INPUT_HISTORY)
+        self._input_tick = 0
 
     def start(self):
         self._server.start()
         self._server.start_lobby()
 
-    def start_playing(self):
+    async def async_start(self):
+        await self._server.start()
+        self._server.start_lobby()
+
+    async def async_stop(self):
+        await self._server.stop()
+
+    def start_playing(self, game_ready: GameReady = None):
+        """Starts the game, pass a GameReady with a seed to run it in lockstep"""
+        self._capture.clear()
+        self._history.clear()
+        self._input_steps.clear()
+        self._input_history.clear()
+        self._input_tick = 0
         self._server.start_playing()
-        self._server.broadcast_message(GameReady().model_dump_json())
+        self._server.broadcast_message((game_ready or GameReady()).model_dump_json())
 
     def stop(self):
         self._server.stop()
@@ -53,9 +123,15 @@ class SnakeServer:
         print(f"Got {player_message.__class__.__name__} from {client_id}")
         if isinstance(player_message, JoinLobbyRequest):
             print("Player joining lobby:", client_id)
-            message = ServerResponse(status=0, message="Joined lobby").model_dump_json()
+            session_token = secrets.token_hex(8)
+            message = JoinLobbyResponse(
+                status=0, message="Joined lobby", session_token=session_token
+            ).model_dump_json()
             self._joined_players.add(client_id)
             self._player_names[client_id] = player_message.player_name
+            self._sessions[session_token] = _Session(
+                player_message.player_name, client_id
+            )
             return message
         elif isinstance(player_message, LobbyInfoRequest):
             print("Sending lobby info to", client_id)
@@ -90,37 +166,97 @@ class SnakeServer:
 
     def get_players_updates(self):
         player_updates: list[PlayerCommand] = []
-        for data in self._server.gather_player_data():
+        for client_id, data in self._server.gather_player_data():
             player_message = self._decoder.decode_message(data)
             if isinstance(player_message, PlayerCommand):
                 player_updates.append(player_message)
+            elif isinstance(player_message, ResumeSessionRequest):
+                self._resume_session(client_id, player_message)
         return player_updates
 
-    def send_game_state(self, entities):
-        game_state_message = self._serialize_entities(entities)
-        self._server.broadcast_message(game_state_message)
-
-    def _serialize_entities(self, entities):
-        _server_entities = []
-
-        for entity in entities:
-            if isinstance(entity, Food):
-                _server_entities.append(
-                    EntityMessage(
-                        entity_id="food",
-                        body=entity.body_component.segments,
-                        color=entity.color,
-                    )
-                )
-            elif isinstance(entity, Snake):
-                _server_entities.append(
-                    EntityMessage(
-                        entity_id="snake",
-                        body=entity.body_component.segments,
-                        color=entity.color,
-                    )
-                )
-        return EntitiesMessage(entities=_server_entities).model_dump_json()
+    def send_game_state(
+        self, entities, tick: int = 0, server_time: float = 0, state_hash=None
+    ):
+        """Hands a frame of the entities over, the server encodes it off the loop"""
+        frame = self._capture.capture(entities, tick, server_time, state_hash)
+        self._history.record(frame)
+        self._server.broadcast_snapshot(frame)
+
+    def stage_report(self) -> str:
+        """Encode and send timings of the snapshots handed to the server"""
+        return self._server.stage_report()
+
+    def send_input_step(
+        self, tick: int, commands: list[PlayerCommand], state_hash=None
+    ):
+        """Broadcasts the commands of a lockstep step instead of the game state"""
+        step = {command.player_name: command.command for command in commands}
+        self._input_steps.append(step)
+        self._input_history.append(step)
+        self._input_tick = tick
+        bundle = InputBundle(
+            first_tick=tick - len(self._input_steps) + 1,
+            steps=list(self._input_steps),
+            state_hash=state_hash,
+        )
+        self._server.broadcast_message(bundle.model_dump_json())
+
+    def expire_sessions(self, player_names=None):
+        """Drops the sessions of players without a snake among player_names,
+        when given, and of players disconnected for SESSION_TIMEOUT_SEC"""
+        now = time.monotonic()
+        if now - self._sessions_checked_at < SESSION_CHECK_SEC:
+            return
+        self._sessions_checked_at = now
+
+        connected = self.connected_players
+        for session_token, session in list(self._sessions.items()):
+            if session.client_id in connected:
+                session.last_seen = now
+            dead = player_names is not None and session.player_name not in player_names
+            if dead or now - session.last_seen > SESSION_TIMEOUT_SEC:
+                print(f"Session of player {session.player_name} expired")
+                del self._sessions[session_token]
+
+    def _resume_session(self, client_id, request: ResumeSessionRequest):
+        # Reattaches a new connection to the player's snake and catches it up
+        # in the same round trip
+        session = self._sessions.get(request.session_token)
+        # Lockstep rooms send no keyframes, the missed steps are sent instead
+        lockstep = bool(self._input_history)
+        input_bundle = self._missed_input_steps(request.last_tick) if lockstep else None
+        if session is None:
+            response = ResumeSessionResponse(status=1, message="Unknown session")
+        elif lockstep and input_bundle is None:
+            response = ResumeSessionResponse(
+                status=1, message="Missed more lockstep steps than the server keeps"
+            )
+        else:
+            player_name = session.player_name
+            print(f"Player {player_name} resumed its session as {client_id}")
+            # The old connection must not be listed as another player
+            self._joined_players.discard(session.client_id)
+            self._player_names.pop(session.client_id, None)
+            session.client_id = client_id
+            session.last_seen = time.monotonic()
+            self._joined_players.add(client_id)
+            self._player_names[client_id] = player_name
+            response = ResumeSessionResponse(
+                status=0,
+                message="Session resumed",
+                player_name=player_name,
+                keyframes=[] if lockstep else self._history.since(request.last_tick),
+                input_bundle=input_bundle,
+            )
+        self._server.send_to_client(client_id, response.model_dump_json())
+
+    def _missed_input_steps(self, last_tick: int) -> InputBundle | None:
+        """Lockstep steps after last_tick, None if some are no longer kept"""
+        first_tick = self._input_tick - len(self._input_history) + 1
+        if last_tick + 1 < first_tick:
+            return None
+        steps = list(self._input_history)[last_tick + 1 - first_tick :]
+        return InputBundle(first_tick=last_tick + 1, steps=steps)
 
 
 def main():
@@ -0,0 +1,181 @@
+import time
+from typing import NamedTuple
+
+from pydantic_core import to_json
+
+from entities.base import Entity
+from entities.type import Food, Snake
+from schemas.entities import EntitiesMessage, EntityMessage
+from systems.tick_scheduler import SystemTiming
+
+# Placeholder the entity fragments are spliced into
+_EMPTY_ENTITIES = '"entities":[]'
+
+
+class EntityRow(NamedTuple):
+    # Unique per captured entity, ids of dead entities may be reused
+    serial: int
+    version: int
+    entity_id: str
+    body: tuple[tuple[int, int], ...]
+    color: tuple[int, int, int]
+    handle: int | None
+
+
+class SnapshotFrame(NamedTuple):
+    """Immutable copy of the entities, to be encoded anywhere and any time"""
+
+    tick: int
+    server_time: float
+    state_hash: int | None
+    entities: tuple[EntityRow, ...]
+
+    def to_message(self) -> EntitiesMessage:
+        return EntitiesMessage(
+            entities=[
+                EntityMessage(
+                    body=row.body,
+                    entity_id=row.entity_id,
+                    color=row.color,
+                    handle=row.handle,
+                )
+                for row in self.entities
+            ],
+            tick=self.tick,
+            server_time=self.server_time,
+            state_hash=self.state_hash,
+        )
+
+
+class SnapshotCapture:
+    """Takes SnapshotFrames of the entities on the game loop.
+
+    A body is copied into a tuple only when its version changed since the
+    last frame, the bodies that did not move share the tuple of the last
+    frame. A frame costs what moved plus a row per entity, encoding it is
+    left to a SnapshotEncoder that may live in another thread or process.
+
+    Entities are kept by reference so their ids stay unique while tracked.
+    """
+
+    def __init__(self):
+        # id(entity) -> (entity, its row in the last frame)
+        self._rows: dict[int, tuple[Entity, EntityRow]] = {}
+        self._next_serial = 0
+
+    def capture(
+        self, entities, tick: int = 0, server_time: float = 0, state_hash=None
+    ) -> SnapshotFrame:
+        rows = {}
+        for entity in entities:
+            if isinstance(entity, Food):
+                entity_id = "food"
+            elif isinstance(entity, Snake):
+                entity_id = "snake"
+            else:
+                continue
+
+            version = entity.body_component.version
+            tracked = self._rows.get(id(entity))
+            if tracked is None:
+                row = None
+                serial = self._next_serial
+                self._next_serial += 1
+            else:
+                row = tracked[1]
+                serial = row.serial
+
+            if row is None or row.version != version:
+                row = EntityRow(
+                    serial,
+                    version,
+                    entity_id,
+                    tuple(entity.body_component.segments),
+                    entity.color,
+                    entity.handle,
+                )
+            elif row.color != entity.color or row.handle != entity.handle:
+                row = row._replace(color=entity.color, handle=entity.handle)
+            rows[id(entity)] = (entity, row)
+        # Entities that are gone are dropped with the old rows
+        self._rows = rows
+
+        return SnapshotFrame(
+            tick, server_time, state_hash, tuple(row for _, row in rows.values())
+        )
+
+    def clear(self) -> None:
+        self._rows.clear()
+
+
+class SnapshotEncoder:
+    """Encodes EntitiesMessage JSON from per entity fragments.
+
+    The JSON of each entity is cached along with the version of its body and
+    the other fields it was made from. An entity is only dumped again once
+    one of them changed, the snapshot is the cached fragments joined into an
+    otherwise empty EntitiesMessage. The cost of a snapshot follows what
+    moved since the last one, not the size of the room.
+
+    Frames are encoded the same wherever they were captured, so the encoder
+    can run off the game loop. The time spent encoding is kept in timing.
+    """
+
+    def __init__(self):
+        # Entity serial -> ((version, color, handle), fragment)
+        self._fragments: dict[int, tuple] = {}
+        self._capture = SnapshotCapture()
+        self.hits = 0
+        self.misses = 0
+        self.timing = SystemTiming()
+
+    def encode(
+        self, entities, tick: int = 0, server_time: float = 0, state_hash=None
+    ) -> str:
+        """Captures and encodes the entities in one go"""
+        return self.encode_frame(
+            self._capture.capture(entities, tick, server_time, state_hash)
+        )
+
+    def encode_frame(self, frame: SnapshotFrame) -> str:
+        start = time.perf_counter()
+        fragments = []
+        cache = {}
+        for row in frame.entities:
+            key = (row.version, row.color, row.handle)
+            cached = self._fragments.get(row.serial)
+            if cached is not None and cached[0] == key:
+                self.hits += 1
+            else:
+                self.misses += 1
+                # Same JSON as EntityMessage.model_dump_json, fields in
+                # order, without building and validating a model
+                fragment = to_json(
+                    {
+                        "body": row.body,
+                        "entity_id": row.entity_id,
+                        "color": row.color,
+                        "handle": row.handle,
+                    }
+                ).decode()
+                cached = (key, fragment)
+            cache[row.serial] = cached
+            fragments.append(cached[1])
+        # Entities that are gone are dropped with the old cache
+        self._fragments = cache
+
+        envelope = EntitiesMessage(
+            entities=[],
+            tick=frame.tick,
+            server_time=frame.server_time,
+            state_hash=frame.state_hash,
+        ).model_dump_json()
+        encoded = envelope.replace(
+            _EMPTY_ENTITIES, f'"entities":[{",".join(fragments)}]', 1
+        )
+        self.timing.record((time.perf_counter() - start) * 1000)
+        return encoded
+
+    def clear(self) -> None:
+        self._fragments.clear()
+        self._capture.clear()
@@ -0,0 +1,41 @@
+from collections import deque
+
+from schemas.entities import EntitiesMessage
+from systems.network.snapshot_encoder import SnapshotFrame
+
+
+class SnapshotHistory:
+    """Bounded ring of the most recent keyframes of a room.
+
+    One keyframe is kept per simulation step, as the SnapshotFrame that was
+    broadcast. Reconnecting clients are caught up from it without the game
+    loop having to rebuild any state, keyframes are only turned into
+    messages when one resumes.
+    """
+
+    def __init__(self, capacity: int = 32):
+        self._keyframes: deque[SnapshotFrame] = deque(maxlen=capacity)
+
+    def record(self, keyframe: SnapshotFrame) -> None:
+        if self._keyframes and self._keyframes[-1].tick == keyframe.tick:
+            self._keyframes[-1] = keyframe
+        else:
+            self._keyframes.append(keyframe)
+
+    def latest(self) -> EntitiesMessage | None:
+        return self._keyframes[-1].to_message() if self._keyframes else None
+
+    def since(self, tick: int) -> list[EntitiesMessage]:
+        """Keyframes newer than tick, or the nearest one if tick is too old"""
+        keyframes = [keyframe for keyframe in self._keyframes if keyframe.tick > tick]
+        if keyframes and keyframes[0].tick != tick + 1:
+            # The client missed more than the ring holds, the newest keyframe
+            # alone is enough since every keyframe is a full snapshot
+            keyframes = keyframes[-1:]
+        return [keyframe.to_message() for keyframe in keyframes]
+
+    def clear(self) -> None:
+        self._keyframes.clear()
+
+    def __len__(self):
+        return len(self._keyframes)
@@ -0,0 +1,242 @@
+import random
+from array import array
+
+from entities.base import Entity
+
+FREE = -1
+
+# Boards with more cells than this are stored in chunks, see occupancy_grid
+DENSE_CELLS_LIMIT = 1 << 20
+# Side of a chunk, in cells
+CHUNK_SIZE = 32
+
+
+def occupancy_grid(rows: int, columns: int):
+    """Dense grid for ordinary boards, chunked one for huge arenas"""
+    if rows * columns > DENSE_CELLS_LIMIT:
+        return ChunkedOccupancyGrid(rows, columns)
+    return OccupancyGrid(rows, columns)
+
+
+class _EntitySlots:
+    """Small integer slot per entity, so cells store ints instead of objects"""
+
+    def __init__(self):
+        self._slots: dict[int, int] = {}  # id(entity) -> slot
+        self._slot_entities: dict[int, Entity] = {}
+        self._released_slots: list[int] = []
+
+    def slot_of(self, entity: Entity) -> int | None:
+        return self._slots.get(id(entity))
+
+    def entity(self, slot: int) -> Entity:
+        return self._slot_entities[slot]
+
+    def take(self, entity: Entity) -> int:
+        slot = self._slots.get(id(entity))
+        if slot is None:
+            if self._released_slots:
+                slot = self._released_slots.pop()
+            else:
+                slot = len(self._slots)
+            self._slots[id(entity)] = slot
+            self._slot_entities[slot] = entity
+        return slot
+
+    def release(self, entity: Entity) -> None:
+        slot = self._slots.pop(id(entity), None)
+        if slot is not None:
+            del self._slot_entities[slot]
+            self._released_slots.append(slot)
+
+
+class OccupancyGrid:
+    """Which entity occupies each cell of the board.
+
+    Cells hold a small integer slot per entity, or FREE. The free cells are
+    also kept in a packed index, swapped out and back in as they get
+    occupied and vacated, so any cell lookup and a uniform pick of a free
+    cell are O(1) no matter how crowded the board is.
+    """
+
+    def __init__(self, rows: int, columns: int):
+        self._columns = columns
+        size = rows * columns
+
+        # Plain int arrays, cells are only ever read and written one by one
+        self.cells = array("i", [FREE]) * size
+        self._free_cells = array("i", range(size))
+        self._free_positions = array("i", range(size))
+        self._free_count = size
+        self._entity_slots = _EntitySlots()
+
+    @property
+    def free_count(self) -> int:
+        return self._free_count
+
+    def occupant(self, cell: tuple[int, int]) -> Entity | None:
+        slot = self.cells[self._index(cell)]
+        return None if slot == FREE else self._entity_slots.entity(slot)
+
+    def occupy(self, cell: tuple[int, int], entity: Entity) -> None:
+        index = self._index(cell)
+        if self.cells[index] == FREE:
+            self._take_free(index)
+        self.cells[index] = self._entity_slots.take(entity)
+
+    def vacate(self, cell: tuple[int, int], entity: Entity) -> None:
+        """Frees the cell, unless another entity took it over since"""
+        index = self._index(cell)
+        if self.cells[index] != self._entity_slots.slot_of(entity):
+            return
+        self.cells[index] = FREE
+        self._put_free(index)
+
+    def release(self, entity: Entity) -> None:
+        """Forgets an entity whose cells were all vacated"""
+        self._entity_slots.release(entity)
+
+    def random_free_cell(self, rng: random.Random) -> tuple[int, int] | None:
+        if self._free_count == 0:
+            return None
+        index = self._free_cells[rng.randrange(self._free_count)]
+        return (index % self._columns, index // self._columns)
+
+    def _index(self, cell: tuple[int, int]) -> int:
+        return int(cell[1]) * self._columns + int(cell[0])
+
+    def _take_free(self, index: int) -> None:
+        # Swap with the last free cell and shrink the packed index
+        position = self._free_positions[index]
+        last = self._free_cells[self._free_count - 1]
+        self._free_cells[position] = last
+        self._free_positions[last] = position
+        self._free_cells[self._free_count - 1] = index
+        self._free_positions[index] = self._free_count - 1
+        self._free_count -= 1
+
+    def _put_free(self, index: int) -> None:
+        position = self._free_positions[index]
+        first_taken = self._free_cells[self._free_count]
+        self._free_cells[position] = first_taken
+        self._free_positions[first_taken] = position
+        self._free_cells[self._free_count] = index
+        self._free_positions[index] = self._free_count
+        self._free_count += 1
+
+
+class ChunkedOccupancyGrid:
+    """OccupancyGrid of a huge arena, stored in square chunks.
+
+    A chunk of CHUNK_SIZE x CHUNK_SIZE cells is allocated when one of its
+    cells gets occupied and dropped when its last one is vacated, so memory
+    follows the occupied area and not the size of the arena. Cells wrap
+    around the board like the snakes do, a body may cross the edge and any
+    number of chunk borders.
+
+    Free cells are not indexed. A free cell is picked by drawing cells until
+    a free one comes up, which takes a draw or two on a sparse arena, then
+    by counting the free cells chunk by chunk when the arena is nearly full.
+    """
+
+    _DRAWS = 16
+
+    def __init__(self, rows: int, columns: int):
+        self._rows = rows
+        self._columns = columns
+        self._chunk_columns = -(-columns // CHUNK_SIZE)
+        self._chunk_rows = -(-rows // CHUNK_SIZE)
+
+        self.chunks: dict[int, array] = {}  # Chunk index -> cells
+        self._chunk_counts: dict[int, int] = {}  # Chunk index -> occupied cells
+        self._occupied_count = 0
+        self._entity_slots = _EntitySlots()
+
+    @property
+    def free_count(self) -> int:
+        return self._rows * self._columns - self._occupied_count
+
+    def occupant(self, cell: tuple[int, int]) -> Entity | None:
+        chunk_index, offset = self._locate(cell)
+        chunk = self.chunks.get(chunk_index)
+        if chunk is None or chunk[offset] == FREE:
+            return None
+        return self._entity_slots.entity(chunk[offset])
+
+    def occupy(self, cell: tuple[int, int], entity: Entity) -> None:
+        chunk_index, offset = self._locate(cell)
+        chunk = self.chunks.get(chunk_index)
+        if chunk is None:
+            chunk = self.chunks[chunk_index] = array("i", [FREE]) * CHUNK_SIZE**2
+            self._chunk_counts[chunk_index] = 0
+        if chunk[offset] == FREE:
+            self._chunk_counts[chunk_index] += 1
+            self._occupied_count += 1
+        chunk[offset] = self._entity_slots.take(entity)
+
+    def vacate(self, cell: tuple[int, int], entity: Entity) -> None:
+        """Frees the cell, unless another entity took it over since"""
+        chunk_index, offset = self._locate(cell)
+        chunk = self.chunks.get(chunk_index)
+        slot = self._entity_slots.slot_of(entity)
+        if chunk is None or slot is None or chunk[offset] != slot:
+            return
+        chunk[offset] = FREE
+        self._occupied_count -= 1
+        self._chunk_counts[chunk_index] -= 1
+        if self._chunk_counts[chunk_index] == 0:
+            del self.chunks[chunk_index]
+            del self._chunk_counts[chunk_index]
+
+    def release(self, entity: Entity) -> None:
+        """Forgets an entity whose cells were all vacated"""
+        self._entity_slots.release(entity)
+
+    def random_free_cell(self, rng: random.Random) -> tuple[int, int] | None:
+        if self.free_count == 0:
+            return None
+        for _ in range(self._DRAWS):
+            index = rng.randrange(self._rows * self._columns)
+            cell = (index % self._columns, index // self._columns)
+            if self.occupant(cell) is None:
+                return cell
+        return self._nth_free_cell(rng.randrange(self.free_count))
+
+    def _locate(self, cell: tuple[int, int]) -> tuple[int, int]:
+        """Chunk index and offset in the chunk of a cell, wrapped to the board"""
+        x = int(cell[0]) % self._columns
+        y = int(cell[1]) % self._rows
+        chunk_x, local_x = divmod(x, CHUNK_SIZE)
+        chunk_y, local_y = divmod(y, CHUNK_SIZE)
+        chunk_index = chunk_y * self._chunk_columns + chunk_x
+        return chunk_index, local_y * CHUNK_SIZE + local_x
+
+    def _chunk_bounds(self, chunk_index: int) -> tuple[int, int, int, int]:
+        """Board position and size of a chunk, edge chunks may be cut short"""
+        chunk_y, chunk_x = divmod(chunk_index, self._chunk_columns)
+        left = chunk_x * CHUNK_SIZE
+        top = chunk_y * CHUNK_SIZE
+        width = min(CHUNK_SIZE, self._columns - left)
+        height = min(CHUNK_SIZE, self._rows - top)
+        return left, top, width, height
+
+    def _nth_free_cell(self, n: int) -> tuple[int, int]:
+        """Free cell n, counting the free cells chunk by chunk in board order"""
+        for chunk_index in range(self._chunk_rows * self._chunk_columns):
+            left, top, width, height = self._chunk_bounds(chunk_index)
+            free = width * height - self._chunk_counts.get(chunk_index, 0)
+            if n >= free:
+                n -= free
+                continue
+
+            chunk = self.chunks.get(chunk_index)
+            if chunk is None:
+                return (left + n % width, top + n // width)
+            for local_y in range(height):
+                for local_x in range(width):
+                    if chunk[local_y * CHUNK_SIZE + local_x] != FREE:
+                        continue
+                    if n == 0:
+                        return (left + local_x, top + local_y)
+                    n -= 1
+        raise AssertionError("Free cell count out of sync with the chunks")
@@ -28,3 +28,12 @@ class InputSystem(System):
                 break
         return snake_direction, quit_game
 
+
+class NullInputSystem(System):
+    """Input system for headless clients, never produces any input"""
+
+    def setup(self):
+        pass
+
+    def run(self):
+        return None, False
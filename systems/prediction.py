@@ -0,0 +1,117 @@
+from components.movement.component import MovementComponent
+from entities.type import Snake
+from game_instances.constants import MOVEMENT_STEP_MS
+from schemas.entities import EntitiesMessage, EntityMessage
+from systems.game_logic import GameLogicSystem
+from systems.system import System
+
+
+class PredictionSystem(System):
+    """Predicts the local player's snake ahead of the server.
+
+    The snake is stepped locally with the same SnakeMovement logic the server
+    uses, so the player's turns show up without waiting for a round trip.
+    Every new authoritative step resets the prediction to the server state
+    and replays the commands applied locally after it.
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        columns: int,
+        cell_size: int,
+        step_ms: float = MOVEMENT_STEP_MS,
+        max_steps_ahead: int = 3,
+    ):
+        self._game_logic_system = GameLogicSystem(rows, columns, cell_size)
+        self._step_ms = step_ms
+        self._max_steps_ahead = max_steps_ahead
+
+        self._snake: Snake = None
+        self._server_tick = None
+        self._server_tick_arrival_ms = 0
+        self._predicted_tick = 0
+
+        self._pending_command = None
+        self._commands = {}  # Predicted tick -> command applied on that tick
+
+    def setup(self):
+        pass
+
+    def add_command(self, command: dict) -> None:
+        self._pending_command = command
+
+    def reconcile(
+        self, snapshot: EntitiesMessage, player_handle: int, arrival_ms: float
+    ) -> None:
+        if snapshot.tick == self._server_tick:
+            return
+
+        entity = next(
+            (
+                entity
+                for entity in snapshot.entities
+                if entity.entity_id == "snake" and entity.handle == player_handle
+            ),
+            None,
+        )
+        if entity is None:
+            # Not playing or dead
+            self._snake = None
+            return
+
+        self._server_tick = snapshot.tick
+        self._server_tick_arrival_ms = arrival_ms
+        self._snake = self._snake_from_message(entity)
+
+        # Replay the commands that were predicted after the server step
+        self._commands = {
+            tick: command
+            for tick, command in self._commands.items()
+            if tick > self._server_tick
+        }
+        replay_until = self._predicted_tick
+        self._predicted_tick = self._server_tick
+        while self._predicted_tick < replay_until:
+            self._step(self._commands.get(self._predicted_tick + 1))
+
+    def run(self, now_ms: float) -> Snake | None:
+        """Advances the prediction to the current time"""
+        if self._snake is None:
+            return None
+
+        elapsed_steps = int((now_ms - self._server_tick_arrival_ms) // self._step_ms)
+        target_tick = self._server_tick + min(elapsed_steps, self._max_steps_ahead)
+        while self._predicted_tick < target_tick:
+            command = self._pending_command
+            self._pending_command = None
+            if command is not None:
+                self._commands[self._predicted_tick + 1] = command
+            self._step(command)
+        return self._snake
+
+    def _step(self, command: dict) -> None:
+        self._snake.movement_component.move(command)
+        self._game_logic_system._solve_clipping([self._snake])
+        self._predicted_tick += 1
+
+    def _snake_from_message(self, entity: EntityMessage) -> Snake:
+        snake = Snake(str(entity.handle), (0, 0), color=entity.color)
+        snake.body_component.segments = [tuple(segment) for segment in entity.body]
+        snake.body_component.size = len(entity.body)
+        if len(entity.body) > 1:
+            snake.movement_component.direction = self._direction_from_body(entity.body)
+        return snake
+
+    def _direction_from_body(self, body) -> str:
+        dx = body[0][0] - body[1][0]
+        dy = body[0][1] - body[1][1]
+        # A step longer than one cell means the head wrapped around the board
+        if abs(dx) > 1:
+            dx = -dx // abs(dx)
+        if abs(dy) > 1:
+            dy = -dy // abs(dy)
+        for direction, offset in MovementComponent.command_translator.items():
+            if offset == (dx, dy):
+                return direction
+        return "RIGHT"
@@ -1,39 +1,132 @@
 import pygame
 
-from entities.base import Entity
-
+from systems.render_views import RenderView
 from systems.system import System
 
 
 class RenderSystem(System):
+    """Draws RenderViews, see RenderViews for building them.
+
+    Only the cells whose content changed since the last frame are drawn.
+    The background is kept on its own surface, a changed cell is restored
+    from it and filled again if something lies over it. Only the changed
+    cells are pushed to the display. Cells are compared as dicts of cell ->
+    colour, so finding what moved costs little more than a pass over the
+    segments in C.
+
+    Frames with segments between cells, as interpolated ones, change every
+    sliding segment. The rect around each view of the last frame is
+    restored from the background and the views are drawn over it, only the
+    rects around the old and new views are pushed. The whole window is
+    flipped once they cover most of it.
+    """
+
+    reads = frozenset({RenderView})
+
     def __init__(self, rows: int, columns: int, cell_size: int):
         self.cell_size = cell_size
 
         # Set the screen size
-        screen_width = self.cell_size * columns
-        screen_height = self.cell_size * rows
-        self.window = pygame.display.set_mode((screen_width, screen_height))
-        pygame.display.set_caption("Snake Game")
+        self._screen_size = (self.cell_size * columns, self.cell_size * rows)
+        self.window = None
+        self.background = None
+
+        # Cell -> colour drawn on the last frame, None if it had segments
+        # between cells, then the rect around each view is kept instead
+        self._cells: dict[tuple[int, int], tuple[int, int, int]] | None = None
+        self._rects: list[pygame.Rect] = []
+        # Pushing more rects than this area costs more than a flip
+        self._flip_area = self._screen_size[0] * self._screen_size[1] // 2
 
     def setup(self):
-        self.window.fill((255, 255, 255))
-        pygame.display.flip()
+        # The window is only opened on setup so headless users never get one
+        self.window = pygame.display.set_mode(self._screen_size)
+        pygame.display.set_caption("Snake Game")
 
-    def run(self, entities: list[Entity]):
-        self.window.fill((255, 255, 255))
-
-        for entity in entities:
-            draw_positions = entity.body_component.segments
-            for segment in draw_positions:
-                pygame.draw.rect(
-                    self.window,
-                    entity.color,
-                    (
-                        segment[0] * self.cell_size,
-                        segment[1] * self.cell_size,
-                        self.cell_size,
-                        self.cell_size,
-                    ),
-                )
-        
+        self.background = pygame.Surface(self._screen_size)
+        self.background.fill((255, 255, 255))
+        self.window.blit(self.background, (0, 0))
+        self._cells = {}
+        self._rects = []
         pygame.display.flip()
+
+    def run(self, views: list[RenderView]):
+        if self._cells is None or not all(view.whole for view in views):
+            self._redraw_rects(views)
+            return
+
+        cells = {}
+        for view in views:
+            # Later views are drawn over earlier ones, as in a full redraw
+            cells.update(dict.fromkeys(view.segments, view.color))
+
+        cell_size = self.cell_size
+        rects = []
+        for cell in {cell for cell, _ in cells.items() ^ self._cells.items()}:
+            rect = pygame.Rect(
+                cell[0] * cell_size, cell[1] * cell_size, cell_size, cell_size
+            )
+            color = cells.get(cell)
+            if color is None:
+                self.window.blit(self.background, rect, rect)
+            else:
+                self.window.fill(color, rect)
+            rects.append(rect)
+
+        self._cells = cells
+        if rects:
+            pygame.display.update(rects)
+
+    def _redraw_rects(self, views: list[RenderView]):
+        cell_size = self.cell_size
+        if self._cells is not None:
+            old_rects = [
+                pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
+                for x, y in self._cells
+            ]
+        else:
+            old_rects = self._rects
+        # Everything drawn last frame lies in these, the views are all drawn
+        # again over the background
+        for rect in old_rects:
+            self.window.blit(self.background, rect, rect)
+
+        rects = []
+        for view in views:
+            view_rects = [
+                pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
+                for x, y in view.segments
+            ]
+            if not view_rects:
+                continue
+            for rect in view_rects:
+                self.window.fill(view.color, rect)
+            rects.append(view_rects[0].unionall(view_rects))
+
+        if all(view.whole for view in views):
+            cells = {}
+            for view in views:
+                cells.update(dict.fromkeys(view.segments, view.color))
+            self._cells = cells
+        else:
+            self._cells = None
+        self._rects = rects
+
+        dirty_rects = old_rects + rects
+        if sum(rect.w * rect.h for rect in dirty_rects) > self._flip_area:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
+
+
+class NullRenderSystem(System):
+    """Render system for headless clients, draws nothing"""
+
+    def __init__(self, rows: int, columns: int, cell_size: int):
+        self.cell_size = cell_size
+
+    def setup(self):
+        pass
+
+    def run(self, views: list[RenderView]):
+        pass
@@ -0,0 +1,120 @@
+from entities.base import Entity
+from schemas.entities import EntityMessage
+
+
+class RenderView:
+    """What the RenderSystem draws of an entity: its cells and colour"""
+
+    __slots__ = ("entity_id", "handle", "color", "segments", "whole", "_blended")
+
+    def __init__(self):
+        self.entity_id = None
+        self.handle = None
+        self.color = None
+        self.segments = ()
+        # False when the segments may lie between cells, like interpolated ones
+        self.whole = True
+        # Owned by the view, interpolated bodies are written into it
+        self._blended = []
+
+
+class RenderViews:
+    """Pool of RenderViews, updated in place every frame.
+
+    A frame is built by clear(), then adding snapshot entities or local
+    entities, then frame() hands the views to the RenderSystem. The views
+    and the list holding them are reused from frame to frame, bodies are
+    referenced as they are and interpolated bodies are written into a list
+    owned by the view. Once the pool has grown to the size of the room, a
+    frame only allocates the interpolated cells.
+    """
+
+    def __init__(self):
+        self._pool: list[RenderView] = []
+        self._views: list[RenderView] = []
+        self._count = 0
+
+        # Handle -> body of the older snapshot being blended from, kept
+        # while the same snapshot is blended
+        self._previous_entities = None
+        self._previous_bodies: dict[int, list] = {}
+
+    def clear(self) -> None:
+        self._count = 0
+
+    def frame(self) -> list[RenderView]:
+        """The views added since clear()"""
+        del self._views[self._count :]
+        return self._views
+
+    def add_entities(self, entities: list[Entity]) -> None:
+        """Adds entities simulated on the client, like the predicted snake"""
+        for entity in entities:
+            view = self._next_view()
+            view.entity_id = None
+            view.handle = entity.handle
+            view.color = entity.color
+            view.segments = entity.body_component.segments
+            view.whole = True
+
+    def add_snapshot(
+        self,
+        entities_a: list[EntityMessage],
+        entities_b: list[EntityMessage],
+        alpha: float = 0,
+        skip_handle: int = None,
+    ) -> None:
+        """Adds the entities of a snapshot, blended from the previous one
+        when alpha is in (0, 1), see JitterBuffer.sample_pair"""
+        blend = entities_a is not entities_b and 0 < alpha
+        if blend and entities_a is not self._previous_entities:
+            self._previous_entities = entities_a
+            self._previous_bodies = {entity.handle: entity.body for entity in entities_a}
+
+        for entity in entities_b:
+            if skip_handle is not None and entity.handle == skip_handle:
+                continue
+            view = self._next_view()
+            view.entity_id = entity.entity_id
+            view.handle = entity.handle
+            view.color = entity.color
+
+            previous_body = self._previous_bodies.get(entity.handle) if blend else None
+            if previous_body is None:
+                view.segments = entity.body
+                view.whole = True
+            else:
+                _interpolate_body_into(view._blended, previous_body, entity.body, alpha)
+                view.segments = view._blended
+                view.whole = False
+
+    def _next_view(self) -> RenderView:
+        if self._count == len(self._pool):
+            self._pool.append(RenderView())
+        view = self._pool[self._count]
+        if self._count < len(self._views):
+            self._views[self._count] = view
+        else:
+            self._views.append(view)
+        self._count += 1
+        return view
+
+
+def _interpolate_body_into(body: list, body_a, body_b, alpha: float) -> None:
+    """Same blend as jitter_buffer._interpolate_body, written into body"""
+    del body[len(body_b) :]
+    last_a = len(body_a) - 1
+    for index, segment_b in enumerate(body_b):
+        # Grown segments start from the old tail
+        segment_a = body_a[min(index, last_a)]
+        dx = segment_b[0] - segment_a[0]
+        dy = segment_b[1] - segment_a[1]
+        if abs(dx) + abs(dy) == 1:
+            segment = (segment_a[0] + dx * alpha, segment_a[1] + dy * alpha)
+        else:
+            # Wrapped around the board or teleported, do not slide across it
+            segment = segment_a if alpha < 0.5 else segment_b
+        if index < len(body):
+            body[index] = segment
+        else:
+            body.append(segment)
@@ -0,0 +1,62 @@
+import zlib
+
+from components.body.component import BodyComponent
+from entities.base import Entity
+
+from systems.body_tracker import BodyTracker
+from systems.system import System
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _mix64(value: int) -> int:
+    """splitmix64 finalizer, spreads every input bit over the whole key"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return value ^ (value >> 31)
+
+
+class StateHashSystem(System):
+    """Zobrist style hash of which entity occupies which cell.
+
+    Every (entity, cell) pair has a fixed 64 bit key and the state hash is the
+    XOR of the keys of all occupied cells. A moving snake only XORs its new
+    head and its dropped tail in and out, so each step costs the same no
+    matter how long the bodies are. Peers with the same state always get the
+    same hash, compare it to detect a desync with a few bytes.
+    """
+
+    reads = frozenset({Entity, BodyComponent})
+
+    def __init__(self):
+        self.state_hash = 0
+        self._tracker = BodyTracker()
+
+    def setup(self):
+        pass
+
+    def reset(self):
+        self.state_hash = 0
+        self._tracker.clear()
+
+    def run(self, entities: list[Entity]) -> int:
+        for entity, cells in self._tracker.untrack_missing(entities):
+            self._toggle(entity, cells)
+
+        for entity in entities:
+            if entity in self._tracker:
+                added, removed = self._tracker.update(entity)
+                self._toggle(entity, added)
+                self._toggle(entity, removed)
+            else:
+                self._toggle(entity, self._tracker.track(entity))
+        return self.state_hash
+
+    def _toggle(self, entity: Entity, cells: list[tuple[int, int]]):
+        if not cells:
+            return
+        # The id is hashed instead of hash() so every process agrees on it
+        owner = zlib.crc32(entity._entity_id.encode()) << 32
+        for x, y in cells:
+            self.state_hash ^= _mix64(owner ^ ((x & 0xFFFF) << 16) ^ (y & 0xFFFF))
@@ -0,0 +1,78 @@
+import itertools
+
+import numpy as np
+import pygame
+
+from systems.render_views import RenderView
+from systems.system import System
+
+
+class SurfarrayRenderSystem(System):
+    """Draws RenderViews through a NumPy buffer of one pixel per cell.
+
+    The cells of each view are written into the buffer with one array
+    assignment, the buffer is copied onto a surface the size of the grid
+    with surfarray.blit_array, and that surface is scaled up by the cell
+    size onto the window in a single transform. No Python code runs per
+    segment, which is what large arenas need: past a pass in C over the
+    segments, the cost of a frame follows the number of views and the size
+    of the window.
+
+    Segments between cells, as interpolated ones, are drawn on the cell
+    they start in.
+    """
+
+    reads = frozenset({RenderView})
+
+    def __init__(
+        self,
+        rows: int,
+        columns: int,
+        cell_size: int,
+        background: tuple[int, int, int] = (255, 255, 255),
+    ):
+        self.cell_size = cell_size
+        self._rows = rows
+        self._columns = columns
+
+        # Set the screen size
+        self._screen_size = (self.cell_size * columns, self.cell_size * rows)
+        self.window = None
+
+        # Indexed [x, y] like surfarray, one RGB pixel per cell
+        self._background = np.empty((columns, rows, 3), dtype=np.uint8)
+        self._background[...] = background
+        self._cells = self._background.copy()
+        self._cells_surface = None
+
+    def setup(self):
+        # The window is only opened on setup so headless users never get one
+        self.window = pygame.display.set_mode(self._screen_size)
+        pygame.display.set_caption("Snake Game")
+        self._cells_surface = pygame.Surface((self._columns, self._rows))
+
+        self.window.fill(self._background[0, 0])
+        pygame.display.flip()
+
+    def run(self, views: list[RenderView]):
+        cells = self._cells
+        np.copyto(cells, self._background)
+        for view in views:
+            segments = view.segments
+            if not len(segments):
+                continue
+            positions = np.fromiter(
+                itertools.chain.from_iterable(segments),
+                dtype=np.float64 if not view.whole else np.intp,
+                count=2 * len(segments),
+            )
+            if not view.whole:
+                positions = np.floor(positions).astype(np.intp)
+            # Later views are drawn over earlier ones, as in RenderSystem
+            cells[positions[0::2] % self._columns, positions[1::2] % self._rows] = (
+                view.color
+            )
+
+        pygame.surfarray.blit_array(self._cells_surface, cells)
+        pygame.transform.scale(self._cells_surface, self._screen_size, self.window)
+        pygame.display.flip()
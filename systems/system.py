@@ -1,4 +1,10 @@
 class System:
+    # Component types the system reads and writes, Entity stands for the set
+    # of entities itself. SystemScheduler runs the systems whose sets do not
+    # conflict at the same time.
+    reads: frozenset[type] = frozenset()
+    writes: frozenset[type] = frozenset()
+
     def setup(self):
         return NotImplementedError(f"Child system MUST implement {self.setup.__name__}")
 
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from systems.system import System
+from systems.tick_scheduler import SystemTiming
+
+
+def gil_enabled() -> bool:
+    """False on free threaded CPython builds running without the GIL"""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled() if is_gil_enabled is not None else True
+
+
+def _conflict(first: System, second: System) -> bool:
+    return bool(
+        first.writes & (second.reads | second.writes) or second.writes & first.reads
+    )
+
+
+class SystemScheduler:
+    """Runs systems side by side when their component sets allow it.
+
+    Systems are called with their arguments in the order given, but only the
+    ones that conflict wait for each other: a system writing a component runs
+    after the earlier ones that read or write it, and a system reading it
+    after the earlier ones that write it. Each wave of systems that are ready
+    together runs on the thread pool. Independent rooms share nothing, so
+    run_rooms runs the systems of each room in order and the rooms in
+    parallel.
+
+    With the GIL only systems that release it overlap, so unless told
+    otherwise a single worker is used and everything runs inline. Free
+    threaded builds get one worker per core.
+    """
+
+    def __init__(self, max_workers: int = None):
+        if max_workers is None:
+            max_workers = 1 if gil_enabled() else os.cpu_count() or 1
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers) if max_workers > 1 else None
+        # Waves of call indexes for each sequence of systems already seen
+        self._waves: dict[tuple[System, ...], list[list[int]]] = {}
+
+        self.runs = 0
+        self.wall_ms = 0.0
+        self.systems: dict[str, SystemTiming] = {}
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def run(self, calls: list[tuple[System, tuple]]) -> list:
+        """Runs (system, args) calls, returns their results in the same order"""
+        start = time.perf_counter()
+        timed_results = [None] * len(calls)
+        for wave in self.waves(calls):
+            if self._pool is None or len(wave) == 1:
+                for index in wave:
+                    timed_results[index] = _timed_call(calls[index])
+                continue
+            futures = [
+                (index, self._pool.submit(_timed_call, calls[index]))
+                for index in wave
+            ]
+            for index, future in futures:
+                timed_results[index] = future.result()
+
+        self._record(start, calls, timed_results)
+        return [result for result, _ in timed_results]
+
+    def run_rooms(self, rooms: list[list[tuple[System, tuple]]]) -> list[list]:
+        """Runs the calls of each room in order and the rooms in parallel"""
+        start = time.perf_counter()
+        if self._pool is None:
+            room_results = [_timed_calls(calls) for calls in rooms]
+        else:
+            room_results = list(self._pool.map(_timed_calls, rooms))
+
+        self._record(
+            start,
+            [call for calls in rooms for call in calls],
+            [timed for timed_results in room_results for timed in timed_results],
+        )
+        return [[result for result, _ in timed] for timed in room_results]
+
+    @property
+    def speedup(self) -> float:
+        """Time spent in the systems over the wall time it took to run them"""
+        busy_ms = sum(timing.total_ms for timing in self.systems.values())
+        return busy_ms / self.wall_ms if self.wall_ms else 0.0
+
+    def report(self) -> str:
+        lines = [
+            f"{self.runs} runs on {self.max_workers} workers"
+            f" ({'GIL' if gil_enabled() else 'free threaded'}),"
+            f" {self.wall_ms:.1f} ms wall, {self.speedup:.2f}x parallel speedup"
+        ]
+        for name, timing in self.systems.items():
+            lines.append(
+                f"  {name:<20} {timing.runs:>7} runs {timing.total_ms:9.1f} ms"
+                f" {timing.mean_ms:8.3f} ms mean {timing.worst_ms:8.3f} ms worst"
+            )
+        return "\n".join(lines)
+
+    def waves(self, calls: list[tuple[System, tuple]]) -> list[list[int]]:
+        """Indexes of the calls that run together, wave after wave"""
+        systems = tuple(system for system, _ in calls)
+        waves = self._waves.get(systems)
+        if waves is None:
+            # A system runs one wave after the latest one it conflicts with
+            levels = []
+            for index, system in enumerate(systems):
+                levels.append(
+                    max(
+                        (
+                            levels[earlier] + 1
+                            for earlier in range(index)
+                            if _conflict(systems[earlier], system)
+                        ),
+                        default=0,
+                    )
+                )
+            waves = [[] for _ in range(max(levels, default=-1) + 1)]
+            for index, level in enumerate(levels):
+                waves[level].append(index)
+            self._waves[systems] = waves
+        return waves
+
+    def _record(self, start: float, calls, timed_results) -> None:
+        self.runs += 1
+        self.wall_ms += (time.perf_counter() - start) * 1000
+        for (system, _), (_, elapsed_ms) in zip(calls, timed_results):
+            name = type(system).__name__
+            timing = self.systems.get(name)
+            if timing is None:
+                timing = self.systems[name] = SystemTiming()
+            timing.record(elapsed_ms)
+
+
+def _timed_call(call: tuple[System, tuple]) -> tuple[object, float]:
+    system, args = call
+    start = time.perf_counter()
+    result = system.run(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _timed_calls(calls: list[tuple[System, tuple]]) -> list[tuple[object, float]]:
+    return [_timed_call(call) for call in calls]
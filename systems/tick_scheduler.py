@@ -0,0 +1,187 @@
+import time
+from contextlib import contextmanager
+
+
+class SystemTiming:
+    """Run time statistics of one system against its time budget"""
+
+    __slots__ = ("budget_ms", "runs", "total_ms", "worst_ms", "overruns")
+
+    def __init__(self, budget_ms: float = float("inf")):
+        self.budget_ms = budget_ms
+        self.runs = 0
+        self.total_ms = 0.0
+        self.worst_ms = 0.0
+        self.overruns = 0
+
+    def record(self, elapsed_ms: float) -> None:
+        self.runs += 1
+        self.total_ms += elapsed_ms
+        self.worst_ms = max(self.worst_ms, elapsed_ms)
+        self.overruns += elapsed_ms > self.budget_ms
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.runs if self.runs else 0.0
+
+    def summary(self, name: str) -> str:
+        line = (
+            f"  {name:<12} {self.runs:>6} runs {self.mean_ms:8.3f} ms mean"
+            f" {self.worst_ms:8.3f} ms worst"
+        )
+        if self.budget_ms != float("inf"):
+            line += f" {self.overruns:>4} over {self.budget_ms:.1f} ms"
+        return line
+
+
+class _Rate:
+    """Elapsed time accumulated towards the next event of a fixed rate"""
+
+    __slots__ = ("period_ms", "accumulated_ms")
+
+    def __init__(self, hz: float):
+        self.period_ms = 1000 / hz
+        self.accumulated_ms = 0.0
+
+    def remaining_ms(self) -> float:
+        return self.period_ms - self.accumulated_ms
+
+    def consume(self) -> bool:
+        """Takes one due event out, missed ones are not caught up"""
+        if self.accumulated_ms < self.period_ms:
+            return False
+        self.accumulated_ms %= self.period_ms
+        return True
+
+
+class TickScheduler:
+    """Fixed timestep clock for the simulation, snapshots and input sampling.
+
+    Each rate has its own accumulator of elapsed time and only the period of
+    the events that happened is taken out of it, so the remainder carries
+    over and the simulation does not drift from the wall clock. After a
+    stall at most max_catch_up_steps are simulated at once and the rest is
+    dropped. Snapshots are due at their own rate but only once the state
+    changed since the last one sent.
+
+    Ticks that take longer than a simulation step and the run time of each
+    system timed through it are recorded for the report.
+    """
+
+    def __init__(
+        self,
+        sim_hz: float,
+        snapshot_hz: float = None,
+        input_hz: float = None,
+        max_catch_up_steps: int = 4,
+        system_budgets_ms: dict[str, float] = None,
+    ):
+        self._sim = _Rate(sim_hz)
+        self._snapshots = _Rate(snapshot_hz or sim_hz)
+        self._inputs = _Rate(input_hz or sim_hz)
+        self._max_catch_up_steps = max_catch_up_steps
+        # Systems without a budget of their own may take a whole step
+        self._system_budgets_ms = system_budgets_ms or {}
+        self.start(time.monotonic() * 1000)
+
+    def start(self, now_ms: float) -> None:
+        self.sim_time_ms = now_ms
+        self._last_ms = now_ms
+        self._sim.accumulated_ms = 0.0
+        # The initial state and input are due right away
+        self._snapshots.accumulated_ms = self._snapshots.period_ms
+        self._inputs.accumulated_ms = self._inputs.period_ms
+        self._state_version = 1
+        self._sent_version = 0
+        self._tick_start_ms = now_ms
+
+        self.ticks = 0
+        self.overruns = 0
+        self.worst_tick_ms = 0.0
+        self.dropped_steps = 0
+        self.systems: dict[str, SystemTiming] = {}
+
+    @property
+    def sim_period_ms(self) -> float:
+        return self._sim.period_ms
+
+    def advance(self, now_ms: float) -> int:
+        """Starts a tick, returns the number of simulation steps to run"""
+        self._tick_start_ms = now_ms
+        elapsed_ms = max(0.0, now_ms - self._last_ms)
+        self._last_ms = now_ms
+        for rate in (self._sim, self._snapshots, self._inputs):
+            rate.accumulated_ms += elapsed_ms
+
+        steps = int(self._sim.accumulated_ms // self.sim_period_ms)
+        if steps > self._max_catch_up_steps:
+            # Too far behind, the missed steps are skipped instead of
+            # simulated back to back
+            dropped = steps - self._max_catch_up_steps
+            self.dropped_steps += dropped
+            self._sim.accumulated_ms -= dropped * self.sim_period_ms
+            self.sim_time_ms += dropped * self.sim_period_ms
+            steps = self._max_catch_up_steps
+        return steps
+
+    def step(self) -> float:
+        """Consumes one simulation step, returns its scheduled time in ms"""
+        self._sim.accumulated_ms -= self.sim_period_ms
+        self.sim_time_ms += self.sim_period_ms
+        self._state_version += 1
+        return self.sim_time_ms
+
+    def input_due(self) -> bool:
+        return self._inputs.consume()
+
+    def snapshot_due(self) -> bool:
+        """True once per snapshot period if the state changed since the last"""
+        if self._state_version == self._sent_version:
+            return False
+        if not self._snapshots.consume():
+            return False
+        self._sent_version = self._state_version
+        return True
+
+    def mark_changed(self) -> None:
+        """Flags a change made outside of a simulation step"""
+        self._state_version += 1
+
+    def ms_until_due(self, now_ms: float) -> float:
+        """Time left until the next step or input sample is due"""
+        elapsed_ms = now_ms - self._last_ms
+        return max(
+            0.0,
+            min(self._sim.remaining_ms(), self._inputs.remaining_ms()) - elapsed_ms,
+        )
+
+    def end_tick(self, now_ms: float) -> None:
+        tick_ms = now_ms - self._tick_start_ms
+        self.ticks += 1
+        self.worst_tick_ms = max(self.worst_tick_ms, tick_ms)
+        self.overruns += tick_ms > self.sim_period_ms
+
+    @contextmanager
+    def timed(self, system_name: str):
+        """Records the run time of the block against the system's budget"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            timing = self.systems.get(system_name)
+            if timing is None:
+                budget_ms = self._system_budgets_ms.get(
+                    system_name, self.sim_period_ms
+                )
+                timing = self.systems[system_name] = SystemTiming(budget_ms)
+            timing.record(elapsed_ms)
+
+    def report(self) -> str:
+        lines = [
+            f"{self.ticks} ticks, {self.overruns} over {self.sim_period_ms:.1f} ms,"
+            f" worst {self.worst_tick_ms:.2f} ms, {self.dropped_steps} steps dropped"
+        ]
+        for name, timing in self.systems.items():
+            lines.append(timing.summary(name))
+        return "\n".join(lines)